@@ -0,0 +1,271 @@
+import math
+import numbers
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple, Union
+
+Key = Union[str, Tuple[str, ...]]
+
+
+class Aggregator(ABC):
+    """
+    The base of online aggregators that summarize experiment results without keeping them.
+
+    An aggregator folds results in one at a time with `add`, and two aggregators of the same kind
+    combine their partial states with `merge`. Experiment workers fold the results of each chunk into
+    a fresh copy of the aggregators they were given, and the coordinator merges the copies, so memory
+    grows with the number of distinct values or classes rather than the number of trials.
+
+    Aggregators read the fields of dict results by name, so they stay picklable for worker processes.
+    """
+
+    def __init__(self, key: Key):
+        """
+        Initializes an empty aggregator.
+
+        Args:
+            key (str | Tuple[str, ...]): The result field to aggregate, or several fields read as a tuple.
+        """
+        self.key = key
+
+    def value(self, result: Dict[str, Any]) -> Any:
+        """
+        Reads the aggregated field, or tuple of fields, of a result.
+        """
+        if isinstance(self.key, tuple):
+            return tuple(result[name] for name in self.key)
+        return result[self.key]
+
+    def check(self, result: Dict[str, Any]):
+        """
+        Reads what `add` needs from a result without folding it in, raising if the result cannot be added.
+        Experiments check every aggregator before adding a result to any of them.
+
+        By default the value must be hashable, as aggregators keyed by value need.
+        """
+        hash(self.value(result))
+
+    def empty(self) -> "Aggregator":
+        """
+        Returns an aggregator of the same kind and configuration with no data.
+        """
+        return type(self)(**self._config())
+
+    @abstractmethod
+    def add(self, result: Dict[str, Any]):
+        """
+        Folds one result into the aggregator.
+        """
+
+    @abstractmethod
+    def merge(self, other: "Aggregator") -> "Aggregator":
+        """
+        Folds the partial state of another aggregator of the same kind into this one.
+
+        Returns:
+            Aggregator: This aggregator.
+        """
+
+    @abstractmethod
+    def result(self) -> Any:
+        """
+        Returns the aggregated summary.
+        """
+
+    def _config(self) -> Dict[str, Any]:
+        return {"key": self.key}
+
+
+class Histogram(Aggregator):
+    """
+    Counts the results by the value of a field, such as the distribution of orders.
+    """
+
+    def __init__(self, key: Key):
+        super().__init__(key)
+        self.counts: Dict[Hashable, int] = {}
+
+    def add(self, result: Dict[str, Any]):
+        value = self.value(result)
+        self.counts[value] = self.counts.get(value, 0) + 1
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        return self
+
+    def result(self) -> Dict[Hashable, int]:
+        """
+        Returns:
+            Dict[Hashable, int]: The number of results with each value, sorted by value when possible.
+        """
+        try:
+            return dict(sorted(self.counts.items()))
+        except TypeError:
+            return dict(self.counts)
+
+
+class Statistics(Aggregator):
+    """
+    Tracks the count, mean, variance, minimum and maximum of a numeric field.
+
+    The mean and variance are updated with Welford's method and merged with the parallel formula of
+    Chan et al., which stay accurate over millions of values.
+    """
+
+    def __init__(self, key: Key):
+        super().__init__(key)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+
+    def check(self, result: Dict[str, Any]):
+        value = self.value(result)
+        if not isinstance(value, numbers.Real):
+            raise TypeError(f"Invalid value: {self.key!r} must be a number, got {value!r}.")
+
+    def add(self, result: Dict[str, Any]):
+        value = self.value(result)
+        delta = value - self.mean
+        self.count += 1
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def merge(self, other: "Statistics") -> "Statistics":
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        return self
+
+    def result(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: The count, mean, sample standard deviation, minimum and maximum.
+        """
+        std = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+        return {"count": self.count, "mean": self.mean, "std": std, "min": self.minimum, "max": self.maximum}
+
+
+class GroupBy(Aggregator):
+    """
+    Aggregates the results of each value of a key field separately, with copies of another aggregator.
+
+    Example:
+        >>> GroupBy("order", Statistics("reduced_order"))  # Reduced order statistics per order
+    """
+
+    def __init__(self, key: Key, aggregator: Aggregator):
+        """
+        Args:
+            key (str | Tuple[str, ...]): The field, or fields, to group by.
+            aggregator (Aggregator): The aggregator applied to each group, copied empty for every new group.
+        """
+        super().__init__(key)
+        self.aggregator = aggregator.empty()
+        self.groups: Dict[Hashable, Aggregator] = {}
+
+    def check(self, result: Dict[str, Any]):
+        super().check(result)
+        self.aggregator.check(result)
+
+    def add(self, result: Dict[str, Any]):
+        group = self.value(result)
+        if group not in self.groups:
+            self.groups[group] = self.aggregator.empty()
+        self.groups[group].add(result)
+
+    def merge(self, other: "GroupBy") -> "GroupBy":
+        for group, aggregator in other.groups.items():
+            if group in self.groups:
+                self.groups[group].merge(aggregator)
+            else:
+                self.groups[group] = self.aggregator.empty().merge(aggregator)
+        return self
+
+    def result(self) -> Dict[Hashable, Any]:
+        """
+        Returns:
+            Dict[Hashable, Any]: The result of each group's aggregator, sorted by group when possible.
+        """
+        try:
+            groups = sorted(self.groups.items())
+        except TypeError:
+            groups = list(self.groups.items())
+        return {group: aggregator.result() for group, aggregator in groups}
+
+    def _config(self) -> Dict[str, Any]:
+        return {"key": self.key, "aggregator": self.aggregator}
+
+
+class UnionFind(Aggregator):
+    """
+    Maintains the equivalence classes generated by declaring the values of several fields equivalent.
+
+    Each result joins the classes of its fields' values, with union by size and path halving, so a
+    result costs nearly constant time and memory stays proportional to the number of distinct values.
+
+    Example:
+        >>> UnionFind(("original_order", "reduced_order"))  # Orders connected by a reduction
+    """
+
+    def __init__(self, key: Key):
+        super().__init__(key)
+        self.parent: Dict[Hashable, Hashable] = {}
+        self.size: Dict[Hashable, int] = {}
+
+    def find(self, value: Hashable) -> Hashable:
+        """
+        Returns the representative of a value's class, adding the value as a new class if it is unknown.
+        """
+        if value not in self.parent:
+            self.parent[value] = value
+            self.size[value] = 1
+            return value
+        while self.parent[value] != value:
+            self.parent[value] = self.parent[self.parent[value]]
+            value = self.parent[value]
+        return value
+
+    def union(self, a: Hashable, b: Hashable):
+        """
+        Joins the classes of two values.
+        """
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size.pop(b)
+
+    def add(self, result: Dict[str, Any]):
+        values = self.value(result)
+        if not isinstance(self.key, tuple):
+            values = (values,)
+        first = self.find(values[0])
+        for value in values[1:]:
+            self.union(first, value)
+
+    def merge(self, other: "UnionFind") -> "UnionFind":
+        for value, parent in other.parent.items():
+            self.union(value, parent)
+        return self
+
+    def result(self) -> List[Set[Hashable]]:
+        """
+        Returns:
+            List[Set[Hashable]]: The equivalence classes.
+        """
+        classes: Dict[Hashable, Set[Hashable]] = {}
+        for value in self.parent:
+            classes.setdefault(self.find(value), set()).add(value)
+        return list(classes.values())
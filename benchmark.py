@@ -0,0 +1,262 @@
+import functools
+import json
+import os
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from differenceoperator import DifferenceOperator
+from jacobsonmatthews import JacobsonMatthews
+from latinsquare import LatinSquare
+from permutation import Permutation
+from permutationchain import PermutationChain
+from transformation import Transformation
+
+Result = Dict[str, float]
+
+
+class Benchmark:
+    """
+    Measures the throughput and peak memory of operations and checks them against stored baselines.
+
+    Each case pairs a setup function, which builds the inputs outside of the timed region, with the
+    operation to measure. The operation is repeated until a run takes at least `min_time` seconds,
+    and the best of `repeat` runs is reported as operations per second. Peak memory is the largest
+    amount allocated by a single call, as traced by `tracemalloc` (allocations made in other
+    processes, such as Experiment workers, are not seen).
+
+    Example:
+        >>> benchmark = Benchmark.core(sizes=(4, 8))
+        >>> results = benchmark.run()
+        >>> regressions = Benchmark.compare(results, Benchmark.load("benchmarks/baseline.json"))
+    """
+
+    def __init__(self, repeat: int = 5, min_time: float = 0.2):
+        """
+        Initializes an empty benchmark.
+
+        Args:
+            repeat (int): The number of timed runs of each case, of which the fastest is kept.
+            min_time (float): The minimum duration in seconds of a timed run.
+        """
+        self.repeat = repeat
+        self.min_time = min_time
+        self.cases: Dict[str, Tuple[Callable[[], Any], Callable[[Any], Any], Optional[int], int]] = {}
+
+    def add(self, name: str, setup: Callable[[], Any], func: Callable[[Any], Any], repeat: Optional[int] = None,
+            ops_per_call: int = 1):
+        """
+        Registers a case.
+
+        Args:
+            name (str): A unique name for the case, such as "Permutation.inverse[n=8]".
+            setup (Callable[[], Any]): Builds the input passed to `func`; it is not timed.
+            func (Callable[[Any], Any]): The operation to measure.
+            repeat (int, optional): Overrides the number of timed runs for expensive cases.
+            ops_per_call (int): The number of operations one call of `func` performs.
+
+        Raises:
+            ValueError: If a case with the same name is already registered.
+        """
+        if name in self.cases:
+            raise ValueError(f"Invalid case: {name!r} is already registered.")
+        self.cases[name] = (setup, func, repeat, ops_per_call)
+
+    def run(self, match: Optional[str] = None, verbose: bool = False) -> Dict[str, Result]:
+        """
+        Runs the registered cases.
+
+        Args:
+            match (str, optional): Only runs cases whose name contains this substring.
+            verbose (bool): Prints each result as it is measured.
+
+        Returns:
+            Dict[str, Result]: The "ops_per_sec" and "peak_bytes" of each case.
+        """
+        results = {}
+        for name, (setup, func, repeat, ops_per_call) in self.cases.items():
+            if match is not None and match not in name:
+                continue
+            results[name] = self._measure(setup, func, self.repeat if repeat is None else repeat, ops_per_call)
+            if verbose:
+                print(f"{name:<48} {results[name]['ops_per_sec']:>14,.1f} ops/s "
+                      f"{results[name]['peak_bytes'] / 1024:>12,.1f} KiB")
+        return results
+
+    def _measure(self, setup: Callable[[], Any], func: Callable[[Any], Any], repeat: int, ops_per_call: int) -> Result:
+        """
+        Times one case and traces the peak memory of a single call.
+        """
+        arg = setup()
+
+        number = 1
+        while True:
+            elapsed = Benchmark._time(func, arg, number)
+            if elapsed >= self.min_time or number >= 1 << 30:
+                break
+            number *= 2 if elapsed == 0 else max(2, min(10, int(self.min_time / elapsed) + 1))
+        best = elapsed
+        for _ in range(repeat - 1):
+            best = min(best, Benchmark._time(func, arg, number))
+
+        tracemalloc.start()
+        try:
+            func(arg)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {"ops_per_sec": number * ops_per_call / best if best > 0 else float("inf"), "peak_bytes": float(peak)}
+
+    @staticmethod
+    def _time(func: Callable[[Any], Any], arg: Any, number: int) -> float:
+        """
+        Returns the wall time of `number` consecutive calls.
+        """
+        start = time.perf_counter()
+        for _ in range(number):
+            func(arg)
+        return time.perf_counter() - start
+
+    @staticmethod
+    def save(results: Dict[str, Result], path: str):
+        """
+        Stores results as a JSON baseline.
+
+        Args:
+            results (Dict[str, Result]): The results to store.
+            path (str): The baseline file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    @staticmethod
+    def load(path: str) -> Dict[str, Result]:
+        """
+        Loads a JSON baseline.
+
+        Args:
+            path (str): The baseline file.
+
+        Returns:
+            Dict[str, Result]: The stored results.
+        """
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def compare(results: Dict[str, Result], baseline: Dict[str, Result], threshold: float = 0.2) -> List[str]:
+        """
+        Finds the cases that got slower or use more memory than in the baseline.
+
+        Args:
+            results (Dict[str, Result]): The new results.
+            baseline (Dict[str, Result]): The baseline results.
+            threshold (float): The tolerated relative change (0.2 flags cases more than 20% slower).
+
+        Returns:
+            List[str]: A description of every regression; cases missing from either side are skipped.
+        """
+        regressions = []
+        for name in sorted(set(results) & set(baseline)):
+            new, old = results[name], baseline[name]
+            if new["ops_per_sec"] < old["ops_per_sec"] * (1 - threshold):
+                regressions.append(f"{name}: {new['ops_per_sec']:,.1f} ops/s, "
+                                   f"baseline {old['ops_per_sec']:,.1f} ops/s "
+                                   f"({new['ops_per_sec'] / old['ops_per_sec'] - 1:+.0%})")
+            if new["peak_bytes"] > old["peak_bytes"] * (1 + threshold) and new["peak_bytes"] - old["peak_bytes"] > 1024:
+                regressions.append(f"{name}: {new['peak_bytes']:,.0f} bytes peak, "
+                                   f"baseline {old['peak_bytes']:,.0f} bytes "
+                                   f"({new['peak_bytes'] / max(old['peak_bytes'], 1) - 1:+.0%})")
+        return regressions
+
+    @staticmethod
+    def core(sizes: Sequence[int] = (4, 8, 16, 32, 64), experiment_trials: int = 200, **kwargs) -> "Benchmark":
+        """
+        Builds the benchmark of the core operations over the given sizes.
+
+        Random squares are drawn with the Jacobson–Matthews sampler from a fixed seed, so every run
+        measures the same inputs. Operations whose cost grows too fast to measure at every size are
+        limited to the sizes where they finish: `LatinSquare.generate_random` to n <= 16 and the order
+        of random squares to n <= 6. The order of the cyclic square is measured at every size.
+
+        Args:
+            sizes (Sequence[int]): The sizes n to measure.
+            experiment_trials (int): The number of trials of the end-to-end Experiment case (skipped when 0).
+            **kwargs: Passed to the Benchmark constructor.
+
+        Returns:
+            Benchmark: The benchmark with the core cases registered.
+        """
+        benchmark = Benchmark(**kwargs)
+        for n in sizes:
+            square = lambda n=n: _square(n)
+            perms = lambda n=n: (Permutation(random.Random(n).sample(range(n), n)),
+                                 Permutation(random.Random(-n).sample(range(n), n)))
+
+            benchmark.add(f"Permutation.inverse[n={n}]", lambda n=n: perms(n)[0], lambda p: p.inverse())
+            benchmark.add(f"Permutation.apply[n={n}]", perms, lambda ps: ps[0].apply(ps[1]))
+
+            benchmark.add(f"DifferenceOperator.derivative[n={n}]", square, DifferenceOperator.derivative)
+            if n <= 6:
+                benchmark.add(f"DifferenceOperator.order[n={n}]", square, DifferenceOperator.order)
+                benchmark.add(f"DifferenceOperator.order[ranked,n={n}]", square,
+                              lambda chain: DifferenceOperator.order(chain, "ranked"))
+            benchmark.add(f"DifferenceOperator.order[cyclic,n={n}]", lambda n=n: _cyclic(n),
+                          lambda chain: DifferenceOperator.order(chain, "auto"))
+
+            if n <= 16:
+                benchmark.add(f"LatinSquare.generate_random[n={n}]", lambda n=n: n, LatinSquare.generate_random)
+            benchmark.add(f"LatinSquare.reduce[n={n}]", square, LatinSquare.reduce)
+            benchmark.add(f"LatinSquare.__init__[n={n}]", lambda n=n: square(n).permutations, LatinSquare)
+
+            benchmark.add(f"Transformation.permute_rows[n={n}]", lambda n=n: (square(n), perms(n)[0]),
+                          lambda args: Transformation.permute_rows(*args))
+            benchmark.add(f"Transformation.permute_columns[n={n}]", lambda n=n: (square(n), perms(n)[0]),
+                          lambda args: Transformation.permute_columns(*args))
+            benchmark.add(f"Transformation.transpose[n={n}]", square, Transformation.transpose)
+            benchmark.add(f"Transformation.rotate[n={n}]", square,
+                          lambda chain: Transformation.rotate(chain, "clockwise", 1))
+
+        if experiment_trials:
+            benchmark.add("Experiment.run[n=8]", lambda: experiment_trials, _experiment_throughput, repeat=1,
+                          ops_per_call=experiment_trials)
+        return benchmark
+
+
+@functools.lru_cache(maxsize=None)
+def _square(n: int) -> LatinSquare:
+    """
+    Draws the random Latin square of size n the benchmark cases share. The sampler is only lightly
+    mixed, since the inputs need to be fixed and generic rather than uniform.
+    """
+    return JacobsonMatthews(n, mixing_steps=8 * n, seed=n).sample()
+
+
+def _cyclic(n: int) -> PermutationChain:
+    """
+    Builds the cyclic Latin square of size n as a permutation chain.
+    """
+    return PermutationChain([Permutation([(i + j) % n for j in range(n)]) for i in range(n)])
+
+
+def _derivative_trial(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A small experiment trial: samples a square and takes its derivative.
+    """
+    square = JacobsonMatthews(params["n"], mixing_steps=8 * params["n"], seed=params["trial"]).sample()
+    return {"trial": params["trial"], "rows": len(DifferenceOperator.derivative(square))}
+
+
+def _experiment_throughput(num_trials: int):
+    """
+    Runs an Experiment of `num_trials` small trials on two workers.
+    """
+    from experiment import Experiment
+
+    experiment = Experiment("Benchmark", _derivative_trial)
+    experiment.run({"n": 8}, num_trials=num_trials, num_workers=2, seed=0)
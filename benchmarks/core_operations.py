@@ -0,0 +1,44 @@
+"""
+Benchmarks the core operations against the committed baseline. Run from the repository root:
+
+    python -m benchmarks.core_operations                  # compare with benchmarks/baseline.json
+    python -m benchmarks.core_operations --match order    # only the cases whose name contains "order"
+    python -m benchmarks.core_operations --save           # record a new baseline
+
+Throughput depends on the machine, so record a baseline on the machine the comparison runs on.
+"""
+import argparse
+import sys
+
+from benchmark import Benchmark
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the core operations and checks them against a baseline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 8, 16, 32, 64], help="the sizes n to measure")
+    parser.add_argument("--match", help="only run cases whose name contains this substring")
+    parser.add_argument("--baseline", default="benchmarks/baseline.json", help="the JSON baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="the tolerated relative slowdown")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--experiment-trials", type=int, default=200,
+                        help="the trials of the end-to-end Experiment case (0 skips it)")
+    args = parser.parse_args()
+
+    benchmark = Benchmark.core(sizes=args.sizes, experiment_trials=args.experiment_trials)
+    results = benchmark.run(match=args.match, verbose=True)
+
+    if args.save:
+        Benchmark.save(results, args.baseline)
+        print(f"Saved {len(results)} results to {args.baseline}")
+        sys.exit(0)
+
+    try:
+        baseline = Benchmark.load(args.baseline)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --save to create one.")
+        sys.exit(0)
+
+    regressions = Benchmark.compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print(f"{len(regressions)} regressions beyond {args.threshold:.0%} in {len(results)} cases.")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,231 @@
+from array import array
+from functools import lru_cache
+from itertools import permutations, product
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from latinsquare import LatinSquare
+from permutation import Permutation
+
+Rows = Tuple[Tuple[int, ...], ...]
+
+# The six conjugates of a Latin square, as the roles (row, column, symbol) take in the new square.
+CONJUGATES = ((0, 1, 2), (1, 0, 2), (0, 2, 1), (2, 0, 1), (1, 2, 0), (2, 1, 0))
+
+
+class CanonicalForm:
+    """
+    Computes canonical representatives of Latin squares under isotopy (row, column and symbol
+    permutations) and paratopy (isotopy combined with conjugation).
+
+    The canonical form is the lexicographically smallest reduced square of the class. Its second row
+    is fixed by the shortest cycle structure among all ordered row pairs, so only those row pairs and
+    the symbol relabelings that preserve their cycles are searched, and every candidate is abandoned
+    as soon as one of its rows exceeds the best square found so far. Results are memoized.
+    """
+
+    @staticmethod
+    def isotopy(square: LatinSquare) -> LatinSquare:
+        """
+        Computes the canonical form of a Latin square under row, column and symbol permutations.
+
+        Args:
+            square (LatinSquare): The input Latin square.
+
+        Returns:
+            LatinSquare: The canonical representative of the isotopy class.
+        """
+        return CanonicalForm._to_square(_isotopy_rows(square.to_tuple()))
+
+    @staticmethod
+    def paratopy(square: LatinSquare) -> LatinSquare:
+        """
+        Computes the canonical form of a Latin square under isotopy and conjugation.
+
+        Args:
+            square (LatinSquare): The input Latin square.
+
+        Returns:
+            LatinSquare: The canonical representative of the main class.
+        """
+        return CanonicalForm._to_square(_paratopy_rows(square.to_tuple()))
+
+    @staticmethod
+    def invariant(square: LatinSquare) -> Tuple[Tuple[Tuple[int, ...], ...], int]:
+        """
+        Computes a cheap isotopy invariant: the sorted cycle structures of all row pairs and the
+        number of intercalates (2x2 Latin subsquares).
+
+        Args:
+            square (LatinSquare): The input Latin square.
+
+        Returns:
+            Tuple: Isotopic squares always share the same invariant.
+        """
+        rows = square.to_tuple()
+        cycle_types = sorted(_cycle_type(_row_pair(rows, a, b))
+                             for a in range(len(rows)) for b in range(a + 1, len(rows)))
+        intercalates = sum(cycle_type.count(2) for cycle_type in cycle_types)
+        return tuple(cycle_types), intercalates
+
+    @staticmethod
+    def deduplicate(squares: Iterable[LatinSquare], conjugates: bool = False) -> List[LatinSquare]:
+        """
+        Keeps one square per isotopy class (or main class when conjugates are included).
+
+        Args:
+            squares (Iterable[LatinSquare]): The squares to deduplicate.
+            conjugates (bool): Whether squares related by conjugation count as duplicates.
+
+        Returns:
+            List[LatinSquare]: The canonical forms of the distinct classes, in order of first appearance.
+        """
+        canonical = CanonicalForm.paratopy if conjugates else CanonicalForm.isotopy
+        classes: Dict[LatinSquare, None] = {}
+        for square in squares:
+            classes.setdefault(canonical(square))
+        return list(classes)
+
+    @staticmethod
+    def cache_clear():
+        """
+        Empties the memo cache of canonical forms.
+        """
+        _isotopy_rows.cache_clear()
+        _paratopy_rows.cache_clear()
+
+    @staticmethod
+    def _to_square(rows: Rows) -> LatinSquare:
+        typecode = Permutation.typecode(len(rows))
+        return LatinSquare._trusted([Permutation._trusted(array(typecode, row)) for row in rows])
+
+
+def _row_pair(rows: Rows, a: int, b: int) -> List[int]:
+    """
+    Maps each symbol of row a to the symbol of row b in the same column.
+    """
+    pair = [0] * len(rows)
+    for x, y in zip(rows[a], rows[b]):
+        pair[x] = y
+    return pair
+
+
+def _cycles(perm: List[int]) -> List[List[int]]:
+    """
+    Splits a permutation into its cycles, sorted by length.
+    """
+    seen = [False] * len(perm)
+    cycles = []
+    for start in range(len(perm)):
+        if not seen[start]:
+            cycle = []
+            x = start
+            while not seen[x]:
+                seen[x] = True
+                cycle.append(x)
+                x = perm[x]
+            cycles.append(cycle)
+    cycles.sort(key=len)
+    return cycles
+
+
+def _cycle_type(perm: List[int]) -> Tuple[int, ...]:
+    return tuple(len(cycle) for cycle in _cycles(perm))
+
+
+def _relabelings(cycles: List[List[int]]) -> Iterable[List[int]]:
+    """
+    Yields every symbol relabeling mapping the cycles onto consecutive cycles (0 1 .. l-1)(l ..) ordered by length.
+    """
+    groups: Dict[int, List[List[int]]] = {}
+    for cycle in cycles:
+        groups.setdefault(len(cycle), []).append(cycle)
+    lengths = sorted(groups)
+    orderings = [list(permutations(groups[length])) for length in lengths]
+
+    for ordering in product(*orderings):
+        ordered = [cycle for group in ordering for cycle in group]
+        for starts in product(*(range(len(cycle)) for cycle in ordered)):
+            relabel = [0] * sum(len(cycle) for cycle in ordered)
+            label = 0
+            for cycle, start in zip(ordered, starts):
+                for i in range(len(cycle)):
+                    relabel[cycle[(start + i) % len(cycle)]] = label
+                    label += 1
+            yield relabel
+
+
+@lru_cache(maxsize=1 << 16)
+def _isotopy_rows(rows: Rows) -> Rows:
+    """
+    Computes the lexicographically smallest reduced square isotopic to the given rows.
+    """
+    n = len(rows)
+    if n == 1:
+        return rows
+
+    pairs: Dict[Tuple[int, int], List[List[int]]] = {}
+    best_type: Optional[Tuple[int, ...]] = None
+    for a in range(n):
+        for b in range(n):
+            if a != b:
+                cycles = _cycles(_row_pair(rows, a, b))
+                cycle_type = tuple(len(cycle) for cycle in cycles)
+                if best_type is None or cycle_type < best_type:
+                    best_type = cycle_type
+                    pairs = {}
+                if cycle_type == best_type:
+                    pairs[(a, b)] = cycles
+
+    best: Optional[List[Tuple[int, ...]]] = None
+    for (a, b), cycles in pairs.items():
+        column_of = [0] * n
+        for c, x in enumerate(rows[a]):
+            column_of[x] = c
+        for relabel in _relabelings(cycles):
+            inverse = [0] * n
+            for x, label in enumerate(relabel):
+                inverse[label] = x
+            first_column = column_of[inverse[0]]
+            row_of = [0] * n
+            for r in range(n):
+                row_of[rows[r][first_column]] = r
+            target_column = [relabel[x] for x in rows[a]]
+
+            candidate: List[Tuple[int, ...]] = []
+            smaller = best is None
+            for k in range(n):
+                source = rows[row_of[inverse[k]]]
+                new_row = [0] * n
+                for c in range(n):
+                    new_row[target_column[c]] = relabel[source[c]]
+                new_row = tuple(new_row)
+                if not smaller:
+                    if new_row > best[k]:
+                        break
+                    smaller = new_row < best[k]
+                candidate.append(new_row)
+            else:
+                if smaller:
+                    best = candidate
+    return tuple(best)
+
+
+def _conjugate(rows: Rows, roles: Tuple[int, int, int]) -> Rows:
+    """
+    Builds the conjugate square in which row, column and symbol take the given roles.
+    """
+    n = len(rows)
+    conjugate = [[0] * n for _ in range(n)]
+    for r, row in enumerate(rows):
+        for c, s in enumerate(row):
+            triple = (r, c, s)
+            conjugate[triple[roles[0]]][triple[roles[1]]] = triple[roles[2]]
+    return tuple(tuple(row) for row in conjugate)
+
+
+@lru_cache(maxsize=1 << 16)
+def _paratopy_rows(rows: Rows) -> Rows:
+    """
+    Computes the smallest canonical isotopy form over the six conjugates of the given rows.
+    """
+    return min(_isotopy_rows(_conjugate(rows, roles)) for roles in CONJUGATES)
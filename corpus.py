@@ -0,0 +1,284 @@
+import contextlib
+import fcntl
+import os
+import struct
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from latinsquare import LatinSquare
+from permutation import Permutation
+from permutationchain import PermutationChain
+
+MAGIC = b"LSCORPUS1\n"
+HEADER = struct.Struct("<H")
+
+Squares = Union[LatinSquare, np.ndarray]
+
+
+class Corpus:
+    """
+    An append-only file of Latin squares of one size n, stored as n * n packed symbols per square.
+
+    The file holds a short header followed by fixed-size records in row-major order, one byte per
+    symbol for n <= 256, so the squares can be read back as a zero-copy (B, n, n) memory-mapped
+    array. A record cut short by a crash is dropped when the corpus is next appended to.
+
+    A hash index keeps a 64-bit hash of every square in a sidecar file (`<path>.index`), which is
+    extended with the file and rebuilt for any records it is missing. It is loaded into a dictionary
+    to answer membership checks, find the position of a square and skip duplicates on append.
+    Appends, and rebuilds of the index file, are serialized by a lock file (`<path>.lock`), so several
+    processes can extend and read the same corpus. `fcntl` locks make the module POSIX-only.
+
+    Example:
+        >>> corpus = Corpus("squares-7.lsc", n=7)
+        >>> corpus.append(np.stack([JacobsonMatthews(7).sample().to_numpy() for _ in range(1000)]))
+        >>> corpus.squares()[:10]  # A (10, 7, 7) view of the file
+    """
+
+    _shared: Dict[str, "Corpus"] = {}
+
+    def __init__(self, path: str, n: Optional[int] = None):
+        """
+        Opens a corpus file, creating it if needed.
+
+        Args:
+            path (str): The path of the corpus file.
+            n (int, optional): The size of the squares, required to create a new corpus.
+
+        Raises:
+            ValueError: If the file is not a corpus, holds squares of another size, or n is missing
+                for a new corpus.
+        """
+        self.path = path
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            if n is None:
+                raise ValueError(f"Invalid corpus: {path} does not exist and no size was given to create it.")
+            with open(path, "wb") as f:
+                f.write(MAGIC + HEADER.pack(n))
+        with open(path, "rb") as f:
+            header = f.read(len(MAGIC) + HEADER.size)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Invalid corpus: {path} was not written by a Corpus.")
+        self.n = HEADER.unpack(header[len(MAGIC):])[0]
+        if n is not None and n != self.n:
+            raise ValueError(f"Invalid size: {path} holds squares of size {self.n}, not {n}.")
+
+        self.dtype = np.dtype(Permutation.typecode(self.n))
+        self.offset = len(MAGIC) + HEADER.size
+        self.record_size = self.n * self.n * self.dtype.itemsize
+        self._weights = Corpus._hash_weights(self.n * self.n)
+        self._count = 0
+        self._view: Optional[np.ndarray] = None
+        self._hashes: Dict[int, int] = {}
+        self._collisions: Dict[int, List[int]] = {}
+        self._refresh()
+
+    @staticmethod
+    def shared(path: str) -> "Corpus":
+        """
+        Returns the corpus opened by the current process for a file, opening it on first use.
+
+        Args:
+            path (str): The path of an existing corpus file.
+
+        Returns:
+            Corpus: The process-wide corpus.
+        """
+        if path not in Corpus._shared:
+            Corpus._shared[path] = Corpus(path)
+        return Corpus._shared[path]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def squares(self) -> np.ndarray:
+        """
+        Maps the squares of the corpus, including those other processes appended since the last call.
+
+        Returns:
+            np.ndarray: A read-only (B, n, n) array backed by the file.
+        """
+        self._refresh()
+        if self._view is None or len(self._view) != self._count:
+            if self._count == 0:
+                self._view = np.empty((0, self.n, self.n), dtype=self.dtype)
+            else:
+                self._view = np.memmap(self.path, dtype=self.dtype, mode="r", offset=self.offset,
+                                       shape=(self._count, self.n, self.n))
+        return self._view
+
+    def square(self, index: int) -> LatinSquare:
+        """
+        Reads one square of the corpus.
+
+        Args:
+            index (int): The position of the square.
+
+        Returns:
+            LatinSquare: The square, which was validated when it was appended.
+        """
+        squares = self.squares()
+        if not -len(squares) <= index < len(squares):
+            raise IndexError(f"Corpus index {index} out of range for {len(squares)} squares.")
+        return LatinSquare._trusted(PermutationChain._from_numpy(np.asarray(squares[index])).permutations)
+
+    def find(self, square: Squares) -> Optional[int]:
+        """
+        Looks up the position of a square in the corpus.
+
+        Args:
+            square (LatinSquare | np.ndarray): The square, as a LatinSquare or an (n, n) array.
+
+        Returns:
+            Optional[int]: The position of its first occurrence, or None if it is not in the corpus.
+
+        Raises:
+            ValueError: If the square has the wrong size or symbols outside [0, n).
+        """
+        values = Corpus._values(square, self.n, self.dtype)[0]
+        self._refresh()
+        return self._find(values, int(self._hash(values[None])[0]))
+
+    def __contains__(self, square: Squares) -> bool:
+        return self.find(square) is not None
+
+    def append(self, squares: Squares, dedupe: bool = True) -> int:
+        """
+        Appends squares to the corpus and flushes them to disk.
+
+        Args:
+            squares (LatinSquare | np.ndarray): A LatinSquare, an (n, n) array or a (B, n, n) array of squares.
+            dedupe (bool): Skips squares already in the corpus, or repeated in the batch.
+
+        Returns:
+            int: The number of squares written.
+
+        Raises:
+            ValueError: If the squares have the wrong size or are not Latin squares.
+        """
+        values = Corpus._values(squares, self.n, self.dtype)
+        if len(values) and not LatinSquare.validate_batch(values).all():
+            raise ValueError("Invalid Latin Square: Must be square, with each symbol exactly once in every column.")
+        with self._lock():
+            self._refresh(locked=True)
+            hashes = self._hash(values)
+            if dedupe:
+                keep = []
+                batch: Dict[int, List[int]] = {}
+                for i, h in enumerate(hashes.tolist()):
+                    if self._find(values[i], h) is None and not any(
+                            np.array_equal(values[i], values[j]) for j in batch.get(h, ())):
+                        batch.setdefault(h, []).append(i)
+                        keep.append(i)
+                values, hashes = values[keep], hashes[keep]
+
+            with open(self.path, "r+b") as f:
+                f.truncate(self.offset + self._count * self.record_size)  # Drop a partial record
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(values).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.path + ".index", "ab") as f:
+                f.write(hashes.tobytes())
+            self._index(hashes, self._count)
+            self._count += len(values)
+        return len(values)
+
+    @contextlib.contextmanager
+    def _lock(self) -> Iterator[None]:
+        """
+        Holds the exclusive lock of the corpus, which writers of the data and index files take.
+        """
+        with open(self.path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _refresh(self, locked: bool = False):
+        """
+        Catches up with the records appended to the file since it was last read, hashing any
+        records the index file is missing.
+
+        Args:
+            locked (bool): Whether the caller holds the lock. Without it, a short index may only mean
+                that a writer has not appended its hashes yet, so the index is read again under the
+                lock before it is rebuilt.
+        """
+        count = (os.path.getsize(self.path) - self.offset) // self.record_size
+        if count == self._count:
+            return
+        index_path = self.path + ".index"
+        data = b""
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as f:
+                data = f.read()
+        indexed = np.frombuffer(data[:len(data) // 8 * 8], dtype=np.uint64)[:count]
+        if len(indexed) < count:
+            if not locked:
+                with self._lock():
+                    self._refresh(locked=True)
+                return
+            squares = np.memmap(self.path, dtype=self.dtype, mode="r", offset=self.offset, shape=(count, self.n, self.n))
+            missing = self._hash(np.asarray(squares[len(indexed):]))
+            indexed = np.concatenate([indexed, missing])
+            with open(index_path, "wb") as f:
+                f.write(indexed.tobytes())
+        self._index(indexed[self._count:count], self._count)
+        self._count = count
+
+    def _index(self, hashes: np.ndarray, start: int):
+        """
+        Adds the hashes of consecutive records to the in-memory index.
+        """
+        for i, h in enumerate(hashes.tolist(), start):
+            first = self._hashes.setdefault(h, i)
+            if first != i:
+                self._collisions.setdefault(h, []).append(i)
+
+    def _find(self, values: np.ndarray, h: int) -> Optional[int]:
+        """
+        Finds a square in the index, comparing the contents of every record with the same hash.
+        """
+        if h not in self._hashes:
+            return None
+        squares = np.memmap(self.path, dtype=self.dtype, mode="r", offset=self.offset,
+                            shape=(self._count, self.n, self.n))
+        for i in [self._hashes[h]] + self._collisions.get(h, []):
+            if np.array_equal(squares[i], values):
+                return i
+        return None
+
+    def _hash(self, values: np.ndarray) -> np.ndarray:
+        """
+        Hashes a batch of squares to 64-bit integers, with wrapping polynomial arithmetic and a final mix.
+        """
+        flat = values.reshape(len(values), -1).astype(np.uint64)
+        h = ((flat + np.uint64(1)) * self._weights).sum(axis=1, dtype=np.uint64)
+        h ^= h >> np.uint64(31)
+        h *= np.uint64(0xBF58476D1CE4E5B9)
+        h ^= h >> np.uint64(29)
+        return h
+
+    @staticmethod
+    def _hash_weights(size: int) -> np.ndarray:
+        weights = np.empty(size, dtype=np.uint64)
+        weight = 1
+        for i in range(size):
+            weights[i] = weight
+            weight = weight * 0x9E3779B97F4A7C15 % (1 << 64)
+        return weights
+
+    @staticmethod
+    def _values(squares: Squares, n: int, dtype: np.dtype) -> np.ndarray:
+        """
+        Converts a square or a batch of squares to a (B, n, n) array in the corpus type.
+        """
+        values = squares.to_numpy() if isinstance(squares, LatinSquare) else np.asarray(squares)
+        if values.ndim == 2:
+            values = values[None]
+        if values.ndim != 3 or values.shape[1:] != (n, n):
+            raise ValueError(f"Invalid squares: Expected an array of shape (B, {n}, {n}).")
+        # Check the range before narrowing, which would wrap symbols that do not fit the corpus type.
+        if values.size and (values.min() < 0 or values.max() >= n):
+            raise ValueError(f"Invalid squares: Symbols must lie in [0, {n}).")
+        return values.astype(dtype, copy=False)
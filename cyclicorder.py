@@ -0,0 +1,318 @@
+import math
+import random
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from permutation import Permutation
+from permutationchain import PermutationChain
+
+
+class CyclicOrder:
+    """
+    Computes trajectories under the derivative algebraically for chains whose rows are all powers
+    of a single permutation g (for example the rows of a cyclic Latin square).
+
+    Writing row i as g^(a_i), the derivative becomes the linear map a_i -> a_i - a_(i+1) over Z_k,
+    where k is the order of g. Encoding the exponents as the polynomial a(x) = sum a_i x^i in
+    Z_k[x]/(x^m - 1), one step multiplies it by c(x) = 1 - x^(m-1). The preperiod is bounded by the
+    length of that ring and the period divides a known multiple of the order of c, so both are found
+    with a logarithmic number of polynomial multiplications instead of simulating every step.
+    """
+
+    @staticmethod
+    def find_generator(chain: PermutationChain) -> Optional[Permutation]:
+        """
+        Looks for a permutation of which every row of the chain is a power, trying the row of largest order.
+
+        Args:
+            chain (PermutationChain): The input permutation chain.
+
+        Returns:
+            Optional[Permutation]: The generator, or None if the row of largest order does not generate every row.
+        """
+        if len(chain) == 0:
+            return None
+        generator = max(chain.permutations, key=CyclicOrder.permutation_order)
+        return generator if CyclicOrder.exponents(chain, generator) is not None else None
+
+    @staticmethod
+    def permutation_order(perm: Permutation) -> int:
+        """
+        Computes the order of a permutation, the least common multiple of its cycle lengths.
+
+        Args:
+            perm (Permutation): The permutation.
+
+        Returns:
+            int: The order of the permutation.
+        """
+        return math.lcm(*(len(cycle) for cycle in _cycles(perm._values)))
+
+    @staticmethod
+    def exponents(chain: PermutationChain, generator: Permutation) -> Optional[List[int]]:
+        """
+        Expresses every row of the chain as a power of the generator.
+
+        Args:
+            chain (PermutationChain): The input permutation chain.
+            generator (Permutation): The candidate generator g.
+
+        Returns:
+            Optional[List[int]]: The exponents a_i with row i equal to g^(a_i), reduced modulo the order
+                of g, or None if some row is not a power of g.
+        """
+        cycles = _cycles(generator._values)
+        where = {}
+        for index, cycle in enumerate(cycles):
+            for position, x in enumerate(cycle):
+                where[x] = (index, position)
+
+        exponents = []
+        for row in chain.permutations:
+            values = row._values
+            if len(values) != len(generator._values):
+                return None
+            exponent, modulus = 0, 1
+            for cycle in cycles:
+                index, position = where[values[cycle[0]]]
+                if cycles[index] is not cycle:
+                    return None
+                combined = _crt(exponent, modulus, position, len(cycle))
+                if combined is None:
+                    return None
+                exponent, modulus = combined
+            for x, (index, position) in where.items():
+                cycle = cycles[index]
+                if values[x] != cycle[(position + exponent) % len(cycle)]:
+                    return None
+            exponents.append(exponent)
+        return exponents
+
+    @staticmethod
+    def trajectory(exponents: List[int], k: int) -> Tuple[int, int]:
+        """
+        Computes the preperiod and period of an exponent vector under a_i -> a_i - a_(i+1) over Z_k.
+
+        Args:
+            exponents (List[int]): The exponents of the rows.
+            k (int): The order of the generator.
+
+        Returns:
+            Tuple[int, int]: The preperiod and period, equal to those of the chain the exponents encode.
+
+        Raises:
+            ValueError: If a multiple of the period cannot be factored within the iteration budget.
+        """
+        m = len(exponents)
+        preperiod, period = 0, 1
+        # Z_k splits into its prime-power parts, which evolve independently.
+        for p, e in _factorize(k).items():
+            q = p ** e
+            ring = _Ring(m, q)
+            a = ring.element(exponents)
+            c = ring.element([1] + [0] * (m - 2) + [-1] if m > 1 else [0])
+            component_preperiod, component_period = CyclicOrder._component_trajectory(ring, a, c, p, e)
+            preperiod = max(preperiod, component_preperiod)
+            period = math.lcm(period, component_period)
+        return preperiod, period
+
+    @staticmethod
+    def _component_trajectory(ring: "_Ring", a: np.ndarray, c: np.ndarray, p: int, e: int) -> Tuple[int, int]:
+        """
+        Computes the preperiod and period of t -> c^t a in Z_(p^e)[x]/(x^m - 1).
+        """
+        m = ring.m
+        length = m * e  # Bounds the preperiod: the ideals c^t R can only shrink this many times
+        settled = ring.mul(ring.pow(c, length), a)
+        if not settled.any():
+            return CyclicOrder._first(lambda t: not ring.mul(ring.pow(c, t), a).any(), length), 1
+
+        # Every unit u satisfies u^((p^o - 1) p^E) = 1, where the residue fields have degree dividing o
+        # and E bounds the exponent of 1 + (the nilpotent radical).
+        m_prime = m
+        while m_prime % p == 0:
+            m_prime //= p
+        o = _multiplicative_order(p, m_prime)
+        exponent = e + math.ceil(math.log(length + 1, p))
+        factors = _factorize(p ** o - 1)
+        factors[p] = factors.get(p, 0) + exponent
+        multiple = (p ** o - 1) * p ** exponent
+
+        period = 1
+        for q, v in factors.items():
+            w = ring.pow(c, multiple // q ** v)
+            j = 0
+            while not np.array_equal(ring.mul(w, settled), settled):
+                w = ring.pow(w, q)
+                j += 1
+            period *= q ** j
+
+        def periodic(t: int) -> bool:
+            shifted = ring.mul(ring.pow(c, t), a)
+            return np.array_equal(ring.mul(ring.pow(c, period), shifted), shifted)
+
+        return CyclicOrder._first(periodic, length), period
+
+    @staticmethod
+    def _first(predicate, upper: int) -> int:
+        """
+        Finds the smallest t in [0, upper] satisfying a monotone predicate that holds at `upper`.
+        """
+        low, high = 0, upper
+        while low < high:
+            middle = (low + high) // 2
+            if predicate(middle):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+
+class _Ring:
+    """
+    Arithmetic in Z_q[x]/(x^m - 1) on coefficient arrays.
+    """
+
+    def __init__(self, m: int, q: int):
+        self.m = m
+        self.q = q
+        # Products of two reduced coefficients summed m times must fit in int64.
+        self.dtype = np.int64 if (q - 1) ** 2 * m < 1 << 62 else object
+
+    def element(self, coefficients: List[int]) -> np.ndarray:
+        return np.array([x % self.q for x in coefficients], dtype=self.dtype)
+
+    def mul(self, f: np.ndarray, g: np.ndarray) -> np.ndarray:
+        full = np.convolve(f, g)
+        result = full[:self.m].copy()
+        result[:len(full) - self.m] += full[self.m:]
+        return result % self.q
+
+    def pow(self, f: np.ndarray, t: int) -> np.ndarray:
+        result = self.element([1] + [0] * (self.m - 1))
+        while t:
+            if t & 1:
+                result = self.mul(result, f)
+            f = self.mul(f, f)
+            t >>= 1
+        return result
+
+
+def _cycles(values) -> List[List[int]]:
+    seen = [False] * len(values)
+    cycles = []
+    for start in range(len(values)):
+        if not seen[start]:
+            cycle = []
+            x = start
+            while not seen[x]:
+                seen[x] = True
+                cycle.append(x)
+                x = values[x]
+            cycles.append(cycle)
+    return cycles
+
+
+def _crt(r1: int, m1: int, r2: int, m2: int) -> Optional[Tuple[int, int]]:
+    """
+    Combines x = r1 (mod m1) and x = r2 (mod m2), returning (x, lcm) or None if they are inconsistent.
+    """
+    g = math.gcd(m1, m2)
+    if (r2 - r1) % g:
+        return None
+    lcm = m1 // g * m2
+    step = (r2 - r1) // g * pow(m1 // g, -1, m2 // g) % (m2 // g) if m2 // g > 1 else 0
+    return (r1 + m1 * step) % lcm, lcm
+
+
+def _multiplicative_order(p: int, m: int) -> int:
+    if m == 1:
+        return 1
+    order, power = 1, p % m
+    while power != 1:
+        power = power * p % m
+        order += 1
+    return order
+
+
+def _is_prime(n: int) -> bool:
+    if n < 2:
+        return False
+    for p in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _pollard_brent(n: int, budget: int = 1 << 22) -> int:
+    """
+    Finds a non-trivial factor of a composite n.
+
+    Raises:
+        ValueError: If no factor is found within the iteration budget.
+    """
+    if n % 2 == 0:
+        return 2
+    rng = random.Random(n)
+    while budget > 0:
+        y, c, m = rng.randrange(1, n), rng.randrange(1, n), 128
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            budget -= r
+            if budget <= 0:
+                break
+            k = 0
+            while k < r and g == 1:
+                saved = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                saved = (saved * saved + c) % n
+                g = math.gcd(abs(x - saved), n)
+        if 1 < g < n:
+            return g
+    raise ValueError(f"Factorization failed: No factor of {n} found within the iteration budget.")
+
+
+def _factorize(n: int) -> Dict[int, int]:
+    """
+    Factors n into primes, returning the multiplicity of each.
+    """
+    factors: Dict[int, int] = {}
+    for p in range(2, 1000):
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+    stack = [n] if n > 1 else []
+    while stack:
+        x = stack.pop()
+        if _is_prime(x):
+            factors[x] = factors.get(x, 0) + 1
+        else:
+            d = _pollard_brent(x)
+            stack.extend((d, x // d))
+    return factors
@@ -1,5 +1,16 @@
+from array import array
+from typing import Optional, Tuple
+
+import numpy as np
+
+from cyclicorder import CyclicOrder
+from functionalgraph import FunctionalGraph
+from instrumentation import Instrumentation
+from ordercache import OrderCache
 from permutation import Permutation
 from permutationchain import PermutationChain
+from ranktables import RankTables
+from symmetryoracle import SymmetryOracle
 
 
 class DifferenceOperator:
@@ -20,7 +31,25 @@ class DifferenceOperator:
         Returns:
             Permutation: The resulting permutation difference.
         """
-        return p2.inverse().apply(p1)
+        out = p1._values[:]
+        DifferenceOperator.difference_into(p1._values, p2._values, out, p2._values[:])
+        return Permutation._trusted(out)
+
+    @staticmethod
+    def difference_into(p1: array, p2: array, out: array, scratch: array) -> None:
+        """
+        Computes the difference p2^-1 ∘ p1 of two permutation value arrays into a preallocated buffer.
+
+        Args:
+            p1 (array): The values of the first permutation.
+            p2 (array): The values of the second permutation.
+            out (array): The buffer receiving the difference, of the same length as p1.
+            scratch (array): A work buffer of the same length as p1, overwritten with the inverse of p2.
+        """
+        for i, v in enumerate(p2):
+            scratch[v] = i
+        for i, v in enumerate(p1):
+            out[i] = scratch[v]
 
     @staticmethod
     def derivative(chain: PermutationChain) -> PermutationChain:
@@ -35,37 +64,439 @@ class DifferenceOperator:
         """
         if len(chain) == 0:
             return PermutationChain([])
-        return PermutationChain([
-            DifferenceOperator.difference(chain[i], chain[(i + 1) % len(chain)])
-            for i in range(len(chain))
-        ])
+        n = len(chain[0])
+        source = chain.to_buffer()
+        target = source[:]
+        DifferenceOperator.derivative_into(source, target, source[:n], n)
+        return PermutationChain._from_buffer(target, n)
 
     @staticmethod
-    def order(chain: PermutationChain) -> int:
+    def derivative_into(source: array, target: array, scratch: array, n: int) -> None:
+        """
+        Computes the derivative of a packed permutation chain into a preallocated buffer.
+
+        Row i of the target is p_{i+1}^-1 ∘ p_i, computed without building intermediate permutations.
+
+        Args:
+            source (array): The chain's rows concatenated into one buffer of length m * n.
+            target (array): The buffer receiving the derivative, of the same length as source.
+            scratch (array): A work buffer of length n.
+            n (int): The size of each permutation.
+        """
+        size = len(source)
+        for start in range(0, size, n):
+            following = (start + n) % size
+            for i in range(n):
+                scratch[source[following + i]] = i
+            for i in range(start, start + n):
+                target[i] = scratch[source[i]]
+
+    @staticmethod
+    def order(chain: PermutationChain, method: str = "seen", cache: Optional[OrderCache] = None,
+              generator: Optional[Permutation] = None, symmetry: str = "none") -> int:
         """
         Computes the order of a permutation chain under repeated application of the derivative.
 
         Args:
             chain (PermutationChain): The input permutation chain.
+            method (str): The cycle detection method: "seen" (stores every visited chain),
+                "brent" or "floyd" (constant memory), "ranked" (like "seen" on Lehmer ranks, for
+                permutations of size at most 8), "graph" (a lookup in the `FunctionalGraph` of all
+                chains of the same shape), "algebraic" (rows must all be powers of one permutation)
+                or "auto" (algebraic when possible, "seen" otherwise).
+            cache (OrderCache, optional): A cache of known trajectories to consult and extend.
+            generator (Permutation, optional): A permutation of which every row is a power, for the
+                algebraic methods. It is looked for among the rows when omitted.
+            symmetry (str): "none", "reduce" or "verify", see `trajectory`.
 
         Returns:
-            int: The number of steps before the chain returns to the identity.
+            int: The number of steps before the chain reaches the identity, or the cycle length
+                if it never does.
+
+        Raises:
+            ValueError: If the method is unknown.
         """
         if len(chain) == 0:
             print("Error: Empty permutation chain received.")
             return -1
 
+        preperiod, period = DifferenceOperator.trajectory(chain, method, cache, generator, symmetry)
+        # The identity is the only fixed point of the derivative, so a period of 1 means the
+        # preperiod counts the steps taken to reach it.
+        return preperiod if period == 1 else period
+
+    @staticmethod
+    def trajectory(chain: PermutationChain, method: str = "brent", cache: Optional[OrderCache] = None,
+                   generator: Optional[Permutation] = None, symmetry: str = "none") -> Tuple[int, int]:
+        """
+        Computes the preperiod and period of a permutation chain under repeated application of the derivative.
+
+        The iteration runs on packed buffers that are swapped between steps, so the hot loop
+        builds no intermediate permutations or chains. With a cache, the "seen" method stops as soon
+        as it reaches a known state and records every state it visited; the constant-memory methods
+        only look up and record the starting chain.
+
+        When every row is a power of one permutation (as in cyclic Latin squares), the "algebraic"
+        method solves the trajectory with polynomial arithmetic instead of simulating it (see
+        `CyclicOrder`), which stays fast for sizes in the thousands.
+
+        For permutations of size at most 8, the "ranked" method iterates on arrays of Lehmer ranks
+        and takes each derivative row with one lookup in the precomputed `RankTables`; like the
+        constant-memory methods, it only looks up and records the starting chain in the cache. The
+        "graph" method looks the trajectory up in the `FunctionalGraph` of every chain of the same
+        shape, which is built and saved on first use and only exists for small shapes.
+
+        With symmetry reduction, the trajectory is computed for the `SymmetryOracle` representative of
+        the first derivative, which is shared by every cyclic shift and column permutation of the chain,
+        and cached per representative when a cache is given.
+        The trajectory of the chain follows from it with at most one cycle's worth of extra steps.
+
+        While `Instrumentation` is enabled, the call records its time under the "trajectory" stage,
+        the derivative steps taken, the preperiod and period (appended to the lists of the trial's
+        trajectories), the peak size of the "seen" table and the size of the cache.
+
+        Args:
+            chain (PermutationChain): The input permutation chain.
+            method (str): The cycle detection method: "seen" (stores every visited chain),
+                "brent" or "floyd" (constant memory), "ranked" (like "seen" on Lehmer ranks, for
+                permutations of size at most 8), "graph" (a lookup in the `FunctionalGraph` of all
+                chains of the same shape), "algebraic" (rows must all be powers of one permutation)
+                or "auto" (algebraic when possible, "seen" otherwise).
+            cache (OrderCache, optional): A cache of known trajectories to consult and extend.
+            generator (Permutation, optional): A permutation of which every row is a power, for the
+                algebraic methods. It is looked for among the rows when omitted.
+            symmetry (str): "none", "reduce" (go through the symmetry representative) or "verify"
+                (also compute the trajectory directly and check that both agree).
+
+        Returns:
+            Tuple[int, int]: The number of steps before the trajectory enters its cycle, and the cycle length.
+
+        Raises:
+            ValueError: If the chain is empty, the method or symmetry mode is unknown, the algebraic
+                method is requested for a chain whose rows are not powers of one permutation, or the
+                ranked or graph method for a shape they do not support.
+            RuntimeError: If the symmetry check of the "verify" mode fails.
+        """
+        if Instrumentation.enabled:
+            with Instrumentation.stage("trajectory"):
+                preperiod, period = DifferenceOperator._trajectory(chain, method, cache, generator, symmetry)
+            Instrumentation.add("trajectories")
+            Instrumentation.append("preperiod", preperiod)
+            Instrumentation.append("period", period)
+            if cache is not None:
+                Instrumentation.maximum("peak_cache_size", len(cache))
+            return preperiod, period
+        return DifferenceOperator._trajectory(chain, method, cache, generator, symmetry)
+
+    @staticmethod
+    def _trajectory(chain: PermutationChain, method: str, cache: Optional[OrderCache],
+                    generator: Optional[Permutation], symmetry: str = "none") -> Tuple[int, int]:
+        """
+        Computes the trajectory as described in `trajectory`, without instrumentation.
+        """
+        if len(chain) == 0:
+            raise ValueError("Invalid chain: Cannot compute the trajectory of an empty permutation chain.")
+        if symmetry != "none":
+            if symmetry not in ("reduce", "verify"):
+                raise ValueError(f"Invalid symmetry: {symmetry!r}. Expected 'none', 'reduce' or 'verify'.")
+            trajectory = DifferenceOperator._trajectory_symmetric(chain, method, cache)
+            if symmetry == "verify":
+                expected = DifferenceOperator._trajectory(chain, method, None, generator)
+                if trajectory != expected:
+                    raise RuntimeError(f"Symmetry check failed: The representative gives {trajectory}, "
+                                       f"but the chain has trajectory {expected}.")
+            return trajectory
+        if method in ("algebraic", "auto"):
+            if generator is None:
+                generator = CyclicOrder.find_generator(chain)
+            exponents = CyclicOrder.exponents(chain, generator) if generator is not None else None
+            if exponents is not None:
+                try:
+                    return CyclicOrder.trajectory(exponents, CyclicOrder.permutation_order(generator))
+                except ValueError:
+                    if method == "algebraic":
+                        raise
+            elif method == "algebraic":
+                raise ValueError("Invalid chain: The rows are not all powers of a single permutation.")
+            method = "seen"
+        n = len(chain[0])
+        start = chain.to_buffer()
+        identity = array(start.typecode, range(n)) * len(chain)
+
+        if method == "seen":
+            return DifferenceOperator._trajectory_seen(start, identity, n, cache)
+        if method == "graph":
+            return FunctionalGraph.load(n, len(chain)).trajectory(chain)
+        if method not in ("brent", "floyd", "ranked"):
+            raise ValueError(f"Invalid method: {method!r}. Expected 'seen', 'brent', 'floyd', 'ranked', "
+                             f"'graph', 'algebraic' or 'auto'.")
+
+        key = OrderCache.key(n, start.tobytes())
+        trajectory = cache.get(key) if cache is not None else None
+        if trajectory is None:
+            if method == "brent":
+                trajectory = DifferenceOperator._trajectory_brent(start, identity, n)
+            elif method == "ranked":
+                trajectory = DifferenceOperator._trajectory_ranked(chain, n)
+            else:
+                trajectory = DifferenceOperator._trajectory_floyd(start, identity, n)
+            if cache is not None:
+                cache.put(key, trajectory)
+        return trajectory
+
+    @staticmethod
+    def _trajectory_symmetric(chain: PermutationChain, method: str, cache: Optional[OrderCache]) -> Tuple[int, int]:
+        """
+        Computes the trajectory through the symmetry representative of the chain's first derivative.
+        """
+        n = len(chain[0])
+        start = chain.to_buffer()
+        if start == array(start.typecode, range(n)) * len(chain):
+            return 0, 1
+        step, scratch = start[:], start[:n]
+        DifferenceOperator.derivative_into(start, step, scratch, n)
+
+        representative = SymmetryOracle.representative(step, n)
+        key = OrderCache.key(n, representative.tobytes())
+        trajectory = cache.get(key) if cache is not None else None
+        if trajectory is None:
+            trajectory = DifferenceOperator._trajectory(PermutationChain._from_buffer(representative, n),
+                                                        method, cache, None)
+            if cache is not None:
+                cache.put(key, trajectory)
+        elif Instrumentation.enabled:
+            Instrumentation.add("symmetry_hits")
+
+        preperiod, period = trajectory
+        if preperiod > 0:
+            return preperiod + 1, period
+        # The derivative lies on the cycle; the chain does too only if it is the derivative's predecessor there.
+        current, spare = step[:], step[:]
+        for _ in range(period - 1):
+            DifferenceOperator.derivative_into(current, spare, scratch, n)
+            current, spare = spare, current
+        return (0, period) if current == start else (1, period)
+
+    @staticmethod
+    def _trajectory_seen(start: array, identity: array, n: int, cache: Optional[OrderCache]) -> Tuple[int, int]:
+        """
+        Computes the trajectory by remembering the step at which every chain was first visited.
+        """
         seen = {}
-        current = chain
+        current, spare, scratch = start[:], start[:], start[:n]
         steps = 0
-        identity = PermutationChain([Permutation(list(range(len(chain[0].values)))) for _ in range(len(chain))])
 
         while True:
-            if current in seen:
-                cycle_length = steps - seen[current]
-                return cycle_length
-            seen[current] = steps
+            key = current.tobytes()
+            if key in seen:
+                trajectory = seen[key], steps - seen[key]
+                break
+            known = cache.get(OrderCache.key(n, key)) if cache is not None else None
+            if known is not None:
+                preperiod, period = known
+                if preperiod == 0 and period > 1 and steps > 0:
+                    # The trajectory may have entered the cycle before reaching the known state.
+                    trajectory = DifferenceOperator._preperiod(start, period, n), period
+                else:
+                    trajectory = steps + preperiod, period
+                break
+            seen[key] = steps
             if current == identity:
-                return steps
-            current = DifferenceOperator.derivative(current)
-            steps += 1
\ No newline at end of file
+                trajectory = steps, 1
+                break
+            DifferenceOperator.derivative_into(current, spare, scratch, n)
+            current, spare = spare, current
+            steps += 1
+
+        if Instrumentation.enabled:
+            Instrumentation.add("derivative_steps", steps)
+            Instrumentation.maximum("peak_seen", len(seen))
+        if cache is not None:
+            preperiod, period = trajectory
+            for key, step in seen.items():
+                cache.put(OrderCache.key(n, key), (max(preperiod - step, 0), period))
+        return trajectory
+
+    @staticmethod
+    def _trajectory_ranked(chain: PermutationChain, n: int) -> Tuple[int, int]:
+        """
+        Computes the trajectory by remembering every visited chain, with chains held as arrays of
+        Lehmer ranks and derivatives taken through the precomputed `RankTables`.
+        """
+        tables = RankTables.load(n)
+        current = array("H", tables.ranks(chain).tolist())
+        spare = current[:]
+        seen = {}
+        steps = 0
+
+        while True:
+            key = current.tobytes()
+            if key in seen:
+                trajectory = seen[key], steps - seen[key]
+                break
+            seen[key] = steps
+            if not any(current):
+                trajectory = steps, 1  # Rank 0 is the identity
+                break
+            tables.derivative_into(current, spare)
+            current, spare = spare, current
+            steps += 1
+
+        if Instrumentation.enabled:
+            Instrumentation.add("derivative_steps", steps)
+            Instrumentation.maximum("peak_seen", len(seen))
+        return trajectory
+
+    @staticmethod
+    def _trajectory_brent(start: array, identity: array, n: int) -> Tuple[int, int]:
+        """
+        Computes the trajectory with Brent's cycle detection, keeping only two chains alive.
+        """
+        if start == identity:
+            return 0, 1
+
+        tortoise, hare, spare, scratch = start[:], start[:], start[:], start[:n]
+        DifferenceOperator.derivative_into(start, hare, scratch, n)
+        power = period = steps = 1
+        while tortoise != hare:
+            if hare == identity:
+                if Instrumentation.enabled:
+                    Instrumentation.add("derivative_steps", steps)
+                return steps, 1
+            if power == period:
+                tortoise[:] = hare
+                power *= 2
+                period = 0
+            DifferenceOperator.derivative_into(hare, spare, scratch, n)
+            hare, spare = spare, hare
+            steps += 1
+            period += 1
+
+        if Instrumentation.enabled:
+            Instrumentation.add("derivative_steps", steps)
+        return DifferenceOperator._preperiod(start, period, n), period
+
+    @staticmethod
+    def _trajectory_floyd(start: array, identity: array, n: int) -> Tuple[int, int]:
+        """
+        Computes the trajectory with Floyd's cycle detection, keeping only two chains alive.
+        """
+        if start == identity:
+            return 0, 1
+
+        tortoise, hare, spare, scratch = start[:], start[:], start[:], start[:n]
+        steps = 0
+        while True:
+            for _ in range(2):
+                DifferenceOperator.derivative_into(hare, spare, scratch, n)
+                hare, spare = spare, hare
+                steps += 1
+                if hare == identity:
+                    if Instrumentation.enabled:
+                        Instrumentation.add("derivative_steps", steps + steps // 2)
+                    return steps, 1
+            DifferenceOperator.derivative_into(tortoise, spare, scratch, n)
+            tortoise, spare = spare, tortoise
+            if tortoise == hare:
+                break
+
+        period = 1
+        DifferenceOperator.derivative_into(tortoise, hare, scratch, n)
+        while tortoise != hare:
+            DifferenceOperator.derivative_into(hare, spare, scratch, n)
+            hare, spare = spare, hare
+            period += 1
+
+        if Instrumentation.enabled:
+            Instrumentation.add("derivative_steps", steps + steps // 2 + period)
+        return DifferenceOperator._preperiod(start, period, n), period
+
+    @staticmethod
+    def _preperiod(start: array, period: int, n: int) -> int:
+        """
+        Finds the first step at which the trajectory enters its cycle, given the cycle length.
+        """
+        tortoise, hare, spare, scratch = start[:], start[:], start[:], start[:n]
+        for _ in range(period):
+            DifferenceOperator.derivative_into(hare, spare, scratch, n)
+            hare, spare = spare, hare
+
+        preperiod = 0
+        while tortoise != hare:
+            DifferenceOperator.derivative_into(tortoise, spare, scratch, n)
+            tortoise, spare = spare, tortoise
+            DifferenceOperator.derivative_into(hare, spare, scratch, n)
+            hare, spare = spare, hare
+            preperiod += 1
+        if Instrumentation.enabled:
+            Instrumentation.add("derivative_steps", period + 2 * preperiod)
+        return preperiod
+
+    @staticmethod
+    def batch_derivative(chains: np.ndarray) -> np.ndarray:
+        """
+        Computes the derivative of a whole batch of permutation chains at once.
+
+        Args:
+            chains (np.ndarray): An integer array of shape (B, m, n) holding B chains of m permutations of size n.
+
+        Returns:
+            np.ndarray: An array of shape (B, m, n) holding the derivative of each chain.
+        """
+        if chains.shape[1] == 0:
+            return chains.copy()
+        inverses = np.empty_like(chains)
+        positions = np.broadcast_to(np.arange(chains.shape[2], dtype=chains.dtype), chains.shape)
+        np.put_along_axis(inverses, chains, positions, axis=2)
+        return np.take_along_axis(np.roll(inverses, -1, axis=1), chains, axis=2)
+
+    @staticmethod
+    def batch_order(chains: np.ndarray) -> np.ndarray:
+        """
+        Computes the order of every chain in a batch under repeated application of the derivative.
+
+        The whole batch is iterated in lockstep using Brent's cycle detection, and chains are dropped
+        from the active set as soon as they reach the identity or close a cycle. The result for each
+        chain matches `DifferenceOperator.order`.
+
+        Args:
+            chains (np.ndarray): An integer array of shape (B, m, n) holding B chains of m permutations of size n.
+
+        Returns:
+            np.ndarray: An array of B orders (-1 for empty chains).
+
+        Raises:
+            ValueError: If the input is not a three-dimensional array.
+        """
+        chains = np.asarray(chains)
+        if chains.ndim != 3:
+            raise ValueError("Invalid batch: Expected an array of shape (B, m, n).")
+        orders = np.full(chains.shape[0], -1, dtype=np.int64)
+        if chains.shape[1] == 0:
+            return orders
+
+        identity = np.arange(chains.shape[2], dtype=chains.dtype)
+        at_identity = (chains == identity).all(axis=(1, 2))
+        orders[at_identity] = 0
+        active = np.flatnonzero(~at_identity)
+
+        tortoise = chains[active]
+        hare = DifferenceOperator.batch_derivative(tortoise)
+        steps = power = cycle_length = 1
+        while active.size:
+            reached_identity = (hare == identity).all(axis=(1, 2))
+            closed_cycle = (hare == tortoise).all(axis=(1, 2)) & ~reached_identity
+            orders[active[reached_identity]] = steps
+            orders[active[closed_cycle]] = cycle_length
+
+            remaining = ~(reached_identity | closed_cycle)
+            active, tortoise, hare = active[remaining], tortoise[remaining], hare[remaining]
+            if power == cycle_length:
+                tortoise = hare.copy()
+                power *= 2
+                cycle_length = 0
+            hare = DifferenceOperator.batch_derivative(hare)
+            steps += 1
+            cycle_length += 1
+
+        return orders
@@ -1,49 +1,430 @@
-from typing import Callable, Dict, Any, List
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Any, Iterator, List, Optional, Set, Tuple
+import numpy as np
 import pandas as pd
 import concurrent.futures
 from tqdm import tqdm
 
+from aggregator import Aggregator
+from corpus import Corpus
+from instrumentation import Instrumentation
+from resultsink import ResultSink
+from workqueue import WorkQueue
+
 class Experiment:
     """
     A framework for running experiments on Latin squares.
     """
 
-    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any]):
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any], results_path: Optional[str] = None,
+                 aggregators: Optional[Dict[str, Aggregator]] = None, keep_results: bool = True):
         """
         Initializes an experiment.
 
         Args:
             name (str): The name of the experiment.
             func (Callable[[Dict[str, Any]], Any]): A function that defines the experiment.
+            results_path (str, optional): A file to stream results to instead of keeping them in memory.
+                Runs resume from the trials already recorded there.
+            aggregators (Dict[str, Aggregator], optional): Aggregators of the dict results by name. Workers
+                fold the results of each chunk into empty copies, which are merged into `aggregates`. A result
+                that some aggregator cannot take is added to none of them and reported as a failed trial.
+            keep_results (bool): Keeps the individual results as well. Without them, a run takes memory
+                (and results file space) proportional to the aggregates rather than to the trials.
         """
         self.name = name
         self.func = func
         self.results: List[Dict[str, Any]] = []
+        self.sink = ResultSink(results_path) if results_path is not None else None
+        self.profiles: Dict[str, Dict[str, float]] = {}
+        self.aggregators = aggregators or {}
+        self.keep_results = keep_results
+        self.aggregates: Dict[str, Aggregator] = {}
 
-    def run(self, params: Dict[str, Any], num_trials: int = 100, num_workers: int = None):
+    def run(self, params: Dict[str, Any], num_trials: int = 100, num_workers: int = None,
+            chunk_size: Optional[int] = None, seed: Optional[int] = None, instrument: bool = False,
+            trace_allocations: bool = False, corpus: Optional[str] = None):
         """
         Runs the experiment multiple times in parallel with the given parameters.
 
+        Trials are grouped into chunks. Each worker runs the trials of a chunk in a local loop and
+        sends their results back as one compact batch, which keeps scheduling and IPC overhead low
+        for cheap trials. Each trial receives a copy of the parameters with its index under the
+        "trial" key, so trials can split deterministic work (such as enumeration shards) between them.
+
         Args:
             params (Dict[str, Any]): The parameters for the experiment.
             num_trials (int): The number of times to repeat the experiment.
             num_workers (int, optional): The number of parallel workers (defaults to system CPU count).
+            chunk_size (int, optional): The number of trials per chunk (defaults to about four chunks per worker).
+            seed (int, optional): When given, the `random` and NumPy generators are seeded before every
+                trial from the seed and the trial index, so results do not depend on chunking or scheduling.
+            instrument (bool): Enables `Instrumentation` in the workers. The metrics of each trial, and its
+                total time as "time_trial", are added as extra keys of dict results, and the profile
+                aggregated by each worker is kept in `profiles` and printed at the end of the run.
+            trace_allocations (bool): With `instrument`, also records the peak allocations of each stage.
+            corpus (str, optional): A `Corpus` file to read the trials' squares from. Trial i receives
+                square i of the corpus under the "square" key, instead of generating its own.
+
+        When the experiment streams to a results file, trials already recorded there are skipped (failed
+        trials are retried) and new results are appended chunk by chunk instead of being kept in `results`.
+
+        Raises:
+            ValueError: If chunk_size is not positive, or the corpus holds fewer squares than there are trials.
         """
-        self.results = []
+        Experiment._check_chunk_size(chunk_size)
+        params = Experiment._with_corpus(params, num_trials, corpus)
+        pending = self._start(num_trials)
+        print(f"Running {len(pending)} trials in parallel...")
 
-        print(f"Running {num_trials} trials in parallel...")
+        if chunk_size is None:
+            chunk_size = max(1, math.ceil(len(pending) / (4 * (num_workers or os.cpu_count() or 1))))
+        chunks = Experiment._chunks(pending, chunk_size)
 
         with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
-            futures = {executor.submit(self.func, params): i for i in range(num_trials)}
+            instrumentation = (trace_allocations,) if instrument else None
+            futures = {executor.submit(Experiment._run_chunk, self.func, params, start, count, seed,
+                                       instrumentation, self.aggregators, self.keep_results): (start, count)
+                       for start, count in chunks}
 
-            with tqdm(total=num_trials, desc=self.name, unit="trial") as pbar:
+            with tqdm(total=num_trials, initial=num_trials - len(pending), desc=self.name, unit="trial") as pbar:
                 for future in concurrent.futures.as_completed(futures):
+                    start, count = futures[future]
                     try:
-                        result = future.result()
-                        self.results.append(result)
+                        self._collect(start, count, *future.result())
                     except Exception as e:
-                        print(f"Error in trial {futures[future]}: {e}")
-                    pbar.update(1)  # Update progress bar
+                        print(f"Error in trials {start}-{start + count - 1}: {e}")
+                    pbar.update(count)  # Update progress bar
+
+        self._print_profiles()
+
+    def run_distributed(self, queue_path: str, params: Dict[str, Any], num_trials: int = 100,
+                        chunk_size: Optional[int] = None, seed: Optional[int] = None, local_workers: int = 0,
+                        lease_timeout: float = 60.0, poll_interval: float = 0.5, instrument: bool = False,
+                        trace_allocations: bool = False, corpus: Optional[str] = None):
+        """
+        Runs the experiment as the coordinator of workers that pull chunks from a shared `WorkQueue`.
+
+        Workers are started separately on any host that mounts the queue directory, with `work`, and may
+        join or leave at any time. Chunks whose worker stops renewing its lease for `lease_timeout`
+        seconds are handed to another worker. Results are merged as they arrive, into the results file
+        when there is one (so an interrupted run resumes like `run`), otherwise into `results`.
+
+        Args:
+            queue_path (str): The shared queue directory.
+            params (Dict[str, Any]): The parameters for the experiment.
+            num_trials (int): The number of times to repeat the experiment.
+            chunk_size (int, optional): The number of trials per chunk (defaults to about 100 chunks).
+            seed (int, optional): Seeds every trial from the seed and the trial index, as in `run`.
+            local_workers (int): The number of worker processes to also start on this host.
+            lease_timeout (float): The seconds after which the chunk of a silent worker is reassigned.
+            poll_interval (float): The seconds between checks of the queue.
+            instrument (bool): Enables `Instrumentation` in the workers, as in `run`.
+            trace_allocations (bool): With `instrument`, also records the peak allocations of each stage.
+            corpus (str, optional): A `Corpus` file to read the trials' squares from, as in `run`. Workers
+                must see it at the same path.
+
+        Raises:
+            ValueError: If chunk_size is not positive, or the corpus holds fewer squares than there are trials.
+        """
+        Experiment._check_chunk_size(chunk_size)
+        params = Experiment._with_corpus(params, num_trials, corpus)
+        pending = self._start(num_trials)
+        if chunk_size is None:
+            chunk_size = max(1, math.ceil(len(pending) / 100))
+        chunks = Experiment._chunks(pending, chunk_size)
+
+        queue = WorkQueue(queue_path)
+        job = queue.start(params, chunks, seed, (trace_allocations,) if instrument else None,
+                          self.aggregators, self.keep_results)
+        print(f"Distributing {len(pending)} trials in {len(chunks)} chunks through {queue_path}...")
+        processes = [multiprocessing.Process(target=self.work, args=(queue_path,),
+                                             kwargs={"poll_interval": poll_interval, "lease_timeout": lease_timeout,
+                                                     "exit_when_idle": True})
+                     for _ in range(local_workers)]
+        for process in processes:
+            process.start()
+
+        seen: Set[str] = set()
+        try:
+            with tqdm(total=num_trials, initial=num_trials - len(pending), desc=self.name, unit="trial") as pbar:
+                while len(seen) < len(chunks):
+                    for task, start, count, result in queue.results(job, seen):
+                        seen.add(task)
+                        try:
+                            self._collect(start, count, *result)
+                        except Exception as e:
+                            print(f"Error in trials {start}-{start + count - 1}: {e}")
+                        pbar.update(count)
+                    if len(seen) < len(chunks):
+                        released = queue.release_expired(job, lease_timeout)
+                        if released:
+                            print(f"Reassigning {released} expired chunks.")
+                        time.sleep(poll_interval)
+        finally:
+            queue.finish(job)
+            for process in processes:
+                process.join()
+
+        self._print_profiles()
+
+    def work(self, queue_path: str, poll_interval: float = 0.5, lease_timeout: float = 60.0,
+             exit_when_idle: bool = False, worker: Optional[str] = None) -> int:
+        """
+        Runs as a worker: pulls chunks of the running job from a shared `WorkQueue`, runs them and
+        streams their results back, renewing each lease while its chunk runs. A chunk that fails as a
+        whole, for instance because this host does not mount the corpus, is returned with every trial
+        recorded as an error.
+
+        Args:
+            queue_path (str): The shared queue directory.
+            poll_interval (float): The seconds to wait when no chunk is pending.
+            lease_timeout (float): The lease duration of the coordinator; leases are renewed three times as often.
+            exit_when_idle (bool): Returns when no job is running instead of waiting for the next one.
+            worker (str, optional): The worker id recorded in leases (defaults to the host name and process id).
+
+        Returns:
+            int: The number of chunks this worker completed.
+        """
+        queue = WorkQueue(queue_path)
+        worker = worker or WorkQueue.worker_id()
+        completed = 0
+        while True:
+            job = queue.job()
+            task = queue.claim(job["id"], worker) if job is not None else None
+            if task is None:
+                if job is None and exit_when_idle:
+                    return completed
+                time.sleep(poll_interval)
+                continue
+
+            name, start, count = task
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=Experiment._heartbeat,
+                                         args=(queue, job["id"], name, lease_timeout / 3, stop), daemon=True)
+            heartbeat.start()
+            try:
+                result = Experiment._run_chunk(self.func, job["params"], start, count, job["seed"],
+                                               job["instrumentation"], job["aggregators"], job["keep_results"])
+            except Exception as e:
+                # A chunk that cannot run at all is reported with every trial failed, instead of killing
+                # the worker and being reassigned to the next worker forever.
+                Instrumentation.disable()
+                result = [], [(trial, str(e)) for trial in range(start, start + count)], None, {}
+            finally:
+                stop.set()
+                heartbeat.join()
+            queue.complete(job["id"], name, result)
+            completed += 1
+
+    @staticmethod
+    def _heartbeat(queue: WorkQueue, job: str, task: str, interval: float, stop: threading.Event):
+        """
+        Renews the lease of a running task until it is stopped or the lease is lost.
+        """
+        while not stop.wait(interval):
+            if not queue.renew(job, task):
+                return
+
+    @staticmethod
+    def _check_chunk_size(chunk_size: Optional[int]):
+        """
+        Rejects chunk sizes that cannot split the trials.
+        """
+        if chunk_size is not None and chunk_size <= 0:
+            raise ValueError(f"Invalid chunk size: Expected a positive number of trials, got {chunk_size}.")
+
+    @staticmethod
+    def _with_corpus(params: Dict[str, Any], num_trials: int, corpus: Optional[str]) -> Dict[str, Any]:
+        """
+        Adds the corpus path to the parameters, after checking that it has a square for every trial.
+        """
+        if corpus is None:
+            return params
+        size = len(Corpus(corpus))
+        if size < num_trials:
+            raise ValueError(f"Invalid corpus: {corpus} holds {size} squares, fewer than the {num_trials} trials.")
+        return {**params, "corpus": corpus}
+
+    def _start(self, num_trials: int) -> List[int]:
+        """
+        Resets the in-memory results and finds the trials that still need to run.
+
+        Returns:
+            List[int]: The pending trial indices.
+        """
+        self.results = []
+        self.profiles = {}
+        self.aggregates = {name: aggregator.empty() for name, aggregator in self.aggregators.items()}
+        completed = self.sink.completed() if self.sink is not None else set()
+        if completed:
+            for aggregates in self.sink.aggregates():
+                self._merge_aggregates(aggregates)
+        pending = [trial for trial in range(num_trials) if trial not in completed]
+        if completed:
+            print(f"Resuming: {num_trials - len(pending)} of {num_trials} trials already completed.")
+        return pending
+
+    def _collect(self, start: int, count: int, results: Any, errors: List[Tuple[int, str]],
+                 profile: Optional[Dict[str, float]], aggregates: Optional[Dict[str, Aggregator]] = None):
+        """
+        Merges the batch of results and the aggregates of a chunk.
+        """
+        if self.sink is not None:
+            self.sink.append(start, count, results, errors, aggregates)
+        else:
+            self.results.extend(Experiment._from_batch(results))
+        if aggregates:
+            self._merge_aggregates(aggregates)
+        for trial, error in errors:
+            print(f"Error in trial {trial}: {error}")
+        if profile is not None:
+            worker = profile.pop("worker")
+            self.profiles[worker] = Instrumentation.merge(self.profiles.get(worker, {}), profile)
+
+    def _merge_aggregates(self, aggregates: Dict[str, Aggregator]):
+        """
+        Merges the partial aggregates of a chunk into the experiment's aggregates.
+        """
+        for name, aggregate in aggregates.items():
+            if name in self.aggregates:
+                self.aggregates[name].merge(aggregate)
+
+    def _print_profiles(self):
+        """
+        Prints the profile aggregated by each worker of an instrumented run.
+        """
+        for worker, profile in sorted(self.profiles.items()):
+            print(Instrumentation.format_profile(profile, f"Worker {worker}:"))
+
+    @staticmethod
+    def _chunks(trials: List[int], chunk_size: int) -> List[Tuple[int, int]]:
+        """
+        Splits sorted trial indices into runs of consecutive trials of at most `chunk_size` trials.
+
+        Returns:
+            List[Tuple[int, int]]: The first trial and the number of trials of each chunk.
+        """
+        chunks = []
+        for trial in trials:
+            if chunks and chunks[-1][0] + chunks[-1][1] == trial and chunks[-1][1] < chunk_size:
+                chunks[-1] = (chunks[-1][0], chunks[-1][1] + 1)
+            else:
+                chunks.append((trial, 1))
+        return chunks
+
+    @staticmethod
+    def _run_chunk(func: Callable[[Dict[str, Any]], Any], params: Dict[str, Any], start: int, count: int,
+                   seed: Optional[int], instrumentation: Optional[Tuple[bool]] = None,
+                   aggregators: Optional[Dict[str, Aggregator]] = None, keep_results: bool = True
+                   ) -> Tuple[Any, List[Tuple[int, str]], Optional[Dict[str, float]], Dict[str, Aggregator]]:
+        """
+        Runs a block of consecutive trials inside a worker.
+
+        Args:
+            func (Callable[[Dict[str, Any]], Any]): The experiment function.
+            params (Dict[str, Any]): The parameters for the experiment.
+            start (int): The index of the first trial of the chunk.
+            count (int): The number of trials in the chunk.
+            seed (int, optional): The experiment seed, combined with each trial index to seed the trial.
+            instrumentation (Tuple[bool], optional): Whether to trace allocations, when instrumenting the chunk.
+            aggregators (Dict[str, Aggregator], optional): The aggregators to fold the chunk's results into.
+            keep_results (bool): Returns the individual results as well as the aggregates.
+
+        Returns:
+            Tuple[Any, List[Tuple[int, str]], Optional[Dict[str, float]], Dict[str, Aggregator]]: The batch of
+                results, the index and message of every failed trial, the profile of the chunk with the "worker"
+                id when instrumented, and the aggregates of the chunk.
+        """
+        if instrumentation is None:
+            Instrumentation.disable()
+        else:
+            Instrumentation.enable(trace_allocations=instrumentation[0])
+            Instrumentation.profile(reset=True)
+
+        corpus = Corpus.shared(params["corpus"]) if "corpus" in params else None
+        aggregates = {name: aggregator.empty() for name, aggregator in (aggregators or {}).items()}
+        results = []
+        errors = []
+        for trial in range(start, start + count):
+            if seed is not None:
+                Experiment._seed_trial(seed, trial)
+            try:
+                trial_params = {**params, "trial": trial}
+                if corpus is not None:
+                    trial_params["square"] = corpus.square(trial)
+                if instrumentation is None:
+                    result = func(trial_params)
+                else:
+                    with Instrumentation.stage("trial"):
+                        result = func(trial_params)
+                    result = {**result, **Instrumentation.record()} if isinstance(result, dict) else result
+                # A result every aggregator can take is added to all of them, otherwise to none.
+                for aggregate in aggregates.values():
+                    aggregate.check(result)
+            except Exception as e:
+                Instrumentation.discard()
+                errors.append((trial, str(e)))
+                continue
+            Instrumentation.collect()
+            for aggregate in aggregates.values():
+                aggregate.add(result)
+            if keep_results:
+                results.append(result)
+
+        profile = None
+        if instrumentation is not None:
+            profile = {**Instrumentation.profile(), "worker": WorkQueue.worker_id()}
+            Instrumentation.disable()
+        return Experiment._to_batch(results), errors, profile, aggregates
+
+    @staticmethod
+    def _seed_trial(seed: int, trial: int):
+        """
+        Seeds the `random` and NumPy generators from the experiment seed and a trial index.
+        """
+        state = np.random.SeedSequence([seed, trial]).generate_state(2)
+        random.seed(int(state[0]))
+        np.random.seed(int(state[1]))
+
+    @staticmethod
+    def _to_batch(results: List[Any]) -> Any:
+        """
+        Packs a list of result dicts sharing the same keys into a dict of columns; other results are left as a list.
+        """
+        if not results or not all(isinstance(result, dict) for result in results):
+            return results
+        keys = list(results[0])
+        if not keys or any(list(result) != keys for result in results):
+            return results
+        return {key: [result[key] for result in results] for key in keys}
+
+    @staticmethod
+    def _from_batch(batch: Any) -> List[Any]:
+        """
+        Unpacks a batch built by `_to_batch` back into a list of results.
+        """
+        if isinstance(batch, list):
+            return batch
+        return [dict(zip(batch, values)) for values in zip(*batch.values())]
+
+    def iter_results(self) -> Iterator[Any]:
+        """
+        Iterates over the results, reading them lazily from the results file when there is one.
+
+        Yields:
+            Any: Each trial result.
+        """
+        if self.sink is None:
+            yield from self.results
+            return
+        for batch in self.sink.batches():
+            yield from Experiment._from_batch(batch)
 
     def analyze_results(self) -> pd.DataFrame:
         """
@@ -52,12 +433,17 @@ class Experiment:
         Returns:
             pd.DataFrame: A DataFrame of experiment results.
         """
+        if self.sink is not None:
+            return self.sink.to_dataframe()
         return pd.DataFrame(self.results)
 
     def summary(self):
         """
-        Prints summary statistics of the results.
+        Prints summary statistics of the results, and the result of every aggregator.
         """
         df = self.analyze_results()
         print(f"Experiment: {self.name}")
-        print(df.describe())
+        if not df.empty:
+            print(df.describe())
+        for name, aggregate in self.aggregates.items():
+            print(f"{name}: {aggregate.result()}")
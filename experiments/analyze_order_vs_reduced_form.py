@@ -1,7 +1,12 @@
 from typing import Dict, Any
 
+import numpy as np
+
+from canonicalform import CanonicalForm
 from differenceoperator import DifferenceOperator
 from experiment import Experiment
+from instrumentation import Instrumentation
+from jacobsonmatthews import JacobsonMatthews
 from latinsquare import LatinSquare
 
 
@@ -9,36 +14,45 @@ def analyze_order_vs_reduced_form(params: Dict[str, Any]) -> Dict[str, Any]:
     """
     Analyzes whether squares with the same order have the same reduced form.
 
+    Random squares come from the Jacobson-Matthews sampler of the worker process, seeded per trial
+    as in `check_reduction_order`.
+
     Args:
-        params (Dict[str, Any]): Contains 'n' (size of Latin square).
+        params (Dict[str, Any]): Contains 'n' (size of Latin square) and optionally 'seed' (the root
+            seed of the workers' samplers), 'trial' (the trial index, set by `Experiment`) and 'square'
+            (the square to analyze, read from a corpus by `Experiment`, instead of a random one).
 
     Returns:
         Dict[str, Any]: Contains order, reduced form hash.
     """
     n = params["n"]
-    latin_square = LatinSquare.generate_random(n)
+    latin_square = params.get("square")
+    if latin_square is None:
+        with Instrumentation.stage("generate"):
+            latin_square = JacobsonMatthews.shared(n, params.get("seed"), params.get("trial", 0)).sample()
 
     order = DifferenceOperator.order(latin_square)
-    reduced = LatinSquare.reduce(latin_square)
+    with Instrumentation.stage("reduce"):
+        reduced = LatinSquare.reduce(latin_square)
 
     return {"n": n, "order": order, "reduced": reduced}
 
 if __name__ == "__main__":
     experiment = Experiment("Order vs. Reduced Form", analyze_order_vs_reduced_form)
-    experiment.run(params={"n": 5}, num_trials=10000, num_workers=8)
+    experiment.run(params={"n": 5, "seed": 0}, num_trials=10000, num_workers=8)
 
     # Group by order and compare reduced forms
-    results = experiment.results
     reduced_forms = set()
-    for result in results:
+    for result in experiment.iter_results():
         order = result["order"]
         reduced_form = result["reduced"]
         reduced_forms.add(reduced_form)
 
     print(f"Unique reduced forms: {len(reduced_forms)}")
-    for reduced_form in reduced_forms:
-
-        order = DifferenceOperator.order(reduced_form)
+    print(f"Unique isotopy classes: {len(CanonicalForm.deduplicate(reduced_forms))}")
+    reduced_forms = list(reduced_forms)
+    orders = DifferenceOperator.batch_order(np.stack([form.to_numpy() for form in reduced_forms]))
+    for reduced_form, order in zip(reduced_forms, orders):
 
         print("************************")
         print(f"Order: {order}")
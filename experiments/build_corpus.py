@@ -0,0 +1,27 @@
+import argparse
+
+import numpy as np
+from tqdm import tqdm
+
+from corpus import Corpus
+from jacobsonmatthews import JacobsonMatthews
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Samples Latin squares into a corpus file that experiments can reuse.")
+    parser.add_argument("path", help="the corpus file, created or extended")
+    parser.add_argument("--n", type=int, default=7)
+    parser.add_argument("--count", type=int, default=10000, help="the number of new distinct squares to add")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    corpus = Corpus(args.path, args.n)
+    sampler = JacobsonMatthews(args.n, seed=args.seed)
+    with tqdm(total=args.count, desc="Sampling", unit="square") as pbar:
+        added = 0
+        while added < args.count:
+            batch = np.stack([sampler.sample().to_numpy() for _ in range(min(args.batch, args.count - added))])
+            written = corpus.append(batch)
+            added += written
+            pbar.update(written)
+    print(f"{args.path}: {len(corpus)} squares of size {corpus.n}")
@@ -1,83 +1,65 @@
-from typing import Dict, Any, List
+import argparse
+from typing import Dict, Any
 
+from aggregator import Histogram, UnionFind
+from corpus import Corpus
 from differenceoperator import DifferenceOperator
 from experiment import Experiment
+from instrumentation import Instrumentation
+from jacobsonmatthews import JacobsonMatthews
 from latinsquare import LatinSquare
+from ordercache import OrderCache
 
 def check_reduction_order(params: Dict[str, Any]) -> Dict[str, Any]:
     """
     Checks whether reducing a Latin square preserves its order under D.
 
+    Random squares come from the Jacobson-Matthews sampler of the worker process. With a 'seed'
+    parameter, it is restarted on the stream of the trial, so a seeded run draws the same squares
+    whatever the chunk schedule.
+
     Args:
-        params (Dict[str, Any]): Contains 'n' (size of Latin square).
+        params (Dict[str, Any]): Contains 'n' (size of Latin square) and optionally 'seed' (the root seed
+            of the workers' samplers), 'trial' (the trial index, set by `Experiment`), 'order_cache' (a
+            file through which workers share known trajectories) and 'square' (the square to check, read
+            from a corpus by `Experiment`, instead of a random one).
 
     Returns:
         Dict[str, Any]: A dictionary containing the original and reduced orders.
     """
     n = params["n"]
-    latin_square = LatinSquare.generate_random(n)
+    latin_square = params.get("square")
+    if latin_square is None:
+        with Instrumentation.stage("generate"):
+            latin_square = JacobsonMatthews.shared(n, params.get("seed"), params.get("trial", 0)).sample()
+    cache = OrderCache.shared(params.get("order_cache"))
 
-    original_order = DifferenceOperator.order(latin_square)
-    reduced_order = DifferenceOperator.order(LatinSquare.reduce(latin_square))
+    original_order = DifferenceOperator.order(latin_square, cache=cache)
+    with Instrumentation.stage("reduce"):
+        reduced_square = LatinSquare.reduce(latin_square)
+    reduced_order = DifferenceOperator.order(reduced_square, cache=cache)
 
     return {"n": n, "original_order": original_order, "reduced_order": reduced_order}
 
 
-def merge_order_classes(order_classes: List[set], new_pair: set) -> List[set]:
-    """
-    Merges order classes if they overlap with the new pair.
-
-    Args:
-        order_classes (List[set]): List of existing order classes.
-        new_pair (set): The new set containing original and reduced orders.
-
-    Returns:
-        List[set]: Updated order classes with merged sets.
-    """
-    merged_classes = []
-    merged = False
-
-    for order_class in order_classes:
-        if order_class & new_pair:  # If there's an intersection, merge
-            merged_classes.append(order_class | new_pair)
-            merged = True
-        else:
-            merged_classes.append(order_class)
-
-    if not merged:
-        merged_classes.append(new_pair)  # If no merge occurred, add new set
-
-    # Final pass to merge any overlapping sets
-    final_classes = []
-    while merged_classes:
-        current_set = merged_classes.pop()
-        merged = False
-        for i, existing_set in enumerate(final_classes):
-            if existing_set & current_set:
-                final_classes[i] = existing_set | current_set
-                merged = True
-                break
-        if not merged:
-            final_classes.append(current_set)
-
-    return final_classes
-
-
 if __name__ == "__main__":
-    # Run the experiment
-    experiment = Experiment("Reduction Order Test", check_reduction_order)
-    experiment.run(params={"n": 7}, num_trials=5000, num_workers=8)
-
-    order_classes = []
-
-    for result in experiment.results:
-        original_order = result["original_order"]
-        reduced_order = result["reduced_order"]
-
-        new_order_pair = {original_order, reduced_order}
-        order_classes = merge_order_classes(order_classes, new_order_pair)
-
-    # Print the final order classes
+    parser = argparse.ArgumentParser(description="Checks whether reducing Latin squares preserves their order.")
+    parser.add_argument("--n", type=int, default=7)
+    parser.add_argument("--trials", type=int, default=5000)
+    parser.add_argument("--corpus", help="a corpus file to read the squares from instead of sampling them")
+    parser.add_argument("--seed", type=int, help="the root seed of the samplers")
+    args = parser.parse_args()
+
+    # Order classes and the order distribution are aggregated by the workers, so no result is kept
+    experiment = Experiment("Reduction Order Test", check_reduction_order, keep_results=False,
+                            aggregators={"classes": UnionFind(("original_order", "reduced_order")),
+                                         "orders": Histogram("original_order")})
+    n = Corpus(args.corpus).n if args.corpus else args.n
+    experiment.run(params={"n": n, "seed": args.seed}, num_trials=args.trials, num_workers=8, corpus=args.corpus)
+
+    print("Order distribution:")
+    for order, count in experiment.aggregates["orders"].result().items():
+        print(f"Order {order}: {count}")
     print("Final Order Classes:")
-    for order_class in order_classes:
+    for order_class in experiment.aggregates["classes"].result():
         print(sorted(order_class))
@@ -0,0 +1,54 @@
+import argparse
+from collections import Counter
+from typing import Dict, Any
+
+from differenceoperator import DifferenceOperator
+from experiment import Experiment
+from latinsquareenumerator import LatinSquareEnumerator
+from ranktables import RankTables
+
+
+def order_distribution_shard(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Computes the orders of every reduced Latin square in one shard of the enumeration.
+
+    Args:
+        params (Dict[str, Any]): Contains 'n' (size of Latin square), 'num_shards' and 'trial' (the shard index).
+
+    Returns:
+        Dict[str, Any]: Contains the shard index, the number of squares and the count of each order.
+    """
+    n = params["n"]
+    enumerator = LatinSquareEnumerator(n)
+    method = "ranked" if n <= RankTables.MAX_SIZE else "seen"
+    orders = Counter(DifferenceOperator.order(square, method)
+                     for square in enumerator.shard(params["trial"], params["num_shards"]))
+
+    return {"n": n, "shard": params["trial"], "squares": sum(orders.values()), "orders": dict(orders)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Counts the orders of every reduced Latin square of size n.")
+    parser.add_argument("--n", type=int, default=6)
+    parser.add_argument("--shards", type=int, default=64)
+    parser.add_argument("--queue", help="a shared directory to distribute the shards through instead of running locally")
+    parser.add_argument("--worker", action="store_true", help="run as a worker pulling shards from --queue")
+    parser.add_argument("--local-workers", type=int, default=0, help="workers the coordinator also starts on its host")
+    args = parser.parse_args()
+
+    experiment = Experiment("Exhaustive Order Distribution", order_distribution_shard)
+    params = {"n": args.n, "num_shards": args.shards}
+    if args.worker:
+        experiment.work(args.queue)
+    elif args.queue:
+        experiment.run_distributed(args.queue, params, num_trials=args.shards, chunk_size=1,
+                                   local_workers=args.local_workers)
+    else:
+        experiment.run(params=params, num_trials=args.shards, num_workers=8)
+
+    distribution = Counter()
+    for result in experiment.iter_results():
+        distribution.update(result["orders"])
+
+    print(f"Reduced Latin squares: {sum(distribution.values())}")
+    for order, count in sorted(distribution.items()):
+        print(f"Order {order}: {count}")
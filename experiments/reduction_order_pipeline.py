@@ -0,0 +1,49 @@
+import argparse
+from collections import Counter
+from typing import Any, Dict, Tuple
+
+from differenceoperator import DifferenceOperator
+from jacobsonmatthews import JacobsonMatthews
+from latinsquare import LatinSquare
+from pipeline import Pipeline
+
+
+def generate(task: Tuple[int, int, int]) -> Dict[str, Any]:
+    """
+    Samples the Latin square of one trial from the sampler of the worker process, restarted on the
+    stream spawned from the run seed for this trial, so the square does not depend on which worker
+    generates it.
+    """
+    n, seed, trial = task
+    return {"trial": trial, "square": JacobsonMatthews.shared(n, seed, trial).sample()}
+
+
+def reduce(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {**item, "reduced": LatinSquare.reduce(item["square"])}
+
+
+def order(item: Dict[str, Any]) -> Tuple[int, int]:
+    return DifferenceOperator.order(item["square"]), DifferenceOperator.order(item["reduced"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streams Latin squares through generation, reduction and "
+                                                 "order computation, counting (original, reduced) order pairs.")
+    parser.add_argument("--n", type=int, default=7)
+    parser.add_argument("--trials", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--generate-workers", type=int, default=2)
+    parser.add_argument("--reduce-workers", type=int, default=2)
+    parser.add_argument("--order-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    pipeline = Pipeline()
+    pipeline.add("generate", generate, workers=args.generate_workers, batch_size=args.batch_size, processes=True)
+    pipeline.add("reduce", reduce, workers=args.reduce_workers, batch_size=args.batch_size, processes=True)
+    pipeline.add("order", order, workers=args.order_workers, batch_size=args.batch_size, processes=True)
+
+    pairs = Counter(pipeline.run((args.n, args.seed, trial) for trial in range(args.trials)))
+    for (original, reduced), count in sorted(pairs.items()):
+        print(f"Order {original} -> reduced order {reduced}: {count}")
+    print(pipeline.format_stats())
@@ -0,0 +1,29 @@
+import argparse
+
+import numpy as np
+
+from functionalgraph import FunctionalGraph
+from latinsquareenumerator import LatinSquareEnumerator
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyzes the derivative on every chain of m permutations of size n.")
+    parser.add_argument("--n", type=int, default=4)
+    parser.add_argument("--m", type=int, help="the length of the chains (defaults to n)")
+    parser.add_argument("--directory", help="where the graph is saved (defaults to the system temporary directory)")
+    args = parser.parse_args()
+    m = args.m or args.n
+
+    graph = FunctionalGraph.load(args.n, m, args.directory)
+    cycles = graph.cycles()
+    print(f"States: {graph.size}")
+    print(f"Cycles: {len(cycles)} (longest {max(cycles.values())})")
+    print(f"Longest tail: {int(np.max(graph.tail))}")
+    print(f"Basin of the identity: {int(graph.basin().sum())} states")
+    for order, count in sorted(graph.order_distribution().items()):
+        print(f"Order {order}: {count}")
+
+    if m == args.n:
+        squares = np.stack([square.to_numpy() for square in LatinSquareEnumerator(args.n)])
+        print(f"Reduced Latin squares: {len(squares)}")
+        for order, count in sorted(graph.order_distribution(graph.states(squares)).items()):
+            print(f"Order {order}: {count}")
@@ -0,0 +1,277 @@
+import math
+import os
+import shutil
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from permutationchain import PermutationChain
+from ranktables import RankTables
+
+
+class FunctionalGraph:
+    """
+    The derivative as a functional graph on every chain of m permutations of size n.
+
+    A chain is encoded as the state number sum_i rank(p_i) * (n!)^(m-1-i), so the (n!)^m states of
+    a small (n, m) are the integers below that count and the identity chain is state 0. The
+    successor of every state is computed at once, in vectorized blocks over `RankTables`, and the
+    graph is then analyzed in O(N + C log C) time for N states of which C lie on cycles:
+
+    - Peeling the states of in-degree 0 layer by layer (as in a topological sort) leaves exactly
+      the states that lie on cycles, in time linear in N.
+    - Each cycle is identified by its smallest state, found by pointer doubling over the cyclic
+      states in O(C log C), and its length is the number of states sharing that id.
+    - Walking the peeled layers back from the last one gives every other state the tail length,
+      cycle id and cycle length of its successor, with the tail one step longer.
+
+    The tail length and cycle length of a state are the preperiod and period of its trajectory, so
+    `trajectory` and `order` become lookups. The arrays are saved as .npy files in a directory (that of
+    the `RankTables` by default) and memory-mapped, so the graph is built once per machine.
+
+    Example:
+        >>> graph = FunctionalGraph.load(4, 4)
+        >>> graph.order(square)
+        >>> graph.order_distribution()
+    """
+
+    MAX_STATES = 1 << 28
+    BLOCK = 1 << 20
+
+    _loaded: Dict[Tuple[int, int, Optional[str]], "FunctionalGraph"] = {}
+
+    def __init__(self, n: int, m: int, directory: Optional[str] = None, max_states: int = MAX_STATES):
+        """
+        Loads the graph of chains of m permutations of size n, building and saving it first if needed.
+        Use `load` to share the graph of a process.
+
+        Args:
+            n (int): The size of the permutations.
+            m (int): The length of the chains.
+            directory (str, optional): The directory the graph is saved to and mapped from.
+            max_states (int): The largest number of states to build a graph for.
+
+        Raises:
+            ValueError: If n has no rank tables, m is not positive, or there are more than max_states states.
+        """
+        if not 1 <= n <= RankTables.MAX_SIZE or m < 1:
+            raise ValueError(f"Invalid size: Expected 1 <= n <= {RankTables.MAX_SIZE} and m >= 1.")
+        self.n = n
+        self.m = m
+        self.radix = math.factorial(n)
+        self.size = self.radix ** m
+        if self.size > max_states:
+            raise ValueError(f"Invalid size: Chains of {m} permutations of size {n} have {self.size} states, "
+                             f"more than the limit of {max_states}.")
+        self.tables = RankTables.load(n, directory)
+        self.directory = os.path.join(self.tables.directory, f"graph-{n}-{m}")
+        if not os.path.exists(self.directory):
+            self._build()
+        self.successor, self.tail, self.cycle_length, self.cycle_id = (
+            np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+            for name in ("successor", "tail", "cycle_length", "cycle_id"))
+
+    @staticmethod
+    def load(n: int, m: int, directory: Optional[str] = None) -> "FunctionalGraph":
+        """
+        Returns the graph of chains of m permutations of size n shared by the current process.
+
+        Args:
+            n (int): The size of the permutations.
+            m (int): The length of the chains.
+            directory (str, optional): The directory the graph is saved to and mapped from.
+
+        Returns:
+            FunctionalGraph: The graph.
+        """
+        directory = directory or RankTables.default_directory()
+        if (n, m, directory) not in FunctionalGraph._loaded:
+            FunctionalGraph._loaded[(n, m, directory)] = FunctionalGraph(n, m, directory)
+        return FunctionalGraph._loaded[(n, m, directory)]
+
+    def state(self, chain: PermutationChain) -> int:
+        """
+        Encodes a chain as its state number.
+
+        Args:
+            chain (PermutationChain): A chain of m permutations of size n.
+
+        Returns:
+            int: The state number.
+        """
+        return int(self.states(chain.to_numpy().reshape(1, len(chain), -1))[0])
+
+    def states(self, chains: np.ndarray) -> np.ndarray:
+        """
+        Encodes a batch of chains as state numbers.
+
+        Args:
+            chains (np.ndarray): An integer array of shape (B, m, n).
+
+        Returns:
+            np.ndarray: The B state numbers.
+        """
+        return self._encode(RankTables.rank(chains))
+
+    def chain(self, state: int) -> PermutationChain:
+        """
+        Decodes a state number into its chain.
+
+        Args:
+            state (int): The state number.
+
+        Returns:
+            PermutationChain: The chain of the state.
+        """
+        return self.tables.chain(self._decode(np.array([state]))[0])
+
+    def trajectory(self, chain: PermutationChain) -> Tuple[int, int]:
+        """
+        Looks up the preperiod and period of a chain under repeated application of the derivative.
+
+        Args:
+            chain (PermutationChain): A chain of m permutations of size n.
+
+        Returns:
+            Tuple[int, int]: The tail length and cycle length of the chain's state.
+        """
+        state = self.state(chain)
+        return int(self.tail[state]), int(self.cycle_length[state])
+
+    def order(self, chain: PermutationChain) -> int:
+        """
+        Looks up the order of a chain, as defined by `DifferenceOperator.order`.
+        """
+        preperiod, period = self.trajectory(chain)
+        return preperiod if period == 1 else period
+
+    def orders(self) -> np.ndarray:
+        """
+        Returns the order of every state.
+        """
+        return np.where(np.asarray(self.cycle_length) == 1, self.tail, self.cycle_length)
+
+    def order_distribution(self, states: Optional[np.ndarray] = None) -> Dict[int, int]:
+        """
+        Counts the states of each order.
+
+        Args:
+            states (np.ndarray, optional): The states to count, such as those of all Latin squares
+                (every state when None).
+
+        Returns:
+            Dict[int, int]: The number of states by order.
+        """
+        orders = self.orders()
+        if states is not None:
+            orders = orders[states]
+        values, counts = np.unique(orders, return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+
+    def basin(self, state: int = 0) -> np.ndarray:
+        """
+        Finds the states whose trajectories end in the same cycle as a given state.
+
+        Args:
+            state (int): The state (the identity by default).
+
+        Returns:
+            np.ndarray: A boolean mask over the states.
+        """
+        return np.asarray(self.cycle_id) == self.cycle_id[state]
+
+    def cycles(self) -> Dict[int, int]:
+        """
+        Returns the length of every cycle, keyed by the cycle id.
+        """
+        ids = np.flatnonzero(np.asarray(self.tail) == 0)
+        ids = ids[self.cycle_id[ids] == ids]
+        return dict(zip(ids.tolist(), np.asarray(self.cycle_length)[ids].tolist()))
+
+    def _encode(self, ranks: np.ndarray) -> np.ndarray:
+        states = np.zeros(ranks.shape[:-1], dtype=np.int64)
+        for i in range(self.m):
+            states = states * self.radix + ranks[..., i]
+        return states
+
+    def _decode(self, states: np.ndarray) -> np.ndarray:
+        ranks = np.empty(states.shape + (self.m,), dtype=np.int64)
+        for i in range(self.m - 1, -1, -1):
+            states, ranks[..., i] = np.divmod(states, self.radix)
+        return ranks
+
+    def _build(self):
+        """
+        Computes and saves the successor array and the per-state analysis, atomically.
+        """
+        parent = os.path.dirname(self.directory)
+        os.makedirs(parent, exist_ok=True)
+        temporary = tempfile.mkdtemp(dir=parent, prefix=".graph-")
+        dtype = np.uint32 if self.size <= 1 << 32 else np.uint64
+
+        successor = np.lib.format.open_memmap(os.path.join(temporary, "successor.npy"), "w+", dtype, (self.size,))
+        for start in range(0, self.size, FunctionalGraph.BLOCK):
+            ranks = self._decode(np.arange(start, min(start + FunctionalGraph.BLOCK, self.size), dtype=np.int64))
+            successor[start:start + len(ranks)] = self._encode(self.tables.derivative(ranks).astype(np.int64))
+        successor.flush()
+
+        tail, cycle_length, cycle_id = FunctionalGraph._analyze(np.asarray(successor))
+        for name, values in (("tail", tail), ("cycle_length", cycle_length), ("cycle_id", cycle_id.astype(dtype))):
+            np.save(os.path.join(temporary, f"{name}.npy"), values)
+        del successor
+        try:
+            os.rename(temporary, self.directory)
+        except OSError:
+            shutil.rmtree(temporary)  # Another process built the graph first
+
+    @staticmethod
+    def _analyze(successor: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Computes the tail length, cycle length and cycle id of every state of a functional graph.
+
+        Args:
+            successor (np.ndarray): The successor of every state.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The tail lengths, cycle lengths and cycle ids.
+        """
+        size = len(successor)
+        successor = successor.astype(np.int64)
+        indegree = np.bincount(successor, minlength=size).astype(np.int32)
+
+        # Peel the states nothing (or only peeled states) maps to; what remains lies on cycles.
+        # A state reached from several peeled states is kept once, at the position whose write
+        # to `slot` survived, which takes linear time where sorting the layer would not.
+        layers = []
+        slot = np.empty(size, dtype=np.int64)
+        frontier = np.flatnonzero(indegree == 0)
+        while frontier.size:
+            layers.append(frontier)
+            targets = successor[frontier]
+            np.subtract.at(indegree, targets, 1)
+            targets = targets[indegree[targets] == 0]
+            positions = np.arange(len(targets))
+            slot[targets] = positions
+            frontier = targets[slot[targets] == positions]
+        cyclic = np.flatnonzero(indegree > 0)
+
+        # After k doubling rounds, each cyclic state holds the smallest of the next 2^k states on its cycle.
+        jump = np.searchsorted(cyclic, successor[cyclic])
+        labels = cyclic.copy()
+        for _ in range(max(1, int(len(cyclic)).bit_length())):
+            labels = np.minimum(labels, labels[jump])
+            jump = jump[jump]
+        ids, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+
+        tail = np.zeros(size, dtype=np.int32)
+        cycle_length = np.zeros(size, dtype=np.int32)
+        cycle_id = np.zeros(size, dtype=np.int64)
+        cycle_id[cyclic] = labels
+        cycle_length[cyclic] = counts[inverse]
+        for layer in reversed(layers):
+            following = successor[layer]
+            tail[layer] = tail[following] + 1
+            cycle_length[layer] = cycle_length[following]
+            cycle_id[layer] = cycle_id[following]
+        return tail, cycle_length, cycle_id
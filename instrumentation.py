@@ -0,0 +1,228 @@
+import contextlib
+import time
+import tracemalloc
+from typing import Dict, Iterator, List, Optional, Union
+
+
+class Instrumentation:
+    """
+    Opt-in, process-wide metrics for the hot paths of an experiment trial.
+
+    While disabled, instrumented code only pays for reading the `enabled` flag once per call, and
+    `stage` returns a shared no-op context. While enabled, metrics accumulate in a record for the
+    current trial, which `collect` returns and folds into the profile of the process:
+
+    - counters added with `add` (such as "derivative_steps"),
+    - peaks kept with `maximum` (names starting with "peak_"),
+    - values listed with `append`, one per call (such as the "preperiod" and "period" of every trajectory),
+    - "time_<stage>" seconds, and with allocation tracing "alloc_<stage>" peak bytes, of each stage.
+
+    Example:
+        >>> Instrumentation.enable()
+        >>> with Instrumentation.stage("order"):
+        ...     DifferenceOperator.order(square)
+        >>> Instrumentation.collect()
+        {'time_order': 0.0012, 'derivative_steps': 44, 'preperiod': [21], 'period': [30], 'peak_seen': 52, ...}
+    """
+
+    enabled = False
+    trace_allocations = False
+    _record: Dict[str, Union[float, List[float]]] = {}
+    _profile: Dict[str, float] = {}
+    _stages: List[List[int]] = []
+    _started_tracing = False
+
+    @staticmethod
+    def enable(trace_allocations: bool = False):
+        """
+        Starts recording metrics in the current process.
+
+        Args:
+            trace_allocations (bool): Also records the peak bytes allocated in each stage with `tracemalloc`,
+                which slows down every allocation while enabled.
+        """
+        Instrumentation.enabled = True
+        Instrumentation.trace_allocations = trace_allocations
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            Instrumentation._started_tracing = True
+
+    @staticmethod
+    def disable():
+        """
+        Stops recording metrics and discards the current record and profile.
+        """
+        if Instrumentation._started_tracing:
+            tracemalloc.stop()
+            Instrumentation._started_tracing = False
+        Instrumentation.enabled = False
+        Instrumentation.trace_allocations = False
+        Instrumentation._record = {}
+        Instrumentation._profile = {}
+        Instrumentation._stages = []
+
+    @staticmethod
+    def add(name: str, value: float = 1):
+        """
+        Adds to a counter of the current record.
+        """
+        if Instrumentation.enabled:
+            Instrumentation._record[name] = Instrumentation._record.get(name, 0) + value
+
+    @staticmethod
+    def maximum(name: str, value: float):
+        """
+        Raises a peak of the current record to `value` if it is larger.
+        """
+        if Instrumentation.enabled and value > Instrumentation._record.get(name, value - 1):
+            Instrumentation._record[name] = value
+
+    @staticmethod
+    def append(name: str, value: float):
+        """
+        Appends a value to a list of the current record, so repeated calls within a trial keep every value.
+        """
+        if Instrumentation.enabled:
+            Instrumentation._record.setdefault(name, []).append(value)
+
+    @staticmethod
+    def stage(name: str) -> contextlib.AbstractContextManager:
+        """
+        Measures the time, and optionally the peak allocations, spent inside a block.
+
+        Time adds up over repeated stages of the same name within a record. Stages may be nested,
+        in which case the time of the inner stage also counts towards the outer one.
+
+        Args:
+            name (str): The stage name, such as "generate", "reduce" or "order".
+
+        Returns:
+            contextlib.AbstractContextManager: The context to run the stage in.
+        """
+        if not Instrumentation.enabled:
+            return _DISABLED
+        return Instrumentation._stage(name)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _stage(name: str) -> Iterator[None]:
+        """
+        Records one stage. Allocation peaks of nested stages are tracked with a stack, since
+        `tracemalloc` only keeps a single peak that every stage needs to reset.
+        """
+        tracing = Instrumentation.trace_allocations and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if Instrumentation._stages:
+                outer = Instrumentation._stages[-1]
+                outer[1] = max(outer[1], peak)
+            tracemalloc.reset_peak()
+            Instrumentation._stages.append([current, current])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            Instrumentation.add(f"time_{name}", time.perf_counter() - start)
+            if tracing:
+                base, peak = Instrumentation._stages.pop()
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                Instrumentation.maximum(f"alloc_{name}", peak - base)
+                if Instrumentation._stages:
+                    outer = Instrumentation._stages[-1]
+                    outer[1] = max(outer[1], peak)
+
+    @staticmethod
+    def collect() -> Dict[str, Union[float, List[float]]]:
+        """
+        Returns the record of the current trial, starts a new one, and folds it into the profile.
+
+        In the profile, peaks keep their maximum, and every other metric adds up, so times and counters
+        are totals over the trials of the process. Lists of values add up by their sum. "trials" counts
+        the collected records.
+
+        Returns:
+            Dict[str, Union[float, List[float]]]: The metrics recorded since the last call (empty while disabled).
+        """
+        record, Instrumentation._record = Instrumentation._record, {}
+        if not Instrumentation.enabled:
+            return record
+        totals = {name: sum(value) if isinstance(value, list) else value for name, value in record.items()}
+        Instrumentation._profile = Instrumentation.merge(Instrumentation._profile, {**totals, "trials": 1})
+        return record
+
+    @staticmethod
+    def record() -> Dict[str, Union[float, List[float]]]:
+        """
+        Returns a copy of the record of the current trial, without collecting it.
+        """
+        return dict(Instrumentation._record)
+
+    @staticmethod
+    def discard():
+        """
+        Drops the record of the current trial without folding it into the profile, for failed trials.
+        """
+        Instrumentation._record = {}
+
+    @staticmethod
+    def profile(reset: bool = False) -> Dict[str, float]:
+        """
+        Returns the metrics aggregated over every record collected in the current process.
+
+        Args:
+            reset (bool): Starts a new profile afterwards.
+
+        Returns:
+            Dict[str, float]: The aggregated metrics.
+        """
+        profile = Instrumentation._profile
+        if reset:
+            Instrumentation._profile = {}
+        return dict(profile)
+
+    @staticmethod
+    def merge(first: Dict[str, float], second: Dict[str, float]) -> Dict[str, float]:
+        """
+        Combines two profiles, keeping the maximum of peaks and adding up everything else.
+
+        Args:
+            first (Dict[str, float]): A profile.
+            second (Dict[str, float]): Another profile.
+
+        Returns:
+            Dict[str, float]: The combined profile.
+        """
+        merged = dict(first)
+        for name, value in second.items():
+            if name not in merged:
+                merged[name] = value
+            elif name.startswith(("peak_", "alloc_")):
+                merged[name] = max(merged[name], value)
+            else:
+                merged[name] += value
+        return merged
+
+    @staticmethod
+    def format_profile(profile: Dict[str, float], title: Optional[str] = None) -> str:
+        """
+        Formats a profile as aligned lines, adding the mean per trial of totals.
+
+        Args:
+            profile (Dict[str, float]): The profile to format.
+            title (str, optional): A heading line.
+
+        Returns:
+            str: The formatted profile.
+        """
+        trials = profile.get("trials", 0)
+        lines = [title] if title is not None else []
+        for name in sorted(profile):
+            value = profile[name]
+            line = f"  {name:<24} {value:>16,.6g}"
+            if trials and name != "trials" and not name.startswith(("peak_", "alloc_")):
+                line += f"   ({value / trials:,.6g} per trial)"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+_DISABLED = contextlib.nullcontext()
@@ -0,0 +1,246 @@
+import random
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from latinsquare import LatinSquare
+from permutation import Permutation
+
+
+class JacobsonMatthews:
+    """
+    Samples Latin squares uniformly at random with the Jacobson–Matthews Markov chain.
+
+    The chain walks over the incidence cube of a Latin square, where cell (r, c, s) is 1 when
+    symbol s sits at row r, column c. Each move adds and subtracts 1 around a 2x2x2 sub-cube,
+    passing through "improper" squares holding a single -1 entry until a proper square is reached.
+    The chain state is kept between samples, so consecutive squares only pay for the mixing steps.
+
+    Example:
+        >>> sampler = JacobsonMatthews(7, seed=0)
+        >>> squares = sampler.sample_batch(100)
+    """
+
+    _shared: Dict[Tuple[int, Optional[int]], "JacobsonMatthews"] = {}
+
+    def __init__(self, n: int, mixing_steps: Optional[int] = None,
+                 seed: Optional[Union[int, np.random.SeedSequence]] = None):
+        """
+        Initializes the chain at the cyclic Latin square of size n.
+
+        Args:
+            n (int): The size of the Latin squares.
+            mixing_steps (int, optional): The number of proper squares passed between samples (defaults to n^3).
+            seed (int | np.random.SeedSequence, optional): Seeds a private random stream. When omitted,
+                moves are drawn from the global `random` module.
+
+        Raises:
+            ValueError: If n is smaller than 1.
+        """
+        if n < 1:
+            raise ValueError("Invalid size: A Latin square must have at least one row.")
+        self.n = n
+        self.mixing_steps = n ** 3 if mixing_steps is None else mixing_steps
+        self._seed(seed)
+        self._restart()
+
+    @staticmethod
+    def spawn(n: int, num_streams: int, seed: Optional[int] = None,
+              mixing_steps: Optional[int] = None) -> List["JacobsonMatthews"]:
+        """
+        Creates samplers with independent, reproducible random streams, one per worker.
+
+        Args:
+            n (int): The size of the Latin squares.
+            num_streams (int): The number of samplers to create.
+            seed (int, optional): The root seed the streams are derived from.
+            mixing_steps (int, optional): The number of proper squares passed between samples (defaults to n^3).
+
+        Returns:
+            List[JacobsonMatthews]: The samplers, in stream order.
+        """
+        children = np.random.SeedSequence(seed).spawn(num_streams)
+        return [JacobsonMatthews(n, mixing_steps, child) for child in children]
+
+    @staticmethod
+    def shared(n: int, seed: Optional[int] = None, stream: int = 0,
+               mixing_steps: Optional[int] = None) -> "JacobsonMatthews":
+        """
+        Returns the sampler of size n kept by the current process for a seed, creating it on first use.
+
+        Experiment functions draw their squares from it, passing their trial index as the stream. With
+        a seed, every call restarts the sampler on the random stream number `stream` of
+        `spawn(n, ..., seed)`, so the square drawn for a trial depends only on the seed and the trial,
+        not on which trials the worker ran before. Without a seed, the process keeps a single running
+        chain on the global `random` module, and consecutive squares only pay for the mixing steps.
+
+        Args:
+            n (int): The size of the Latin squares.
+            seed (int, optional): The root seed the streams are derived from.
+            stream (int): The stream to restart a seeded sampler on.
+            mixing_steps (int, optional): The number of proper squares passed between samples of a
+                newly created sampler (defaults to n^3).
+
+        Returns:
+            JacobsonMatthews: The process-wide sampler.
+        """
+        sampler = JacobsonMatthews._shared.get((n, seed))
+        if sampler is None:
+            sampler = JacobsonMatthews._shared[(n, seed)] = JacobsonMatthews(n, mixing_steps)
+        if seed is not None:
+            # The stream spawn() would give as child number `stream` of the root seed.
+            sampler._seed(np.random.SeedSequence(seed, spawn_key=(stream,)))
+            sampler._restart()
+        return sampler
+
+    def reset(self, square: np.ndarray):
+        """
+        Moves the chain to a given Latin square, for example to continue a local search from it.
+
+        Args:
+            square (np.ndarray): An (n, n) array of symbols forming a Latin square.
+
+        Raises:
+            ValueError: If the square does not have the sampler's size.
+        """
+        n = self.n
+        if np.shape(square) != (n, n):
+            raise ValueError(f"Invalid square: Expected an array of shape ({n}, {n}).")
+        self._cube = [0] * n ** 3
+        for r, row in enumerate(np.asarray(square).tolist()):
+            for c, s in enumerate(row):
+                self._cube[self._index(r, c, s)] = 1
+        self._improper = None
+
+    def _seed(self, seed: Optional[Union[int, np.random.SeedSequence]]):
+        """
+        Sets the random stream the moves are drawn from, the global `random` module when seed is None.
+        """
+        if isinstance(seed, np.random.SeedSequence):
+            seed = int(seed.generate_state(1, dtype=np.uint64)[0])
+        self._rng = random if seed is None else random.Random(seed)
+
+    def _restart(self):
+        """
+        Moves the chain back to the cyclic Latin square it starts from.
+        """
+        n = self.n
+        self._cube = [0] * n ** 3
+        for r in range(n):
+            for c in range(n):
+                self._cube[self._index(r, c, (r + c) % n)] = 1
+        self._improper: Optional[Tuple[int, int, int]] = None
+
+    def _index(self, r: int, c: int, s: int) -> int:
+        return (r * self.n + c) * self.n + s
+
+    def _ones(self, r: Optional[int], c: Optional[int], s: Optional[int]) -> List[int]:
+        """
+        Lists the free coordinate of every 1 on the cube line where exactly one argument is None.
+        """
+        n = self.n
+        if s is None:
+            return [k for k in range(n) if self._cube[self._index(r, c, k)] == 1]
+        if c is None:
+            return [k for k in range(n) if self._cube[self._index(r, k, s)] == 1]
+        return [k for k in range(n) if self._cube[self._index(k, c, s)] == 1]
+
+    def step(self):
+        """
+        Performs a single move of the Markov chain.
+        """
+        n, rng, cube = self.n, self._rng, self._cube
+        if self._improper is None:
+            while True:
+                r, c, s = rng.randrange(n), rng.randrange(n), rng.randrange(n)
+                if cube[self._index(r, c, s)] == 0:
+                    break
+            s1, = self._ones(r, c, None)
+            c1, = self._ones(r, None, s)
+            r1, = self._ones(None, c, s)
+        else:
+            r, c, s = self._improper
+            s1 = rng.choice(self._ones(r, c, None))
+            c1 = rng.choice(self._ones(r, None, s))
+            r1 = rng.choice(self._ones(None, c, s))
+
+        for cell in ((r, c, s), (r, c1, s1), (r1, c, s1), (r1, c1, s)):
+            cube[self._index(*cell)] += 1
+        for cell in ((r, c, s1), (r, c1, s), (r1, c, s), (r1, c1, s1)):
+            cube[self._index(*cell)] -= 1
+
+        self._improper = (r1, c1, s1) if cube[self._index(r1, c1, s1)] < 0 else None
+
+    def mix(self, steps: Optional[int] = None):
+        """
+        Advances the chain until it has rested on a proper Latin square the given number of times.
+
+        Only proper squares are counted, because the first proper square reached after a fixed number
+        of moves is biased towards squares with few intercalates (2x2 subsquares), which have more
+        improper neighbours to be entered from, while the chain watched on proper squares alone is uniform.
+
+        Args:
+            steps (int, optional): The number of proper squares to pass through (defaults to the
+                configured mixing steps).
+        """
+        if self.n == 1:
+            return  # The only Latin square of size 1 has no moves
+        remaining = self.mixing_steps if steps is None else steps
+        while remaining > 0 or self._improper is not None:
+            self.step()
+            if self._improper is None:
+                remaining -= 1
+
+    def current(self) -> np.ndarray:
+        """
+        Reads the proper Latin square the chain currently rests on.
+
+        Returns:
+            np.ndarray: An (n, n) array of symbols.
+        """
+        n = self.n
+        cube = np.asarray(self._cube, dtype=np.int8).reshape(n, n, n)
+        return cube.argmax(axis=2)
+
+    def sample(self) -> LatinSquare:
+        """
+        Mixes the chain and returns the Latin square it reaches.
+
+        Returns:
+            LatinSquare: A (nearly) uniformly distributed Latin square.
+        """
+        self.mix()
+        typecode = Permutation.typecode(self.n)
+        return LatinSquare._trusted([Permutation._trusted(array(typecode, row)) for row in self.current().tolist()])
+
+    def samples(self, count: Optional[int] = None) -> Iterator[LatinSquare]:
+        """
+        Yields Latin squares from the running chain, mixing between consecutive squares.
+
+        Args:
+            count (int, optional): The number of squares to yield (unbounded when omitted).
+
+        Yields:
+            LatinSquare: Successive samples.
+        """
+        produced = 0
+        while count is None or produced < count:
+            yield self.sample()
+            produced += 1
+
+    def sample_batch(self, batch_size: int) -> np.ndarray:
+        """
+        Draws a batch of Latin squares from the running chain.
+
+        Args:
+            batch_size (int): The number of squares to draw.
+
+        Returns:
+            np.ndarray: A (batch_size, n, n) array of symbols.
+        """
+        batch = np.empty((batch_size, self.n, self.n), dtype=np.int64)
+        for b in range(batch_size):
+            self.mix()
+            batch[b] = self.current()
+        return batch
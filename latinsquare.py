@@ -1,6 +1,8 @@
 import random
 from typing import List
 
+import numpy as np
+
 from permutation import Permutation
 from permutationchain import PermutationChain
 from transformation import Transformation
@@ -12,6 +14,8 @@ class LatinSquare(PermutationChain):
     version is also a valid permutation chain.
     """
 
+    is_latin_square = True
+
     def __init__(self, permutations: List[Permutation]):
         """
         Initializes a Latin square and validates its structure.
@@ -23,8 +27,86 @@ class LatinSquare(PermutationChain):
             ValueError: If the given permutations do not form a valid Latin square.
         """
         super().__init__(permutations)
-        if Transformation.transpose(self) is None:
-            raise ValueError("Invalid Latin Square: Transposed version is not a valid permutation chain.")
+        if not LatinSquare.validate(permutations):
+            raise ValueError("Invalid Latin Square: Must be square, with each symbol exactly once in every column.")
+
+    @classmethod
+    def _trusted(cls, permutations: List[Permutation]) -> "LatinSquare":
+        """
+        Wraps rows that are already known to form a valid Latin square, skipping validation.
+
+        Args:
+            permutations (List[Permutation]): The rows of the Latin square.
+
+        Returns:
+            LatinSquare: The wrapping Latin square.
+        """
+        square = cls.__new__(cls)
+        PermutationChain.__init__(square, permutations)
+        return square
+
+    @staticmethod
+    def validate(permutations: List[Permutation]) -> bool:
+        """
+        Checks that permutations form a Latin square: there are as many rows as columns, and every
+        column holds each symbol once. The rows are already known to be permutations.
+
+        Small squares are checked with one bitmask of the symbols seen per column, larger ones by
+        counting (column, symbol) pairs with `np.bincount`.
+
+        Args:
+            permutations (List[Permutation]): The rows of the square.
+
+        Returns:
+            bool: Whether the rows form a Latin square.
+        """
+        n = len(permutations)
+        if any(len(p) != n for p in permutations):
+            return False
+        if n <= 8:
+            masks = [0] * n
+            for p in permutations:
+                for column, value in enumerate(p._values):
+                    masks[column] |= 1 << value
+            return all(mask == (1 << n) - 1 for mask in masks)
+
+        buffer = PermutationChain(permutations).to_buffer()
+        values = np.frombuffer(buffer, dtype=np.dtype(buffer.typecode)).reshape(n, n)
+        pairs = (values + np.arange(n, dtype=np.intp) * n).ravel()
+        return bool((np.bincount(pairs, minlength=n * n) == 1).all())
+
+    @staticmethod
+    def validate_batch(squares: np.ndarray) -> np.ndarray:
+        """
+        Checks a whole batch of candidate squares at once.
+
+        A square is valid when all of its values lie in [0, n) and every row and every column holds
+        each symbol once, which is checked by counting (square, row, symbol) and (square, column, symbol)
+        triples with `np.bincount`. The failed squares are `np.flatnonzero(~valid)`.
+
+        Args:
+            squares (np.ndarray): An integer array of shape (B, n, n).
+
+        Returns:
+            np.ndarray: One boolean per square, True for the Latin squares.
+
+        Raises:
+            ValueError: If the input is not an array of square matrices.
+        """
+        squares = np.asarray(squares)
+        if squares.ndim != 3 or squares.shape[1] != squares.shape[2]:
+            raise ValueError("Invalid batch: Expected an array of shape (B, n, n).")
+        count, n = squares.shape[0], squares.shape[1]
+        if count == 0 or n == 0:
+            return np.ones(count, dtype=bool)
+
+        in_range = ((squares >= 0) & (squares < n)).all(axis=(1, 2))
+        values = np.where(in_range[:, None, None], squares, 0).astype(np.intp)
+        offsets = np.arange(count, dtype=np.intp)[:, None, None] * (n * n) + values
+        lines = np.arange(n, dtype=np.intp) * n
+        rows = np.bincount((offsets + lines[None, :, None]).ravel(), minlength=count * n * n)
+        columns = np.bincount((offsets + lines[None, None, :]).ravel(), minlength=count * n * n)
+        return in_range & (rows.reshape(count, -1) == 1).all(axis=1) & (columns.reshape(count, -1) == 1).all(axis=1)
 
     @staticmethod
     def generate_random(n: int) -> "LatinSquare":
@@ -72,7 +154,7 @@ class LatinSquare(PermutationChain):
 
                     permutations.append(Permutation(row))
 
-                return LatinSquare(permutations)  # Successfully generated a valid Latin square
+                return LatinSquare._trusted(permutations)  # Every column map was respected, so the square is valid
 
             except IndexError:
                 # If an error occurs (e.g., no valid column left), restart with a new random first row
@@ -89,9 +171,12 @@ class LatinSquare(PermutationChain):
             LatinSquare: The reduced form of the Latin square.
         """
 
-        col_permuted = Transformation.permute_columns(square, square.permutations[0])
-        first_column = [p.values[0] for p in col_permuted.permutations]
-        row_permutation = Permutation(first_column)
-        reduced_square = Transformation.permute_rows(col_permuted, row_permutation)
+        # Both permutations are composed lazily, and the rows are built once at the end.
+        col_permuted = Transformation.view(square).permute_columns(square.permutations[0])
+        row_permutation = Permutation(col_permuted.column(0))
+        reduced_square = col_permuted.permute_rows(row_permutation)
 
+        # Permuting the rows and columns of a Latin square keeps it Latin, so only other chains are validated.
+        if isinstance(square, LatinSquare):
+            return LatinSquare._trusted(reduced_square.permutations)
         return LatinSquare(reduced_square.permutations)
\ No newline at end of file
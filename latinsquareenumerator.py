@@ -0,0 +1,148 @@
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+from latinsquare import LatinSquare
+from permutation import Permutation
+
+
+class LatinSquareEnumerator:
+    """
+    Lazily enumerates every reduced Latin square of a given size by backtracking.
+
+    Squares are produced in the normalized form of `LatinSquare.reduce` (first row and first column
+    in ascending order). The free cells are filled row by row, with row and column constraints kept
+    as bitmasks. The search space can be split into deterministic shards by the values of its first
+    cells, so independent workers can cover it without overlap.
+    """
+
+    def __init__(self, n: int, shard_depth: Optional[int] = None):
+        """
+        Initializes an enumerator for reduced Latin squares of size n.
+
+        Args:
+            n (int): The size of the Latin squares.
+            shard_depth (int, optional): The number of leading free cells whose values define a shard
+                prefix (defaults to the free cells of the second row).
+
+        Raises:
+            ValueError: If n is smaller than 1.
+        """
+        if n < 1:
+            raise ValueError("Invalid size: A Latin square must have at least one row.")
+        self.n = n
+        self._cells = [(r, c) for r in range(1, n) for c in range(1, n)]
+        self.shard_depth = min(n - 1 if shard_depth is None else shard_depth, len(self._cells))
+
+    def __iter__(self) -> Iterator[LatinSquare]:
+        """
+        Yields every reduced Latin square of size n in lexicographic order.
+        """
+        for values in self._search((), len(self._cells)):
+            yield self._square(values)
+
+    def prefixes(self) -> Iterator[Tuple[int, ...]]:
+        """
+        Yields the values of the first `shard_depth` free cells of every partial square that can be extended.
+
+        Returns:
+            Iterator[Tuple[int, ...]]: The shard prefixes in lexicographic order.
+        """
+        return self._search((), self.shard_depth)
+
+    def extend(self, prefix: Tuple[int, ...]) -> Iterator[LatinSquare]:
+        """
+        Yields every reduced Latin square whose leading free cells hold the given values.
+
+        Args:
+            prefix (Tuple[int, ...]): The values of the leading free cells, in row-major order.
+
+        Yields:
+            LatinSquare: The matching reduced Latin squares in lexicographic order.
+        """
+        for values in self._search(tuple(prefix), len(self._cells)):
+            yield self._square(values)
+
+    def shard(self, index: int, num_shards: int) -> Iterator[LatinSquare]:
+        """
+        Yields the reduced Latin squares of one shard. Prefixes are dealt to shards round-robin,
+        so the shards are disjoint, cover the whole space and do not depend on the machine.
+
+        Args:
+            index (int): The shard to enumerate, from 0 to num_shards - 1.
+            num_shards (int): The total number of shards.
+
+        Yields:
+            LatinSquare: The reduced Latin squares of the shard.
+
+        Raises:
+            ValueError: If the shard index is out of range.
+        """
+        if not 0 <= index < num_shards:
+            raise ValueError(f"Invalid shard: {index} is not in range(0, {num_shards}).")
+        for i, prefix in enumerate(self.prefixes()):
+            if i % num_shards == index:
+                yield from self.extend(prefix)
+
+    def _search(self, prefix: Tuple[int, ...], depth: int) -> Iterator[Tuple[int, ...]]:
+        """
+        Yields the values of the first `depth` free cells of every consistent filling starting with `prefix`.
+        """
+        n, cells = self.n, self._cells
+        full = (1 << n) - 1
+        row_masks = [1 << r for r in range(n)]  # The first column holds r in row r
+        col_masks = [1 << c for c in range(n)]  # The first row holds c in column c
+
+        for k, v in enumerate(prefix):
+            r, c = cells[k]
+            bit = 1 << v
+            if (row_masks[r] | col_masks[c]) & bit:
+                return  # The prefix itself is inconsistent
+            row_masks[r] |= bit
+            col_masks[c] |= bit
+
+        base = len(prefix)
+        if base >= depth:
+            yield prefix[:depth]
+            return
+
+        values = list(prefix) + [-1] * (depth - base)
+        available = [0] * depth
+        r, c = cells[base]
+        available[base] = full & ~(row_masks[r] | col_masks[c])
+        k = base
+        while k >= base:
+            r, c = cells[k]
+            if values[k] >= 0:
+                bit = 1 << values[k]
+                row_masks[r] ^= bit
+                col_masks[c] ^= bit
+                values[k] = -1
+            candidates = available[k]
+            if not candidates:
+                k -= 1
+                continue
+
+            bit = candidates & -candidates
+            available[k] = candidates ^ bit
+            values[k] = bit.bit_length() - 1
+            row_masks[r] |= bit
+            col_masks[c] |= bit
+            if k + 1 == depth:
+                yield tuple(values)
+            else:
+                k += 1
+                r, c = cells[k]
+                available[k] = full & ~(row_masks[r] | col_masks[c])
+
+    def _square(self, values: Tuple[int, ...]) -> LatinSquare:
+        """
+        Builds the reduced Latin square whose free cells hold the given values.
+        """
+        n = self.n
+        typecode = Permutation.typecode(n)
+        rows: List[Permutation] = [Permutation._trusted(array(typecode, range(n)))]
+        for r in range(1, n):
+            row = array(typecode, [r])
+            row.extend(values[(r - 1) * (n - 1):r * (n - 1)])
+            rows.append(Permutation._trusted(row))
+        return LatinSquare._trusted(rows)
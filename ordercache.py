@@ -0,0 +1,152 @@
+import fcntl
+import itertools
+import multiprocessing.util
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+Trajectory = Tuple[int, int]
+
+
+class OrderCache:
+    """
+    A size-bounded cache of trajectories under the derivative, keyed by packed chain state.
+
+    Each entry maps a chain state to its preperiod and period. Once a trajectory has been computed,
+    every state visited along it is known, so later chains that run into any of those states can stop
+    early. The least recently used entries are evicted first. A cache can be persisted to a file and
+    merged with the entries other processes saved there, which is how Experiment workers share it.
+    Saving locks the file with `fcntl`, so persisted caches are only available on POSIX systems.
+    """
+
+    _shared: Dict[Optional[str], "OrderCache"] = {}
+
+    def __init__(self, maxsize: Optional[int] = 1 << 20, path: Optional[str] = None):
+        """
+        Initializes a cache, loading the entries persisted at `path` if it exists.
+
+        Args:
+            maxsize (int, optional): The maximum number of entries (unbounded when None).
+            path (str, optional): A file the cache is loaded from and saved to.
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self._entries: "OrderedDict[Hashable, Trajectory]" = OrderedDict()
+        if path is not None and os.path.exists(path):
+            self.update(OrderCache._read(path))
+
+    @staticmethod
+    def shared(path: Optional[str] = None, maxsize: Optional[int] = 1 << 20) -> "OrderCache":
+        """
+        Returns the cache shared by everything running in the current process for the given file.
+
+        On first use the cache is loaded from the file, and it is merged back into the file when the
+        process exits, including Experiment worker processes.
+
+        Args:
+            path (str, optional): The file the shared cache persists to (in memory only when None).
+            maxsize (int, optional): The maximum number of entries of a newly created cache.
+
+        Returns:
+            OrderCache: The process-wide cache.
+        """
+        if path not in OrderCache._shared:
+            cache = OrderCache(maxsize, path)
+            OrderCache._shared[path] = cache
+            if path is not None:
+                multiprocessing.util.Finalize(cache, cache.save, exitpriority=10)
+        return OrderCache._shared[path]
+
+    @staticmethod
+    def key(n: int, state: bytes) -> Hashable:
+        """
+        Builds the cache key of a packed chain state.
+
+        Args:
+            n (int): The size of each permutation of the chain.
+            state (bytes): The chain's rows concatenated into one buffer.
+
+        Returns:
+            Hashable: The cache key.
+        """
+        return n, state
+
+    def get(self, key: Hashable) -> Optional[Trajectory]:
+        """
+        Looks up the trajectory of a state, marking it as recently used.
+
+        Args:
+            key (Hashable): The key of the state.
+
+        Returns:
+            Optional[Tuple[int, int]]: The preperiod and period, or None if the state is unknown.
+        """
+        trajectory = self._entries.get(key)
+        if trajectory is not None:
+            self._entries.move_to_end(key)
+        return trajectory
+
+    def put(self, key: Hashable, trajectory: Trajectory):
+        """
+        Stores the trajectory of a state, evicting the least recently used entries beyond the size limit.
+
+        Args:
+            key (Hashable): The key of the state.
+            trajectory (Tuple[int, int]): The preperiod and period of the state.
+        """
+        self._entries[key] = trajectory
+        self._entries.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def update(self, entries: Dict[Hashable, Trajectory]):
+        """
+        Stores several trajectories at once.
+
+        Args:
+            entries (Dict[Hashable, Tuple[int, int]]): The trajectories by state key.
+        """
+        for key, trajectory in entries.items():
+            self.put(key, trajectory)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def save(self, path: Optional[str] = None):
+        """
+        Merges the cache into a file. Concurrent savers are serialized by a lock file, and the file
+        is replaced atomically, so readers never see a partial cache. The entries of this cache count
+        as the most recent ones, and the merged file keeps at most `maxsize` entries.
+
+        Args:
+            path (str, optional): The file to save to (defaults to the cache's own file).
+
+        Raises:
+            ValueError: If neither the cache nor the call names a file.
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("Invalid path: The cache has no file to save to.")
+        with open(path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = OrderCache._read(path) if os.path.exists(path) else {}
+            for key in self._entries:
+                entries.pop(key, None)
+            entries.update(self._entries)
+            if self.maxsize is not None and len(entries) > self.maxsize:
+                entries = dict(itertools.islice(entries.items(), len(entries) - self.maxsize, None))
+            descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+            with os.fdopen(descriptor, "wb") as f:
+                pickle.dump(entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, path)
+
+    @staticmethod
+    def _read(path: str) -> Dict[Hashable, Trajectory]:
+        with open(path, "rb") as f:
+            return pickle.load(f)
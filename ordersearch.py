@@ -0,0 +1,206 @@
+import concurrent.futures
+import math
+import random
+from array import array
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from differenceoperator import DifferenceOperator
+from jacobsonmatthews import JacobsonMatthews
+from latinsquare import LatinSquare
+from ordercache import OrderCache
+from permutation import Permutation
+from permutationchain import PermutationChain
+from symmetryoracle import SymmetryOracle
+
+
+class OrderSearch:
+    """
+    Searches for Latin squares of extreme order under the derivative with simulated annealing.
+
+    Each step proposes a neighbouring square, either by swapping two rows or by one proper-to-proper
+    transition of the Jacobson–Matthews chain, and accepts it with the Metropolis rule on the log of
+    the order at a geometrically cooling temperature. Column swaps and symbol relabelings are not
+    used: the first only conjugates the derivative and the second leaves it unchanged, so neither
+    can change the order.
+
+    The first derivative is kept up to date incrementally, recomputing only the derivative rows that
+    read an edited row. Candidates are scored through the `SymmetryOracle` representative of their
+    derivative, with trajectories cached per representative in an `OrderCache`, so squares that
+    differ by a cyclic row shift or a column permutation are only scored once.
+
+    Example:
+        >>> square, order = OrderSearch(6, objective="max", seed=1).run(steps=2000)
+        >>> results = OrderSearch.run_parallel(6, restarts=8, steps=2000, seed=1)
+    """
+
+    def __init__(self, n: int, objective: str = "max", seed: Optional[int] = None,
+                 moves: Tuple[str, ...] = ("rows", "jacobson-matthews"), method: str = "seen",
+                 cache: Optional[OrderCache] = None):
+        """
+        Initializes a search from a random Latin square.
+
+        Args:
+            n (int): The size of the Latin squares.
+            objective (str): "max" to look for the largest order, "min" for the smallest.
+            seed (int, optional): Seeds the starting square and every move.
+            moves (Tuple[str, ...]): The moves to propose, among "rows" and "jacobson-matthews".
+            method (str): The cycle detection method used to score new representatives.
+            cache (OrderCache, optional): The trajectory cache, for example `OrderCache.shared()` to share
+                it with other searches of the process (defaults to a cache private to this search).
+
+        Raises:
+            ValueError: If n is smaller than 2, or the objective or a move is unknown.
+        """
+        if n < 2:
+            raise ValueError("Invalid size: Searching needs squares with at least two rows.")
+        if objective not in ("max", "min"):
+            raise ValueError(f"Invalid objective: {objective!r}. Expected 'max' or 'min'.")
+        if not moves or any(move not in ("rows", "jacobson-matthews") for move in moves):
+            raise ValueError(f"Invalid moves: {moves!r}. Expected 'rows' and/or 'jacobson-matthews'.")
+        self.n = n
+        self.objective = objective
+        self.moves = moves
+        self.method = method
+        self.cache = cache if cache is not None else OrderCache()
+        self._rng = random.Random(seed)
+        self._sampler = JacobsonMatthews(n, seed=self._rng.randrange(1 << 62))
+
+        self._typecode = Permutation.typecode(n)
+        self._rows = array(self._typecode, self._sampler.sample().to_buffer())
+        self._derivative = self._rows[:]
+        self._scratch = self._rows[:n]
+        DifferenceOperator.derivative_into(self._rows, self._derivative, self._scratch, n)
+        self.order = self._score()
+
+    def square(self) -> LatinSquare:
+        """
+        Returns the square the search currently rests on.
+        """
+        return LatinSquare._trusted(PermutationChain._from_buffer(self._rows[:], self.n).permutations)
+
+    def run(self, steps: int = 1000, initial_temperature: float = 1.0,
+            final_temperature: float = 0.01) -> Tuple[LatinSquare, int]:
+        """
+        Anneals for a number of steps and returns the best square seen.
+
+        Args:
+            steps (int): The number of proposed moves.
+            initial_temperature (float): The temperature of the first step, in units of log-order.
+            final_temperature (float): The temperature of the last step.
+
+        Returns:
+            Tuple[LatinSquare, int]: The best square found and its order.
+        """
+        best_rows, best_order = self._rows[:], self.order
+        cooling = (final_temperature / initial_temperature) ** (1 / max(steps - 1, 1))
+        temperature = initial_temperature
+        sign = 1 if self.objective == "max" else -1
+
+        for _ in range(steps):
+            previous_rows, previous_derivative = self._rows[:], self._derivative[:]
+            move = self._propose()
+            order = self._score()
+            change = sign * (math.log(order + 1) - math.log(self.order + 1))
+            accepted = change >= 0 or self._rng.random() < math.exp(change / temperature)
+            if accepted:
+                self.order = order
+                if sign * (order - best_order) > 0:
+                    best_rows, best_order = self._rows[:], order
+            else:
+                self._rows, self._derivative = previous_rows, previous_derivative
+            # The sampler has to rest on the current square before its next move.
+            if "jacobson-matthews" in self.moves and (move == "rows") == accepted:
+                self._sampler.reset(self._values())
+            temperature *= cooling
+
+        square = LatinSquare._trusted(PermutationChain._from_buffer(best_rows, self.n).permutations)
+        return square, best_order
+
+    @staticmethod
+    def run_parallel(n: int, restarts: int = 8, steps: int = 1000, seed: Optional[int] = None,
+                     num_workers: Optional[int] = None, **kwargs) -> List[Tuple[LatinSquare, int]]:
+        """
+        Runs independent searches from different random squares on several cores.
+
+        Args:
+            n (int): The size of the Latin squares.
+            restarts (int): The number of independent searches.
+            steps (int): The number of steps of each search.
+            seed (int, optional): The root seed the searches' seeds are derived from.
+            num_workers (int, optional): The number of worker processes (defaults to the CPU count).
+            **kwargs: Passed to the OrderSearch constructor (objective, moves, method).
+
+        Returns:
+            List[Tuple[LatinSquare, int]]: The best square and order of every search, best first.
+        """
+        seeds = [int(child.generate_state(1, dtype=np.uint64)[0]) >> 1
+                 for child in np.random.SeedSequence(seed).spawn(restarts)]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+            results = list(executor.map(OrderSearch._restart, [(n, steps, seed, kwargs) for seed in seeds]))
+        reverse = kwargs.get("objective", "max") == "max"
+        return sorted(results, key=lambda result: result[1], reverse=reverse)
+
+    @staticmethod
+    def _restart(args: Tuple[int, int, int, dict]) -> Tuple[LatinSquare, int]:
+        """
+        Runs one search inside a worker process.
+        """
+        n, steps, seed, kwargs = args
+        return OrderSearch(n, seed=seed, **kwargs).run(steps)
+
+    def _propose(self) -> str:
+        """
+        Moves to a random neighbouring square and updates the derivative rows it affects.
+
+        Returns:
+            str: The move that was made.
+        """
+        n = self.n
+        move = self._rng.choice(self.moves)
+        if move == "rows":
+            i, j = self._rng.sample(range(n), 2)
+            row_i, row_j = self._rows[i * n:(i + 1) * n], self._rows[j * n:(j + 1) * n]
+            self._rows[i * n:(i + 1) * n], self._rows[j * n:(j + 1) * n] = row_j, row_i
+            changed = {i, j}
+        else:
+            self._sampler.mix(1)
+            rows = array(self._typecode, self._sampler.current().ravel().tolist())
+            changed = {r for r in range(n) if rows[r * n:(r + 1) * n] != self._rows[r * n:(r + 1) * n]}
+            self._rows = rows
+        self._update_derivative(changed)
+        return move
+
+    def _update_derivative(self, changed: Set[int]):
+        """
+        Recomputes the derivative rows p_(k+1)^-1 ∘ p_k that read one of the changed rows.
+        """
+        n, m = self.n, len(self._rows) // self.n
+        out = self._scratch[:]
+        for k in {(r - 1) % m for r in changed} | changed:
+            following = (k + 1) % m
+            DifferenceOperator.difference_into(self._rows[k * n:(k + 1) * n],
+                                               self._rows[following * n:(following + 1) * n], out, self._scratch)
+            self._derivative[k * n:(k + 1) * n] = out
+
+    def _score(self) -> int:
+        """
+        Computes the order of the current square from the trajectory of its derivative's representative.
+        """
+        representative = SymmetryOracle.representative(self._derivative, self.n)
+        key = OrderCache.key(self.n, representative.tobytes())
+        trajectory = self.cache.get(key)
+        if trajectory is None:
+            chain = PermutationChain._from_buffer(representative, self.n)
+            trajectory = DifferenceOperator.trajectory(chain, self.method, self.cache)
+            self.cache.put(key, trajectory)
+        preperiod, period = trajectory
+        # A Latin square is never the identity chain, so it reaches the identity one step after its derivative.
+        return preperiod + 1 if period == 1 else period
+
+    def _values(self) -> np.ndarray:
+        """
+        Returns the current square as an (n, n) array.
+        """
+        return np.frombuffer(self._rows, dtype=np.dtype(self._typecode)).reshape(self.n, self.n)
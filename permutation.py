@@ -1,3 +1,4 @@
+from array import array
 from typing import List, Tuple
 
 
@@ -6,8 +7,12 @@ class Permutation:
     Represents a permutation of elements. Provides functionality for computing
     the inverse of a permutation, applying one permutation to another, and converting
     the permutation to a hashable format.
+
+    Values are stored in a compact `array` whose item size fits the permutation size.
     """
 
+    __slots__ = ("_values",)
+
     def __init__(self, values: List[int]):
         """
         Initializes a permutation with the given values and validates its correctness.
@@ -20,7 +25,46 @@ class Permutation:
         """
         if not self._is_valid_permutation(values):
             raise ValueError("Invalid permutation: Must contain each integer from 0 to N-1 exactly once.")
-        self.values = values
+        self._values = array(Permutation.typecode(len(values)), values)
+
+    @classmethod
+    def _trusted(cls, values: array) -> "Permutation":
+        """
+        Wraps values that are already known to form a valid permutation, skipping validation.
+
+        Args:
+            values (array): The permutation values, owned by the new permutation from now on.
+
+        Returns:
+            Permutation: The wrapping permutation.
+        """
+        perm = cls.__new__(cls)
+        perm._values = values
+        return perm
+
+    @staticmethod
+    def typecode(n: int) -> str:
+        """
+        Chooses the smallest unsigned array typecode able to hold the values of a permutation of size n.
+
+        Args:
+            n (int): The size of the permutation.
+
+        Returns:
+            str: The array typecode.
+        """
+        if n <= 1 << 8:
+            return "B"
+        if n <= 1 << 16:
+            return "H"
+        return "L"
+
+    @property
+    def values(self) -> List[int]:
+        """
+        Returns the permutation values as a list.
+        """
+        return self._values.tolist()
 
     @staticmethod
     def _is_valid_permutation(values: List[int]) -> bool:
@@ -43,10 +87,10 @@ class Permutation:
         Returns:
             Permutation: The inverse permutation.
         """
-        inverse_values = [0] * len(self.values)
-        for i, v in enumerate(self.values):
+        inverse_values = array(self._values.typecode, bytes(len(self._values) * self._values.itemsize))
+        for i, v in enumerate(self._values):
             inverse_values[v] = i
-        return Permutation(inverse_values)
+        return Permutation._trusted(inverse_values)
 
     def apply(self, perm: "Permutation") -> "Permutation":
         """
@@ -58,7 +102,8 @@ class Permutation:
         Returns:
             Permutation: The result of applying `perm` to `self`.
         """
-        return Permutation([self.values[i] for i in perm.values])
+        values = self._values
+        return Permutation._trusted(array(values.typecode, [values[i] for i in perm._values]))
 
     def to_tuple(self) -> Tuple[int, ...]:
         """
@@ -67,7 +112,10 @@ class Permutation:
         Returns:
             Tuple[int, ...]: A tuple representation of the permutation.
         """
-        return tuple(self.values)
+        return tuple(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
 
     def __repr__(self) -> str:
         """
@@ -1,4 +1,7 @@
-from typing import List, Tuple
+from array import array
+from typing import Iterable, List, Tuple
+
+import numpy as np
 
 from permutation import Permutation
 
@@ -7,8 +10,13 @@ class PermutationChain:
     """
     Represents a sequence of permutations.
     Provides methods for transformation and hashing.
+
+    Hashing and equality go through a packed integer key that is computed once and cached, so
+    chains are treated as immutable once they have been hashed or compared.
     """
 
+    is_latin_square = False
+
     def __init__(self, permutations: List[Permutation]):
         """
         Initializes a permutation chain with a list of permutations.
@@ -17,6 +25,88 @@ class PermutationChain:
             permutations (List[Permutation]): A list of permutations.
         """
         self.permutations = permutations
+        self._key = None
+
+    @classmethod
+    def _from_buffer(cls, buffer: array, n: int) -> "PermutationChain":
+        """
+        Splits a buffer of concatenated, already validated permutation values into a chain.
+
+        Args:
+            buffer (array): The rows of the chain concatenated into one buffer.
+            n (int): The size of each permutation.
+
+        Returns:
+            PermutationChain: The chain wrapping slices of the buffer.
+        """
+        return cls([Permutation._trusted(buffer[i:i + n]) for i in range(0, len(buffer), n)])
+
+    @classmethod
+    def _from_numpy(cls, values: np.ndarray) -> "PermutationChain":
+        """
+        Builds a chain from an (m, n) array whose rows are already known to be permutations.
+
+        Args:
+            values (np.ndarray): The rows of the chain.
+
+        Returns:
+            PermutationChain: The chain holding the rows in compact buffers.
+        """
+        n = values.shape[1]
+        buffer = array(Permutation.typecode(n))
+        buffer.frombytes(np.ascontiguousarray(values, dtype=np.dtype(buffer.typecode)).tobytes())
+        return cls._from_buffer(buffer, n)
+
+    @staticmethod
+    def pack(values: Iterable[int], n: int) -> int:
+        """
+        Packs permutation values into a single integer using ceil(log2 n) bits per value.
+
+        Args:
+            values (Iterable[int]): The values, each smaller than n.
+            n (int): The size of each permutation.
+
+        Returns:
+            int: The packed values, first value in the most significant bits.
+        """
+        bits = max(1, (n - 1).bit_length())
+        key = 0
+        for v in values:
+            key = (key << bits) | v
+        return key
+
+    @staticmethod
+    def unpack(key: int, m: int, n: int) -> "PermutationChain":
+        """
+        Rebuilds a chain of m permutations of size n from its packed key.
+
+        Args:
+            key (int): The packed key, as returned by `pack` or `key`.
+            m (int): The number of permutations.
+            n (int): The size of each permutation.
+
+        Returns:
+            PermutationChain: The chain the key was packed from.
+        """
+        bits = max(1, (n - 1).bit_length())
+        mask = (1 << bits) - 1
+        buffer = array(Permutation.typecode(n), [0]) * (m * n)
+        for i in range(m * n - 1, -1, -1):
+            buffer[i] = key & mask
+            key >>= bits
+        return PermutationChain._from_buffer(buffer, n)
+
+    @property
+    def key(self) -> int:
+        """
+        Returns the chain's values packed into one integer, computed on first use and cached.
+        """
+        if self._key is None:
+            self._key = PermutationChain.pack((v for p in self.permutations for v in p._values), self._width())
+        return self._key
+
+    def _width(self) -> int:
+        return len(self.permutations[0]) if self.permutations else 0
 
     def __getitem__(self, index: int) -> Permutation:
         return self.permutations[index]
@@ -33,6 +123,31 @@ class PermutationChain:
         """
         return [p.values for p in self.permutations]
 
+    def to_buffer(self) -> array:
+        """
+        Concatenates the values of every permutation into one flat buffer of length m * n.
+
+        Returns:
+            array: The concatenated permutation values.
+        """
+        buffer = array(self.permutations[0]._values.typecode)
+        for p in self.permutations:
+            buffer.extend(p._values)
+        return buffer
+
+    def to_numpy(self) -> np.ndarray:
+        """
+        Converts the permutation chain to an integer array of shape (m, n).
+
+        Returns:
+            np.ndarray: An array whose rows are the permutations of the chain.
+        """
+        if not self.permutations:
+            return np.array([], dtype=np.int64)
+        buffer = self.to_buffer()
+        values = np.frombuffer(buffer, dtype=np.dtype(buffer.typecode)).astype(np.int64)
+        return values.reshape(len(self.permutations), -1)
+
     def to_tuple(self) -> Tuple[Tuple[int, ...], ...]:
         """
         Converts the permutation chain to a tuple format for hashing.
@@ -48,7 +163,8 @@ class PermutationChain:
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, PermutationChain):
             return False
-        return self.to_tuple() == other.to_tuple()
+        return (len(self) == len(other) and self._width() == other._width()
+                and self.key == other.key)
 
     def __hash__(self) -> int:
-        return hash(self.to_tuple())
+        return hash(self.key)
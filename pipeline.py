@@ -0,0 +1,255 @@
+import concurrent.futures
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+_DONE = object()
+
+
+class Pipeline:
+    """
+    Streams items through a sequence of stages that run concurrently, with bounded queues between them.
+
+    Each stage reads items from its input queue, applies its function and writes the results to the
+    queue of the next stage. Every queue holds at most `queue_size` batches, so a slow stage blocks
+    the stages before it (backpressure) and memory stays bounded however many items flow through.
+    A stage runs on its own number of worker threads, and optionally hands its batches to a process
+    pool of the same size for CPU-bound work, so stages can be scaled independently.
+
+    A typical experiment streams trial indices through generation, reduction and order computation,
+    and aggregates the results as they come out of `run`:
+
+        >>> pipeline = Pipeline()
+        >>> pipeline.add("generate", generate, workers=2, processes=True, batch_size=32)
+        >>> pipeline.add("reduce", reduce, workers=2, processes=True, batch_size=32)
+        >>> pipeline.add("order", order, workers=4, processes=True, batch_size=32)
+        >>> orders = Counter(result["order"] for result in pipeline.run(range(100000)))
+
+    Items leave the pipeline in completion order, not input order. Functions run in worker processes
+    must be picklable, like the functions of `Experiment`.
+    """
+
+    def __init__(self, queue_size: int = 16):
+        """
+        Initializes an empty pipeline.
+
+        Args:
+            queue_size (int): The maximum number of batches waiting between two stages.
+        """
+        self.queue_size = queue_size
+        self.stages: List[Dict[str, Any]] = []
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def add(self, name: str, func: Callable[[Any], Any], workers: int = 1, batch_size: int = 1,
+            batched: bool = False, processes: bool = False) -> "Pipeline":
+        """
+        Appends a stage to the pipeline.
+
+        Args:
+            name (str): The name of the stage, used in `stats`.
+            func (Callable[[Any], Any]): Maps an item to the item passed on, or a list of items to a list
+                of items when `batched`.
+            workers (int): The number of batches the stage processes concurrently.
+            batch_size (int): The maximum number of items the stage takes from its queue at once.
+            batched (bool): Whether `func` takes a whole batch (for vectorized functions).
+            processes (bool): Runs the function in a pool of `workers` processes instead of in threads.
+
+        Returns:
+            Pipeline: The pipeline, so stages can be chained.
+
+        Raises:
+            ValueError: If the name is already used, or workers or batch_size is not positive.
+        """
+        if any(stage["name"] == name for stage in self.stages):
+            raise ValueError(f"Invalid stage: A stage named {name!r} already exists.")
+        if workers < 1 or batch_size < 1:
+            raise ValueError("Invalid stage: Workers and batch size must be positive.")
+        self.stages.append({"name": name, "func": func, "workers": workers, "batch_size": batch_size,
+                            "batched": batched, "processes": processes})
+        return self
+
+    def run(self, items: Iterable[Any]) -> Iterator[Any]:
+        """
+        Streams items through every stage.
+
+        The items are read lazily, as the first stage has room for them. If a stage raises, the
+        pipeline stops and the exception is raised from the iteration.
+
+        Args:
+            items (Iterable[Any]): The inputs of the first stage.
+
+        Yields:
+            Any: The outputs of the last stage, in completion order.
+        """
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        pools = [concurrent.futures.ProcessPoolExecutor(stage["workers"]) if stage["processes"] else None
+                 for stage in self.stages]
+        self.stats = {stage["name"]: {"items": 0, "busy": 0.0, "waiting_input": 0.0, "waiting_output": 0.0}
+                      for stage in self.stages}
+        lock = threading.Lock()
+
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0], stop, errors), daemon=True)]
+        for index, stage in enumerate(self.stages):
+            remaining = [stage["workers"]]
+            for _ in range(stage["workers"]):
+                threads.append(threading.Thread(
+                    target=self._work,
+                    args=(stage, pools[index], queues[index], queues[index + 1], stop, errors, lock, remaining,
+                          self.stages[index + 1]["workers"] if index + 1 < len(self.stages) else 1),
+                    daemon=True))
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                batch = Pipeline._get(queues[-1], stop)
+                if batch is _DONE or batch is None:
+                    break
+                yield from batch
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            for pool in pools:
+                if pool is not None:
+                    pool.shutdown(cancel_futures=True)
+        if errors:
+            raise errors[0]
+
+    def _feed(self, items: Iterable[Any], output: queue.Queue, stop: threading.Event, errors: List[BaseException]):
+        """
+        Puts the input items into the first queue, in batches of the first stage's size.
+        """
+        size = self.stages[0]["batch_size"] if self.stages else 1
+        batch = []
+        try:
+            for item in items:
+                batch.append(item)
+                if len(batch) == size:
+                    if not Pipeline._put(output, batch, stop):
+                        return
+                    batch = []
+            if batch and not Pipeline._put(output, batch, stop):
+                return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+            return
+        for _ in range(self.stages[0]["workers"] if self.stages else 1):
+            Pipeline._put(output, _DONE, stop)
+
+    def _work(self, stage: Dict[str, Any], pool: Optional[concurrent.futures.ProcessPoolExecutor],
+              source: queue.Queue, output: queue.Queue, stop: threading.Event, errors: List[BaseException],
+              lock: threading.Lock, remaining: List[int], successors: int):
+        """
+        Runs one worker of a stage until its input is exhausted or the pipeline stops.
+        """
+        stats = self.stats[stage["name"]]
+        size = stage["batch_size"]
+        pending: List[Any] = []
+        finished = False
+        while not finished and not stop.is_set():
+            started = time.perf_counter()
+            batch = pending
+            while len(batch) < size:
+                # Wait for the first item only; then take whatever is already queued.
+                chunk = Pipeline._get(source, stop) if not batch else Pipeline._get_nowait(source)
+                if chunk is None:
+                    break
+                if chunk is _DONE:
+                    finished = True
+                    break
+                batch = batch + chunk
+            batch, pending = batch[:size], batch[size:]
+            waited = time.perf_counter()
+            if not batch:
+                continue
+            try:
+                results = Pipeline._apply(stage, pool, batch)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+                return
+            busy = time.perf_counter()
+            if not Pipeline._put(output, results, stop):
+                return
+            with lock:
+                stats["items"] += len(batch)
+                stats["waiting_input"] += waited - started
+                stats["busy"] += busy - waited
+                stats["waiting_output"] += time.perf_counter() - busy
+            if finished and pending:
+                finished = False  # Flush the leftover items before signalling the end
+                Pipeline._put(source, _DONE, stop)
+
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            for _ in range(successors):
+                Pipeline._put(output, _DONE, stop)
+
+    @staticmethod
+    def _apply(stage: Dict[str, Any], pool: Optional[concurrent.futures.ProcessPoolExecutor], batch: List[Any]) -> List[Any]:
+        """
+        Applies a stage's function to a batch, in the worker thread or in the stage's process pool.
+        """
+        if pool is not None:
+            return pool.submit(Pipeline._call, stage["func"], stage["batched"], batch).result()
+        return Pipeline._call(stage["func"], stage["batched"], batch)
+
+    @staticmethod
+    def _call(func: Callable[[Any], Any], batched: bool, batch: List[Any]) -> List[Any]:
+        return list(func(batch)) if batched else [func(item) for item in batch]
+
+    @staticmethod
+    def _put(output: queue.Queue, batch: Any, stop: threading.Event) -> bool:
+        """
+        Puts a batch into a bounded queue, waiting for room unless the pipeline stops.
+
+        Returns:
+            bool: False if the pipeline stopped first.
+        """
+        while not stop.is_set():
+            try:
+                output.put(batch, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(source: queue.Queue, stop: threading.Event) -> Any:
+        """
+        Takes a batch from a queue, waiting for one unless the pipeline stops (then returns None).
+        """
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    @staticmethod
+    def _get_nowait(source: queue.Queue) -> Any:
+        try:
+            return source.get_nowait()
+        except queue.Empty:
+            return None
+
+    def format_stats(self) -> str:
+        """
+        Formats the statistics of the last run, one line per stage, to spot the stage to scale.
+
+        Returns:
+            str: The items processed, and the seconds spent working, waiting for input and waiting
+                for room downstream, summed over the stage's workers.
+        """
+        lines = []
+        for name, stats in self.stats.items():
+            lines.append(f"{name:<16} {int(stats['items']):>10} items  busy {stats['busy']:8.2f}s  "
+                         f"input wait {stats['waiting_input']:8.2f}s  output wait {stats['waiting_output']:8.2f}s")
+        return "\n".join(lines)
@@ -0,0 +1,280 @@
+import math
+import os
+import tempfile
+from array import array
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from permutationchain import PermutationChain
+
+
+class RankTables:
+    """
+    Precomputed tables over the Lehmer ranks of all permutations of a small size n.
+
+    A permutation of size n <= 8 is identified by its Lehmer rank, an integer below n! that fits in
+    16 bits, so a chain of m permutations becomes an array of m ranks and its state key a byte string
+    of length 2m. Inversion and composition are table lookups, and the derivative of a chain is one
+    vectorized lookup over its rows:
+
+        D(ranks)_i = compose[inverse[ranks_(i+1)], ranks_i]
+
+    For n <= 7 the tables hold every product directly (n! x n! entries, 50 MB for n = 7). For n = 8 a
+    full table would take 3 GB, so composition is factored through the tables of size 7: the leading
+    Lehmer digit of a permutation p is p(0), and p = c_(p(0)) ∘ E(q), where q is the pattern of
+    p(1), ..., p(n-1), E embeds it as a permutation fixing 0, and c_j sends 0 to j and 1, ..., n-1
+    in order to the other points. The rank of p is p(0) * (n-1)! + rank(q), and a product of two
+    permutations only needs two lookups in the composition table of size n-1 and two small tables
+    that move E(q) ∘ c_j and c_i ∘ c_k back into this form.
+
+    Tables are built once, saved as .npy files in a directory (`DIRECTORY`, or the system temporary
+    directory by default), and memory-mapped, so every process of a machine shares their pages.
+
+    Example:
+        >>> tables = RankTables.load(7)
+        >>> ranks = tables.ranks(square)
+        >>> tables.derivative(ranks)
+    """
+
+    MAX_TABLE_SIZE = 7
+    MAX_SIZE = 8
+    DIRECTORY: Optional[str] = None
+
+    _loaded: Dict[Tuple[int, Optional[str]], "RankTables"] = {}
+
+    def __init__(self, n: int, directory: Optional[str] = None):
+        """
+        Loads the tables of size n, building and saving them first if needed. Use `load` to share
+        the tables of a process.
+
+        Args:
+            n (int): The size of the permutations.
+            directory (str, optional): The directory the tables are saved to and mapped from (defaults
+                to `default_directory()`).
+
+        Raises:
+            ValueError: If n is not between 1 and 8.
+        """
+        if not 1 <= n <= RankTables.MAX_SIZE:
+            raise ValueError(f"Invalid size: Rank tables are only available for 1 <= n <= {RankTables.MAX_SIZE}.")
+        self.n = n
+        self.directory = directory or RankTables.default_directory()
+        self.size = math.factorial(n)
+        self.permutations = self._table("permutations", lambda: RankTables._permutations(n))
+        self.inverse = self._table("inverse", self._inverses)
+        if n <= RankTables.MAX_TABLE_SIZE:
+            self._compose = self._table("compose", self._products)
+        else:
+            self._factor = RankTables.load(n - 1, directory)
+            self._shift = self._table("shift", self._shifts)
+            self._cosets = self._table("cosets", self._coset_products)
+        # Flat views for scalar lookups, which return Python integers without going through NumPy.
+        self._inverse_view = memoryview(self.inverse)
+        if n <= RankTables.MAX_TABLE_SIZE:
+            self._compose_view = memoryview(self._compose.reshape(-1))
+        else:
+            self._shift_view = memoryview(self._shift.reshape(-1))
+            self._cosets_view = memoryview(self._cosets.reshape(-1))
+
+    @staticmethod
+    def load(n: int, directory: Optional[str] = None) -> "RankTables":
+        """
+        Returns the tables of size n shared by the current process.
+
+        Args:
+            n (int): The size of the permutations.
+            directory (str, optional): The directory the tables are saved to and mapped from.
+
+        Returns:
+            RankTables: The tables.
+        """
+        directory = directory or RankTables.default_directory()
+        if (n, directory) not in RankTables._loaded:
+            RankTables._loaded[(n, directory)] = RankTables(n, directory)
+        return RankTables._loaded[(n, directory)]
+
+    @staticmethod
+    def default_directory() -> str:
+        """
+        Returns the directory of tables loaded without one, such as those of the "ranked" and "graph"
+        methods of `DifferenceOperator`: `DIRECTORY` when it is set, otherwise a directory in the
+        system temporary directory.
+        """
+        return RankTables.DIRECTORY or os.path.join(tempfile.gettempdir(), "latin-square-rank-tables")
+
+    @staticmethod
+    def rank(values: np.ndarray) -> np.ndarray:
+        """
+        Computes the Lehmer ranks of permutations.
+
+        Args:
+            values (np.ndarray): An integer array of shape (..., n) whose last axis holds permutations.
+
+        Returns:
+            np.ndarray: The ranks, of shape (...), as 64-bit integers.
+        """
+        values = np.asarray(values)
+        n = values.shape[-1]
+        ranks = np.zeros(values.shape[:-1], dtype=np.int64)
+        for i in range(n - 1):
+            smaller = (values[..., i + 1:] < values[..., i:i + 1]).sum(axis=-1)
+            ranks = ranks * (n - i) + smaller
+        return ranks
+
+    def ranks(self, chain: PermutationChain) -> np.ndarray:
+        """
+        Converts a permutation chain to its array of ranks.
+
+        Args:
+            chain (PermutationChain): A chain of permutations of size n.
+
+        Returns:
+            np.ndarray: The ranks of its rows, as 16-bit integers.
+        """
+        return RankTables.rank(chain.to_numpy().reshape(len(chain), self.n)).astype(np.uint16)
+
+    def chain(self, ranks: np.ndarray) -> PermutationChain:
+        """
+        Converts an array of ranks back to a permutation chain.
+
+        Args:
+            ranks (np.ndarray): The ranks of the rows.
+
+        Returns:
+            PermutationChain: The chain of the ranked permutations.
+        """
+        if len(ranks) == 0:
+            return PermutationChain([])
+        return PermutationChain._from_numpy(self.permutations[ranks])
+
+    def compose(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Composes permutations given by rank, elementwise.
+
+        Args:
+            a (np.ndarray): The ranks of the outer permutations.
+            b (np.ndarray): The ranks of the inner permutations, broadcast against a.
+
+        Returns:
+            np.ndarray: The ranks of a ∘ b, as 16-bit integers.
+        """
+        if self.n <= RankTables.MAX_TABLE_SIZE:
+            return self._compose[a, b]
+        block = self._factor.size
+        # a ∘ b = c_i ∘ E(q_a) ∘ c_j ∘ E(q_b) = c_i ∘ c_k ∘ E(q') ∘ E(q_b) = c_m ∘ E(r) ∘ E(q') ∘ E(q_b)
+        shifted = self._shift[a % block, b // block].astype(np.int64)
+        cosets = self._cosets[a // block, shifted // block].astype(np.int64)
+        inner = self._factor.compose(self._factor.compose(cosets % block, shifted % block), b % block)
+        return (cosets // block * block + inner).astype(np.uint16)
+
+    def derivative(self, ranks: np.ndarray) -> np.ndarray:
+        """
+        Computes the derivative of one or several chains of ranks.
+
+        Args:
+            ranks (np.ndarray): An array of shape (m,) or (B, m) of ranks.
+
+        Returns:
+            np.ndarray: The ranks of the derivative rows p_(i+1)^-1 ∘ p_i, of the same shape.
+        """
+        return self.compose(self.inverse[np.roll(ranks, -1, axis=-1)], ranks)
+
+    def derivative_into(self, source: array, target: array) -> None:
+        """
+        Computes the derivative of a single chain of ranks into a preallocated buffer.
+
+        For one chain, m scalar lookups through flat views of the tables are cheaper than the
+        vectorized `derivative`, whose NumPy overhead dominates at the chain lengths n <= 8 allows.
+
+        Args:
+            source (array): The ranks of the chain's rows, in an "H" array.
+            target (array): The buffer receiving the derivative, of the same length as source.
+        """
+        inverse = self._inverse_view
+        m = len(source)
+        if self.n <= RankTables.MAX_TABLE_SIZE:
+            compose, size = self._compose_view, self.size
+            for i in range(m):
+                target[i] = compose[inverse[source[(i + 1) % m]] * size + source[i]]
+            return
+        for i in range(m):
+            target[i] = self._compose_one(inverse[source[(i + 1) % m]], source[i])
+
+    def _compose_one(self, a: int, b: int) -> int:
+        """
+        Composes two ranks of size 8 through the factored tables, as in `compose`.
+        """
+        n, block = self.n, self._factor.size
+        compose = self._factor._compose_view
+        shifted = self._shift_view[(a % block) * n + b // block]
+        cosets = self._cosets_view[(a // block) * n + shifted // block]
+        inner = compose[(cosets % block) * block + shifted % block]
+        return cosets // block * block + compose[inner * block + b % block]
+
+    def _table(self, name: str, build) -> np.ndarray:
+        """
+        Maps a table from its file, building and saving it atomically first if the file is missing.
+        """
+        path = os.path.join(self.directory, f"{name}-{self.n}.npy")
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".npy")
+            with os.fdopen(descriptor, "wb") as f:
+                np.save(f, build())
+            os.replace(temporary, path)
+        return np.load(path, mmap_mode="r")
+
+    @staticmethod
+    def _permutations(n: int) -> np.ndarray:
+        """
+        Lists every permutation of size n in rank order.
+        """
+        if n == 1:
+            return np.zeros((1, 1), dtype=np.uint8)
+        smaller = RankTables._permutations(n - 1)
+        # Rank order is by first value, then by the rank of the pattern of the remaining values.
+        first = np.repeat(np.arange(n, dtype=np.uint8), len(smaller))
+        rest = np.tile(smaller, (n, 1))
+        rest = rest + (rest >= first[:, None])
+        return np.concatenate([first[:, None], rest], axis=1).astype(np.uint8)
+
+    def _inverses(self) -> np.ndarray:
+        inverses = np.argsort(self.permutations, axis=1)
+        return RankTables.rank(inverses).astype(np.uint16)
+
+    def _products(self) -> np.ndarray:
+        """
+        Builds the full composition table, compose[a, b] = rank(a ∘ b), in blocks of rows.
+        """
+        products = np.empty((self.size, self.size), dtype=np.uint16)
+        block = max(1, (1 << 22) // (self.size * self.n))
+        for start in range(0, self.size, block):
+            outer = self.permutations[start:start + block]
+            composed = outer[np.arange(len(outer))[:, None, None], self.permutations[None, :, :]]
+            products[start:start + block] = RankTables.rank(composed)
+        return products
+
+    def _shifts(self) -> np.ndarray:
+        """
+        Builds shift[q, j] = rank(E(q) ∘ c_j), which has the form c_k ∘ E(q').
+        """
+        patterns = self._factor.permutations.astype(np.intp)
+        embedded = np.concatenate([np.zeros((len(patterns), 1), dtype=np.intp), patterns + 1], axis=1)
+        cosets = RankTables._coset_representatives(self.n)
+        return RankTables.rank(embedded[:, cosets]).astype(np.uint16)
+
+    def _coset_products(self) -> np.ndarray:
+        """
+        Builds cosets[i, k] = rank(c_i ∘ c_k), which has the form c_m ∘ E(r).
+        """
+        cosets = RankTables._coset_representatives(self.n)
+        return RankTables.rank(cosets[:, cosets]).astype(np.uint16)
+
+    @staticmethod
+    def _coset_representatives(n: int) -> np.ndarray:
+        """
+        Returns the permutations c_j of rank j * (n-1)!, which send 0 to j and the other points in order.
+        """
+        points = np.arange(1, n)
+        return np.array([[j] + list(points - 1 + (points - 1 >= j)) for j in range(n)], dtype=np.intp)
@@ -0,0 +1,128 @@
+import os
+import pickle
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+
+MAGIC = b"LSRESULTS1\n"
+LENGTH = struct.Struct("<Q")
+
+
+class ResultSink:
+    """
+    An append-only file of experiment result batches, used to checkpoint and resume experiments.
+
+    Each record holds the batch of results of one chunk of consecutive trials, pickled and prefixed
+    with its length. Records are written and flushed as soon as a chunk completes, so a killed run
+    loses at most the chunks in flight. A record cut short by a crash is dropped when the file is
+    reopened. Results can hold arbitrary Python objects (such as Latin squares), which is why
+    records are pickled rather than stored in a typed columnar format.
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens a result file, creating it if needed and discarding a trailing partial record.
+
+        Args:
+            path (str): The path of the result file.
+
+        Raises:
+            ValueError: If the file exists but is not a result file.
+        """
+        self.path = path
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(MAGIC)
+            return
+
+        end = len(MAGIC)
+        for end, _ in self._records():
+            pass
+        if os.path.getsize(path) > end:
+            with open(path, "r+b") as f:
+                f.truncate(end)
+
+    def append(self, start: int, count: int, batch: Any, errors: List[Tuple[int, str]],
+               aggregates: Optional[Dict[str, Any]] = None):
+        """
+        Appends the results of a completed chunk of trials and flushes them to disk.
+
+        Args:
+            start (int): The index of the first trial of the chunk.
+            count (int): The number of trials in the chunk.
+            batch (Any): The packed results of the chunk.
+            errors (List[Tuple[int, str]]): The index and message of every failed trial.
+            aggregates (Dict[str, Aggregator], optional): The aggregates of the chunk's results.
+        """
+        payload = pickle.dumps({"start": start, "count": count, "batch": batch, "errors": errors,
+                                "aggregates": aggregates},
+                               protocol=pickle.HIGHEST_PROTOCOL)
+        with open(self.path, "ab") as f:
+            f.write(LENGTH.pack(len(payload)) + payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def completed(self) -> Set[int]:
+        """
+        Collects the indices of every trial recorded without an error.
+
+        Trials that failed are left out, so a resumed run retries them. A retried trial is recorded
+        again in a later chunk, and counts as completed once it succeeds.
+
+        Returns:
+            Set[int]: The completed trial indices.
+        """
+        completed = set()
+        for _, record in self._records():
+            failed = {trial for trial, _ in record["errors"]}
+            completed.update(trial for trial in range(record["start"], record["start"] + record["count"])
+                             if trial not in failed)
+        return completed
+
+    def aggregates(self) -> Iterator[Dict[str, Any]]:
+        """
+        Reads the recorded aggregates of every chunk, so a resumed run can merge them.
+
+        Yields:
+            Dict[str, Aggregator]: The aggregates of each chunk that recorded some.
+        """
+        for _, record in self._records():
+            if record.get("aggregates"):
+                yield record["aggregates"]
+
+    def batches(self) -> Iterator[Any]:
+        """
+        Reads the recorded result batches one at a time.
+
+        Yields:
+            Any: Each packed batch, in the order it was written.
+        """
+        for _, record in self._records():
+            yield record["batch"]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Builds a DataFrame from the recorded results, converting one batch at a time.
+
+        Returns:
+            pd.DataFrame: A DataFrame of all recorded results.
+        """
+        frames = [pd.DataFrame(batch) for batch in self.batches() if len(batch)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _records(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Yields each complete record along with the file offset at which it ends.
+        """
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Invalid result file: {self.path} was not written by a ResultSink.")
+            while True:
+                header = f.read(LENGTH.size)
+                if len(header) < LENGTH.size:
+                    return
+                payload = f.read(LENGTH.unpack(header)[0])
+                if len(payload) < LENGTH.unpack(header)[0]:
+                    return
+                yield f.tell(), pickle.loads(payload)
@@ -0,0 +1,121 @@
+from array import array
+from typing import List, Tuple
+
+import numpy as np
+
+
+class SymmetryOracle:
+    """
+    Maps permutation chains to representatives of classes that share their trajectory under the derivative.
+
+    Two invariances of D(chain)_i = p_(i+1)^-1 ∘ p_i (indices taken cyclically) are used:
+
+    - Cyclically shifting the positions of the chain shifts its derivative the same way, so D commutes
+      with cyclic shifts.
+    - Conjugating every row by the same permutation τ conjugates every derivative row by τ, so D
+      commutes with simultaneous conjugation. A column permutation p_i -> p_i ∘ τ of the chain turns
+      its derivative into the conjugate τ^-1 ∘ D(chain)_i ∘ τ, so after the first step, column
+      permutations of a chain only change its trajectory by a conjugation.
+
+    Chains related by these maps therefore have trajectories of the same preperiod and period. The
+    representative is always a shifted conjugate of its chain, so equal representatives are always
+    correct to share; it is chosen canonically enough that related chains usually agree. Rows are
+    relabeled by a breadth-first walk from a start point, and the candidate starts and shifts are
+    first narrowed down by invariants (row cycle types, and the cycle lengths of the start point).
+    """
+
+    @staticmethod
+    def representative(values: array, n: int) -> array:
+        """
+        Computes the representative of a packed chain under cyclic shifts and simultaneous conjugation.
+
+        Args:
+            values (array): The chain's rows concatenated into one buffer of length m * n.
+            n (int): The size of each permutation.
+
+        Returns:
+            array: The representative's rows in a buffer of the same type.
+        """
+        m = len(values) // n
+        if m == 0 or n <= 1:
+            return values[:]
+        rows = [values[i:i + n] for i in range(0, len(values), n)]
+        lengths = [SymmetryOracle._cycle_lengths(row) for row in rows]
+        types = [tuple(sorted(row_lengths)) for row_lengths in lengths]
+
+        shifted_types = [types[s:] + types[:s] for s in range(m)]
+        best_types = min(shifted_types)
+        shifts = [s for s in range(m) if shifted_types[s] == best_types]
+
+        starts: List[Tuple[int, int]] = []
+        best_key = None
+        for s in shifts:
+            for x in range(n):
+                key = tuple(lengths[(s + k) % m][x] for k in range(m))
+                if best_key is None or key < best_key:
+                    best_key, starts = key, [(s, x)]
+                elif key == best_key:
+                    starts.append((s, x))
+
+        generators = np.frombuffer(values, dtype=np.dtype(values.typecode)).reshape(m, n).astype(np.intp)
+        best = None
+        for s, x in starts:
+            shifted = np.roll(generators, -s, axis=0)
+            labels = SymmetryOracle._labels(shifted, x)
+            relabeled = np.empty_like(shifted)
+            relabeled[:, labels] = labels[shifted]
+            candidate = relabeled.astype(np.dtype(values.typecode)).tobytes()
+            if best is None or candidate < best:
+                best = candidate
+
+        representative = array(values.typecode)
+        representative.frombytes(best)
+        return representative
+
+    @staticmethod
+    def _cycle_lengths(row: array) -> List[int]:
+        """
+        Returns the length of the cycle through every point of a permutation.
+        """
+        lengths = [0] * len(row)
+        for start in range(len(row)):
+            if lengths[start]:
+                continue
+            cycle = [start]
+            point = row[start]
+            while point != start:
+                cycle.append(point)
+                point = row[point]
+            for point in cycle:
+                lengths[point] = len(cycle)
+        return lengths
+
+    @staticmethod
+    def _labels(generators: np.ndarray, start: int) -> np.ndarray:
+        """
+        Labels points in the order a breadth-first walk from `start` reaches them, following the rows
+        in order. Points outside the orbit of `start` continue from the smallest unlabeled point.
+        """
+        m, n = generators.shape
+        images = generators.T.tolist()
+        labels = [-1] * n
+        labels[start] = 0
+        queue = [start]
+        count = 1
+        head = 0
+        unlabeled = 0
+        while count < n or head < len(queue):
+            if head == len(queue):
+                while labels[unlabeled] != -1:
+                    unlabeled += 1
+                labels[unlabeled] = count
+                count += 1
+                queue.append(unlabeled)
+            point = queue[head]
+            head += 1
+            for image in images[point]:
+                if labels[image] == -1:
+                    labels[image] = count
+                    count += 1
+                    queue.append(image)
+        return np.array(labels, dtype=np.intp)
@@ -0,0 +1,97 @@
+import pickle
+import random
+import statistics
+import unittest
+
+from aggregator import Aggregator, GroupBy, Histogram, Statistics, UnionFind
+
+
+class TestAggregator(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.results = [{"order": rng.choice([2, 4, 30]), "reduced": rng.choice([2, 4, 30]), "value": rng.random()}
+                        for _ in range(300)]
+
+    def split(self, aggregator):
+        """Aggregates the results in three parts through pickled copies and merges them."""
+        parts = [aggregator.empty() for _ in range(3)]
+        for i, result in enumerate(self.results):
+            parts[i % 3].add(result)
+        merged = aggregator.empty()
+        for part in parts:
+            merged.merge(pickle.loads(pickle.dumps(part)))
+        return merged
+
+    def whole(self, aggregator):
+        aggregator = aggregator.empty()
+        for result in self.results:
+            aggregator.add(result)
+        return aggregator
+
+    def test_histogram(self):
+        """Test that histograms count every value and merge by adding counts."""
+        expected = {}
+        for result in self.results:
+            expected[result["order"]] = expected.get(result["order"], 0) + 1
+        self.assertEqual(self.whole(Histogram("order")).result(), dict(sorted(expected.items())))
+        self.assertEqual(self.split(Histogram("order")).result(), self.whole(Histogram("order")).result())
+        pairs = self.whole(Histogram(("order", "reduced"))).result()
+        self.assertEqual(sum(pairs.values()), len(self.results))
+
+    def test_statistics(self):
+        """Test that online statistics match the exact ones, whole and merged."""
+        values = [result["value"] for result in self.results]
+        for aggregate in (self.whole(Statistics("value")), self.split(Statistics("value"))):
+            result = aggregate.result()
+            self.assertEqual(result["count"], len(values))
+            self.assertAlmostEqual(result["mean"], statistics.mean(values))
+            self.assertAlmostEqual(result["std"], statistics.stdev(values))
+            self.assertEqual((result["min"], result["max"]), (min(values), max(values)))
+
+    def test_group_by(self):
+        """Test that groups aggregate their own results and merge group by group."""
+        aggregator = GroupBy("order", Histogram("reduced"))
+        whole = self.whole(aggregator).result()
+        self.assertEqual(self.split(aggregator).result(), whole)
+        for order, counts in whole.items():
+            self.assertEqual(sum(counts.values()), sum(result["order"] == order for result in self.results))
+
+    def test_group_by_merge_copies_groups(self):
+        """Test that merging adds the other aggregator's groups as copies rather than sharing them."""
+        other = GroupBy("order", Histogram("reduced"))
+        other.add({"order": 2, "reduced": 4})
+        merged = GroupBy("order", Histogram("reduced")).merge(other)
+        merged.add({"order": 2, "reduced": 4})
+        self.assertEqual(other.result(), {2: {4: 1}})
+        self.assertEqual(merged.result(), {2: {4: 2}})
+
+    def test_check(self):
+        """Test that results an aggregator cannot add are rejected without changing it."""
+        aggregator = GroupBy("order", Statistics("value"))
+        aggregator.check({"order": 2, "value": 0.5})
+        for result in ({"value": 0.5}, {"order": 2}, {"order": 2, "value": "x"}, {"order": [2], "value": 0.5}):
+            with self.assertRaises((KeyError, TypeError)):
+                aggregator.check(result)
+        self.assertEqual(aggregator.result(), {})
+
+    def test_abstract_base(self):
+        """Test that the base class cannot be instantiated."""
+        with self.assertRaises(TypeError):
+            Aggregator("order")
+
+    def test_union_find(self):
+        """Test that classes join values seen together, also across merged parts."""
+        results = [{"a": 1, "b": 2}, {"a": 3, "b": 4}, {"a": 5, "b": 5}, {"a": 2, "b": 3}]
+        parts = [UnionFind(("a", "b")) for _ in results]
+        for part, result in zip(parts, results):
+            part.add(result)
+        merged = UnionFind(("a", "b"))
+        for part in parts:
+            merged.merge(part)
+        self.assertEqual(sorted(map(sorted, merged.result())), [[1, 2, 3, 4], [5]])
+        self.assertEqual(merged.find(1), merged.find(4))
+
+
+if __name__ == "__main__":
+    unittest.main()
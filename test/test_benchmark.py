@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from benchmark import Benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_run(self):
+        """Test that each case reports its throughput and peak memory."""
+        benchmark = Benchmark(repeat=2, min_time=0.001)
+        benchmark.add("sum", lambda: list(range(100)), sum)
+        benchmark.add("copy", lambda: list(range(1000)), list)
+        results = benchmark.run(match="copy")
+        self.assertEqual(list(results), ["copy"])
+        self.assertGreater(results["copy"]["ops_per_sec"], 0)
+        self.assertGreater(results["copy"]["peak_bytes"], 0)
+
+    def test_duplicate_case(self):
+        """Test that registering a case twice raises a ValueError."""
+        benchmark = Benchmark()
+        benchmark.add("sum", lambda: [], sum)
+        with self.assertRaises(ValueError):
+            benchmark.add("sum", lambda: [], sum)
+
+    def test_compare(self):
+        """Test that only slowdowns and memory growth beyond the threshold are flagged."""
+        baseline = {"a": {"ops_per_sec": 100.0, "peak_bytes": 10000.0},
+                    "b": {"ops_per_sec": 100.0, "peak_bytes": 10000.0},
+                    "c": {"ops_per_sec": 100.0, "peak_bytes": 10000.0}}
+        results = {"a": {"ops_per_sec": 90.0, "peak_bytes": 11000.0},
+                   "b": {"ops_per_sec": 50.0, "peak_bytes": 10000.0},
+                   "c": {"ops_per_sec": 200.0, "peak_bytes": 50000.0},
+                   "d": {"ops_per_sec": 1.0, "peak_bytes": 1.0}}
+        regressions = Benchmark.compare(results, baseline, threshold=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("b:"))
+        self.assertTrue(regressions[1].startswith("c:"))
+
+    def test_save_and_load(self):
+        """Test that baselines round-trip through JSON."""
+        results = {"a": {"ops_per_sec": 1.5, "peak_bytes": 2.0}}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baselines", "core.json")
+            Benchmark.save(results, path)
+            self.assertEqual(Benchmark.load(path), results)
+
+    def test_core(self):
+        """Test that the core benchmark covers the core operations."""
+        benchmark = Benchmark.core(sizes=(4,), experiment_trials=0)
+        names = set(benchmark.cases)
+        for name in ("Permutation.inverse[n=4]", "DifferenceOperator.order[n=4]", "LatinSquare.reduce[n=4]",
+                     "Transformation.rotate[n=4]"):
+            self.assertIn(name, names)
+        benchmark.min_time = 0.001
+        results = benchmark.run(match="Transformation")
+        self.assertEqual(len(results), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
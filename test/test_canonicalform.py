@@ -0,0 +1,56 @@
+import random
+import unittest
+
+from canonicalform import CanonicalForm
+from jacobsonmatthews import JacobsonMatthews
+from latinsquare import LatinSquare
+from latinsquareenumerator import LatinSquareEnumerator
+from permutation import Permutation
+from transformation import Transformation
+
+
+def random_isotope(square: LatinSquare) -> LatinSquare:
+    """Applies random row, column and symbol permutations to a Latin square."""
+    n = len(square)
+    rows, columns, symbols = (random.sample(range(n), n) for _ in range(3))
+    permuted = Transformation.permute_rows(Transformation.permute_columns(square, Permutation(columns)), Permutation(rows))
+    return LatinSquare([Permutation([symbols[s] for s in row.values]) for row in permuted])
+
+
+class TestCanonicalForm(unittest.TestCase):
+
+    def test_isotopy_class_counts(self):
+        """Test that the number of isotopy classes matches the known counts."""
+        for n, count in {1: 1, 2: 1, 3: 1, 4: 2, 5: 2}.items():
+            self.assertEqual(len(CanonicalForm.deduplicate(LatinSquareEnumerator(n))), count)
+
+    def test_main_class_counts(self):
+        """Test that conjugates are merged into main classes."""
+        squares = list(LatinSquareEnumerator(5))
+        self.assertEqual(len(CanonicalForm.deduplicate(squares, conjugates=True)), 2)
+
+    def test_isotopy_is_invariant(self):
+        """Test that isotopic squares share their canonical form."""
+        sampler = JacobsonMatthews(7, seed=0)
+        for _ in range(5):
+            square = sampler.sample()
+            canonical = CanonicalForm.isotopy(square)
+            self.assertEqual(CanonicalForm.isotopy(random_isotope(square)), canonical)
+            self.assertEqual(LatinSquare.reduce(canonical), canonical)
+
+    def test_paratopy_is_invariant_under_transpose(self):
+        """Test that a square and its transpose share their canonical form under paratopy."""
+        square = JacobsonMatthews(6, seed=1).sample()
+        transposed = LatinSquare(Transformation.transpose(square).permutations)
+        self.assertEqual(CanonicalForm.paratopy(transposed), CanonicalForm.paratopy(square))
+
+    def test_invariant(self):
+        """Test that the cheap invariant is preserved by isotopy and counts intercalates."""
+        square = JacobsonMatthews(6, seed=2).sample()
+        self.assertEqual(CanonicalForm.invariant(random_isotope(square)), CanonicalForm.invariant(square))
+        klein = LatinSquare([Permutation([i ^ j for j in range(4)]) for i in range(4)])
+        self.assertEqual(CanonicalForm.invariant(klein)[1], 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+from corpus import Corpus, HEADER, MAGIC
+from jacobsonmatthews import JacobsonMatthews
+
+
+class TestCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "squares.lsc")
+        sampler = JacobsonMatthews(5, seed=1)
+        self.squares = np.stack([sampler.sample().to_numpy() for _ in range(50)])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_append_and_read(self):
+        """Test that appended squares are read back as a memory-mapped (B, n, n) array of packed symbols."""
+        corpus = Corpus(self.path, n=5)
+        self.assertEqual(corpus.append(self.squares, dedupe=False), 50)
+        view = Corpus(self.path).squares()
+        self.assertIsInstance(view, np.memmap)
+        self.assertEqual(view.shape, (50, 5, 5))
+        self.assertEqual(view.dtype, np.uint8)
+        np.testing.assert_array_equal(view, self.squares)
+        self.assertEqual(os.path.getsize(self.path), len(MAGIC) + HEADER.size + 50 * 25)
+        self.assertEqual(corpus.square(7).to_array(), self.squares[7].tolist())
+
+    def test_dedupe_and_membership(self):
+        """Test that duplicates are skipped and the index finds every square, also after reopening."""
+        corpus = Corpus(self.path, n=5)
+        unique = len(np.unique(self.squares.reshape(50, -1), axis=0))
+        self.assertEqual(corpus.append(np.concatenate([self.squares, self.squares])), unique)
+        self.assertEqual(corpus.append(self.squares[:10]), 0)
+        reopened = Corpus(self.path)
+        self.assertEqual(len(reopened), unique)
+        for square in self.squares:
+            index = reopened.find(square)
+            np.testing.assert_array_equal(reopened.squares()[index], square)
+        cyclic = (np.arange(5)[:, None] + np.arange(5)) % 5
+        self.assertEqual(cyclic in reopened, any((cyclic == square).all() for square in self.squares))
+
+    def test_recovers_from_partial_writes(self):
+        """Test that a partial record is dropped and a missing index is rebuilt."""
+        corpus = Corpus(self.path, n=5)
+        corpus.append(self.squares[:20])
+        with open(self.path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+        os.remove(self.path + ".index")
+        recovered = Corpus(self.path)
+        self.assertEqual(len(recovered), 20)
+        self.assertEqual(recovered.find(self.squares[5]), 5)
+        recovered.append(self.squares[20:30])
+        np.testing.assert_array_equal(Corpus(self.path).squares(), self.squares[:30])
+
+    def test_other_process_appends_are_seen(self):
+        """Test that a corpus picks up squares appended through another handle."""
+        first = Corpus(self.path, n=5)
+        Corpus(self.path).append(self.squares[:5])
+        self.assertEqual(len(first.squares()), 5)
+        self.assertIn(self.squares[3], first)
+
+    def test_reader_waits_for_a_writer_index(self):
+        """Test that a reader does not rebuild the index while a writer holds the lock between its two writes."""
+        writer = Corpus(self.path, n=5)
+        writer.append(self.squares[:5], dedupe=False)
+        reader = Corpus(self.path)
+        with writer._lock():
+            with open(self.path, "ab") as f:
+                f.write(self.squares[5:10].astype(np.uint8).tobytes())
+            thread = threading.Thread(target=reader.squares)
+            thread.start()
+            thread.join(0.2)
+            self.assertTrue(thread.is_alive())
+            with open(self.path + ".index", "ab") as f:
+                f.write(writer._hash(self.squares[5:10]).tobytes())
+        thread.join()
+        self.assertEqual(os.path.getsize(self.path + ".index"), 10 * 8)
+        self.assertEqual(len(reader), 10)
+        self.assertEqual(reader.append(self.squares[:10]), 0)
+
+    def test_invalid_input(self):
+        """Test that invalid files, sizes and squares raise a ValueError."""
+        with self.assertRaises(ValueError):
+            Corpus(self.path)
+        corpus = Corpus(self.path, n=5)
+        with self.assertRaises(ValueError):
+            Corpus(self.path, n=6)
+        with self.assertRaises(ValueError):
+            corpus.append(np.zeros((1, 5, 5), dtype=np.int64))
+        with self.assertRaises(ValueError):
+            corpus.append(np.zeros((1, 4, 4), dtype=np.int64))
+        wrapped = self.squares[:1].astype(np.int64)
+        wrapped[wrapped == 0] = 256  # Would wrap back to a valid square in the corpus type
+        with self.assertRaises(ValueError):
+            corpus.append(wrapped)
+        other = os.path.join(self.directory.name, "other")
+        with open(other, "wb") as f:
+            f.write(b"not a corpus")
+        with self.assertRaises(ValueError):
+            Corpus(other)
+
+
+if __name__ == "__main__":
+    unittest.main()
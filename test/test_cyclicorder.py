@@ -0,0 +1,80 @@
+import random
+import time
+import unittest
+
+from cyclicorder import CyclicOrder, _factorize
+from differenceoperator import DifferenceOperator
+from permutation import Permutation
+from permutationchain import PermutationChain
+
+
+def power(perm: Permutation, exponent: int) -> Permutation:
+    result = list(range(len(perm)))
+    for _ in range(exponent):
+        result = [perm.values[i] for i in result]
+    return Permutation(result)
+
+
+class TestCyclicOrder(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        """Test that the algebraic trajectory agrees with simulation on random power chains."""
+        rng = random.Random(12)
+        for _ in range(60):
+            n = rng.randint(1, 8)
+            values = list(range(n))
+            rng.shuffle(values)
+            generator = Permutation(values)
+            k = CyclicOrder.permutation_order(generator)
+            chain = PermutationChain([power(generator, rng.randrange(k)) for _ in range(rng.randint(1, 6))])
+            self.assertEqual(DifferenceOperator.trajectory(chain, "algebraic", generator=generator),
+                             DifferenceOperator.trajectory(chain, "seen"))
+
+    def test_exponents(self):
+        """Test recovering exponents and rejecting chains that are not powers of the generator."""
+        generator = Permutation([1, 2, 3, 0])
+        chain = PermutationChain([power(generator, 3), power(generator, 0), power(generator, 2)])
+        self.assertEqual(CyclicOrder.exponents(chain, generator), [3, 0, 2])
+        self.assertIsNone(CyclicOrder.exponents(PermutationChain([Permutation([1, 0, 2, 3])]), generator))
+
+    def test_find_generator(self):
+        """Test that a generating row is found for cyclic chains and None otherwise."""
+        chain = PermutationChain([Permutation([0, 1, 2]), Permutation([1, 2, 0])])
+        self.assertIsNotNone(CyclicOrder.exponents(chain, CyclicOrder.find_generator(chain)))
+        chain = PermutationChain([Permutation([1, 0, 2]), Permutation([0, 2, 1])])
+        self.assertIsNone(CyclicOrder.find_generator(chain))
+
+    def test_algebraic_rejects_non_cyclic(self):
+        """Test that the algebraic method raises and the auto method falls back."""
+        chain = PermutationChain([Permutation([1, 0, 2]), Permutation([0, 2, 1])])
+        with self.assertRaises(ValueError):
+            DifferenceOperator.trajectory(chain, "algebraic")
+        self.assertEqual(DifferenceOperator.trajectory(chain, "auto"), DifferenceOperator.trajectory(chain, "seen"))
+
+    def test_cyclic_latin_square(self):
+        """Test the order of the cyclic Latin square of size 7."""
+        shift = Permutation([(i + 1) % 7 for i in range(7)])
+        chain = PermutationChain([power(shift, i) for i in range(7)])
+        self.assertEqual(DifferenceOperator.order(chain, "auto"), DifferenceOperator.order(chain, "seen"))
+
+    def test_large_chain(self):
+        """Test that large cyclic chains are solved quickly."""
+        n = 300
+        shift = Permutation([(i + 1) % n for i in range(n)])
+        rng = random.Random(3)
+        shifts = [rng.randrange(n) for _ in range(50)]
+        chain = PermutationChain([Permutation([(i + r) % n for i in range(n)]) for r in shifts])
+        start = time.perf_counter()
+        preperiod, period = DifferenceOperator.trajectory(chain, "algebraic", generator=shift)
+        self.assertLess(time.perf_counter() - start, 10)
+        self.assertGreaterEqual(preperiod, 0)
+        self.assertGreaterEqual(period, 1)
+
+    def test_factorize(self):
+        """Test integer factorization."""
+        self.assertEqual(_factorize(2 ** 10 * 3 ** 4 * 1000003), {2: 10, 3: 4, 1000003: 1})
+        self.assertEqual(_factorize(1), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,12 @@
 import unittest
 
+import numpy as np
+
 from differenceoperator import DifferenceOperator
 from permutation import Permutation
 from permutationchain import PermutationChain
+from latinsquare import LatinSquare
+from ordercache import OrderCache
 
 
 class TestDifferenceOperator(unittest.TestCase):
@@ -50,5 +54,109 @@ class TestDifferenceOperator(unittest.TestCase):
         empty_chain = PermutationChain([])
         self.assertEqual(DifferenceOperator.order(empty_chain), -1)
 
+    def test_derivative_into(self):
+        """Test that the fused kernel writes the derivative into the given buffer."""
+        chain = LatinSquare.generate_random(5)
+        source = chain.to_buffer()
+        target = source[:]
+        DifferenceOperator.derivative_into(source, target, source[:5], 5)
+        self.assertEqual(PermutationChain._from_buffer(target, 5), DifferenceOperator.derivative(chain))
+        self.assertEqual(source, chain.to_buffer())  # Source left untouched
+
+    def test_difference_into(self):
+        """Test that the fused difference writes p2^-1 ∘ p1 into the given buffer."""
+        p1 = Permutation([2, 0, 1])
+        p2 = Permutation([1, 2, 0])
+        out = p1._values[:]
+        DifferenceOperator.difference_into(p1._values, p2._values, out, p1._values[:])
+        self.assertEqual(tuple(out), p2.inverse().apply(p1).to_tuple())
+
+    def test_order_methods_agree(self):
+        """Test that every cycle detection method computes the same order."""
+        for _ in range(20):
+            chain = LatinSquare.generate_random(5)
+            expected = DifferenceOperator.order(chain)
+            self.assertEqual(DifferenceOperator.order(chain, "brent"), expected)
+            self.assertEqual(DifferenceOperator.order(chain, "floyd"), expected)
+
+    def test_order_invalid_method(self):
+        """Test that an unknown cycle detection method raises a ValueError."""
+        chain = PermutationChain([Permutation([0, 1, 2]), Permutation([2, 0, 1])])
+        with self.assertRaises(ValueError):
+            DifferenceOperator.order(chain, "hash")
+
+    def test_trajectory(self):
+        """Test that a chain reaching the identity reports the steps taken and period 1."""
+        p1 = Permutation([0, 1, 2])
+        p2 = Permutation([2, 0, 1])
+        p3 = Permutation([1, 2, 0])
+        chain = PermutationChain([p1, p2, p3])
+        for method in ("seen", "brent", "floyd"):
+            self.assertEqual(DifferenceOperator.trajectory(chain, method), (2, 1))
+
+    def test_trajectory_methods_agree(self):
+        """Test that every cycle detection method computes the same preperiod and period."""
+        for _ in range(20):
+            chain = LatinSquare.generate_random(5)
+            expected = DifferenceOperator.trajectory(chain, "seen")
+            self.assertEqual(DifferenceOperator.trajectory(chain, "brent"), expected)
+            self.assertEqual(DifferenceOperator.trajectory(chain, "floyd"), expected)
+
+    def test_trajectory_identity(self):
+        """Test that the identity chain has preperiod 0 and period 1."""
+        identity_chain = PermutationChain([Permutation([0, 1, 2]) for _ in range(3)])
+        self.assertEqual(DifferenceOperator.trajectory(identity_chain), (0, 1))
+
+    def test_order_with_cache(self):
+        """Test that a shared cache does not change any order and short-circuits later chains."""
+        cache = OrderCache()
+        chains = [LatinSquare.generate_random(5) for _ in range(20)]
+        for chain in chains:
+            self.assertEqual(DifferenceOperator.order(chain, cache=cache), DifferenceOperator.order(chain))
+        for chain in chains:
+            self.assertIn(OrderCache.key(5, chain.to_buffer().tobytes()), cache)
+
+    def test_trajectory_resumes_from_cached_state(self):
+        """Test that trajectories reaching a cached state, on or off the cycle, are exact."""
+        for _ in range(3):
+            chain = LatinSquare.generate_random(5)
+            expected = DifferenceOperator.trajectory(chain, "seen")
+            for skip in range(1, expected[0] + expected[1] + 1):
+                cache = OrderCache()
+                later = chain
+                for _ in range(skip):
+                    later = DifferenceOperator.derivative(later)
+                DifferenceOperator.trajectory(later, "seen", cache)
+                self.assertEqual(DifferenceOperator.trajectory(chain, "seen", cache), expected)
+
+    def test_constant_memory_methods_use_cache(self):
+        """Test that Brent and Floyd look up and record the starting chain."""
+        cache = OrderCache()
+        chain = LatinSquare.generate_random(5)
+        expected = DifferenceOperator.trajectory(chain, "brent", cache)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(DifferenceOperator.trajectory(chain, "floyd", cache), expected)
+
+    def test_batch_derivative(self):
+        """Test that the batched derivative matches the derivative of each chain."""
+        chains = [LatinSquare.generate_random(5) for _ in range(10)]
+        batch = np.stack([chain.to_numpy() for chain in chains])
+        derivatives = DifferenceOperator.batch_derivative(batch)
+        for chain, derivative in zip(chains, derivatives):
+            self.assertEqual(derivative.tolist(), DifferenceOperator.derivative(chain).to_array())
+
+    def test_batch_order(self):
+        """Test that batched orders match the order of each chain computed one at a time."""
+        chains = [LatinSquare.generate_random(5) for _ in range(50)]
+        chains.append(PermutationChain([Permutation([0, 1, 2, 3, 4]) for _ in range(5)]))
+        batch = np.stack([chain.to_numpy() for chain in chains])
+        orders = DifferenceOperator.batch_order(batch)
+        self.assertEqual(orders.tolist(), [DifferenceOperator.order(chain) for chain in chains])
+
+    def test_batch_order_empty_chains(self):
+        """Test that a batch of empty chains returns -1 for every order."""
+        orders = DifferenceOperator.batch_order(np.zeros((3, 0, 4), dtype=np.int64))
+        self.assertEqual(orders.tolist(), [-1, -1, -1])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,192 @@
+import os
+import random
+import tempfile
+import unittest
+from typing import Any, Dict
+
+import numpy as np
+
+from aggregator import Histogram, Statistics
+from corpus import Corpus
+from differenceoperator import DifferenceOperator
+from experiment import Experiment
+from jacobsonmatthews import JacobsonMatthews
+from latinsquare import LatinSquare
+
+
+def draw(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the trial index with a random draw, failing on the trials listed in the parameters."""
+    if params["trial"] in params.get("fail", ()):
+        raise ValueError("planned failure")
+    return {"trial": params["trial"], "value": random.random()}
+
+
+def order(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the order of a random Latin square of size 5."""
+    return {"trial": params["trial"], "order": DifferenceOperator.order(LatinSquare.generate_random(5))}
+
+
+def corpus_square(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the square a trial received from the corpus."""
+    return {"trial": params["trial"], "square": params["square"].to_array()}
+
+
+class TestExperiment(unittest.TestCase):
+
+    def test_run_collects_every_trial(self):
+        """Test that chunked runs return one result per trial."""
+        experiment = Experiment("test", draw)
+        experiment.run({}, num_trials=23, num_workers=2, chunk_size=5)
+        self.assertEqual(sorted(result["trial"] for result in experiment.results), list(range(23)))
+
+    def test_seed_is_deterministic(self):
+        """Test that seeded runs produce the same results regardless of scheduling."""
+        first = Experiment("test", draw)
+        first.run({}, num_trials=12, num_workers=2, chunk_size=3, seed=7)
+        second = Experiment("test", draw)
+        second.run({}, num_trials=12, num_workers=3, chunk_size=3, seed=7)
+        key = lambda result: result["trial"]
+        self.assertEqual(sorted(first.results, key=key), sorted(second.results, key=key))
+
+    def test_seed_ignores_chunk_size(self):
+        """Test that seeded runs produce the same results however the trials are chunked."""
+        first = Experiment("test", draw)
+        first.run({}, num_trials=12, num_workers=2, chunk_size=1, seed=5)
+        second = Experiment("test", draw)
+        second.run({}, num_trials=12, num_workers=2, chunk_size=5, seed=5)
+        key = lambda result: result["trial"]
+        self.assertEqual(sorted(first.results, key=key), sorted(second.results, key=key))
+
+    def test_invalid_chunk_size(self):
+        """Test that chunk sizes that are not positive are rejected."""
+        for chunk_size in (0, -1):
+            with self.assertRaises(ValueError):
+                Experiment("test", draw).run({}, num_trials=4, chunk_size=chunk_size)
+
+    def test_failed_trials_are_skipped(self):
+        """Test that a failing trial does not discard the rest of its chunk."""
+        experiment = Experiment("test", draw)
+        experiment.run({"fail": (2, 3)}, num_trials=8, num_workers=2, chunk_size=4)
+        self.assertEqual(sorted(result["trial"] for result in experiment.results), [0, 1, 4, 5, 6, 7])
+
+    def test_results_file_resumes(self):
+        """Test that a run streamed to a results file skips the trials already recorded there."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.bin")
+            first = Experiment("test", draw, results_path=path)
+            first.run({}, num_trials=6, num_workers=2, chunk_size=2)
+            self.assertEqual(first.results, [])
+
+            resumed = Experiment("test", draw, results_path=path)
+            resumed.run({}, num_trials=10, num_workers=2, chunk_size=2)
+            trials = [result["trial"] for result in resumed.iter_results()]
+            self.assertEqual(sorted(trials), list(range(10)))
+            self.assertEqual(len(resumed.analyze_results()), 10)
+
+    def test_resumed_run_matches_uninterrupted_run(self):
+        """Test that a seeded run resumed with other chunks, retrying failed trials, draws the same values."""
+        uninterrupted = Experiment("test", draw)
+        uninterrupted.run({}, num_trials=10, num_workers=2, chunk_size=4, seed=3)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.bin")
+            resumed = Experiment("test", draw, results_path=path)
+            resumed.run({"fail": (1, 4)}, num_trials=6, num_workers=2, chunk_size=4, seed=3)
+            self.assertEqual(sorted(result["trial"] for result in resumed.iter_results()), [0, 2, 3, 5])
+            resumed.run({}, num_trials=10, num_workers=2, chunk_size=3, seed=3)
+            key = lambda result: result["trial"]
+            self.assertEqual(sorted(resumed.iter_results(), key=key), sorted(uninterrupted.results, key=key))
+
+    def test_instrumented_run(self):
+        """Test that instrumented runs add metric columns and collect a profile per worker."""
+        experiment = Experiment("test", order)
+        experiment.run({}, num_trials=6, num_workers=2, chunk_size=3, instrument=True)
+        for result in experiment.results:
+            self.assertIn("time_trial", result)
+            self.assertIn("time_trajectory", result)
+            self.assertGreaterEqual(result["derivative_steps"], sum(result["preperiod"]))
+        self.assertGreaterEqual(len(experiment.profiles), 1)
+        self.assertEqual(sum(profile["trials"] for profile in experiment.profiles.values()), 6)
+
+        experiment = Experiment("test", draw)
+        experiment.run({"fail": (1, 2)}, num_trials=6, num_workers=2, chunk_size=3, instrument=True)
+        self.assertEqual(sum(profile["trials"] for profile in experiment.profiles.values()), 4)
+
+        experiment.run({}, num_trials=2, num_workers=1)
+        self.assertNotIn("time_trial", experiment.results[0])
+        self.assertEqual(experiment.profiles, {})
+
+    def test_distributed_run(self):
+        """Test that a distributed run matches a local run with the same seed."""
+        local = Experiment("test", draw)
+        local.run({}, num_trials=10, num_workers=2, chunk_size=3, seed=11)
+        with tempfile.TemporaryDirectory() as directory:
+            distributed = Experiment("test", draw, aggregators={"trials": Histogram("trial")})
+            distributed.run_distributed(os.path.join(directory, "queue"), {}, num_trials=10, chunk_size=3, seed=11,
+                                        local_workers=2, poll_interval=0.05)
+        key = lambda result: result["trial"]
+        self.assertEqual(sorted(distributed.results, key=key), sorted(local.results, key=key))
+        self.assertEqual(distributed.aggregates["trials"].result(), {trial: 1 for trial in range(10)})
+
+    def test_distributed_chunk_failure(self):
+        """Test that chunks failing as a whole are reported as failed trials instead of stalling the run."""
+        with tempfile.TemporaryDirectory() as directory:
+            experiment = Experiment("test", draw)
+            experiment.run_distributed(os.path.join(directory, "queue"), {"corpus": os.path.join(directory, "missing")},
+                                       num_trials=4, chunk_size=2, local_workers=1, poll_interval=0.05)
+        self.assertEqual(experiment.results, [])
+
+    def test_worker_exits_without_job(self):
+        """Test that an idle worker can exit when no job is running."""
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(Experiment("test", draw).work(directory, exit_when_idle=True), 0)
+
+    def test_corpus_input(self):
+        """Test that trials read their squares from a corpus, and that short corpora are rejected."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "squares.lsc")
+            corpus = Corpus(path, n=4)
+            corpus.append(np.stack([JacobsonMatthews(4, seed=seed).sample().to_numpy() for seed in range(20)]))
+            experiment = Experiment("test", corpus_square)
+            experiment.run({}, num_trials=len(corpus), num_workers=2, chunk_size=3, corpus=path)
+            for result in experiment.results:
+                self.assertEqual(result["square"], corpus.squares()[result["trial"]].tolist())
+            with self.assertRaises(ValueError):
+                experiment.run({}, num_trials=len(corpus) + 1, corpus=path)
+
+    def test_aggregators(self):
+        """Test that chunk aggregates are merged, without keeping results, and restored on resume."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.bin")
+            experiment = Experiment("test", draw, results_path=path, keep_results=False,
+                                    aggregators={"trials": Statistics("trial"), "draws": Histogram("trial")})
+            experiment.run({"fail": [3]}, num_trials=10, num_workers=2, chunk_size=3)
+            self.assertEqual(experiment.aggregates["trials"].result()["count"], 9)
+            self.assertEqual(sorted(experiment.aggregates["draws"].result()), [t for t in range(10) if t != 3])
+            self.assertEqual(list(experiment.iter_results()), [])
+
+            experiment.run({}, num_trials=16, num_workers=2, chunk_size=3)
+            self.assertEqual(experiment.aggregates["trials"].result()["count"], 16)
+            self.assertEqual(experiment.aggregates["trials"].result()["max"], 15)
+
+    def test_rejected_results_are_not_aggregated(self):
+        """Test that a result one aggregator cannot take is reported as an error and added to no aggregator."""
+        experiment = Experiment("test", draw, aggregators={"trials": Histogram("trial"), "missing": Histogram("other")})
+        experiment.run({}, num_trials=4, num_workers=1, chunk_size=2)
+        self.assertEqual(experiment.results, [])
+        self.assertEqual(experiment.aggregates["trials"].result(), {})
+
+    def test_chunks(self):
+        """Test that pending trials are split into runs of consecutive trials."""
+        self.assertEqual(Experiment._chunks([0, 1, 2, 5, 6, 9], 2), [(0, 2), (2, 1), (5, 2), (9, 1)])
+
+    def test_batch_round_trip(self):
+        """Test that result batches are packed into columns and unpacked unchanged."""
+        results = [{"a": 1, "b": 2}, {"a": 3, "b": 4}]
+        batch = Experiment._to_batch(results)
+        self.assertEqual(batch, {"a": [1, 3], "b": [2, 4]})
+        self.assertEqual(Experiment._from_batch(batch), results)
+        self.assertEqual(Experiment._from_batch(Experiment._to_batch([1, 2])), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from differenceoperator import DifferenceOperator
+from functionalgraph import FunctionalGraph
+from ranktables import RankTables
+
+
+class TestFunctionalGraph(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.graph = FunctionalGraph(3, 4, cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_states_round_trip(self):
+        """Test that state numbers decode to chains that encode back to them, with the identity at 0."""
+        for state in (0, 1, 500, self.graph.size - 1):
+            self.assertEqual(self.graph.state(self.graph.chain(state)), state)
+        self.assertEqual(self.graph.chain(0).to_array(), [[0, 1, 2]] * 4)
+
+    def test_successors(self):
+        """Test that the successor of every state is its derivative."""
+        for state in range(0, self.graph.size, 37):
+            expected = DifferenceOperator.derivative(self.graph.chain(state))
+            self.assertEqual(self.graph.successor[state], self.graph.state(expected))
+
+    def test_trajectories(self):
+        """Test that every looked-up trajectory matches the simulated one."""
+        for state in range(self.graph.size):
+            chain = self.graph.chain(state)
+            self.assertEqual(self.graph.trajectory(chain), DifferenceOperator.trajectory(chain, "seen"))
+
+    def test_global_counts(self):
+        """Test that the order distribution, cycles and basin are consistent with each other."""
+        distribution = self.graph.order_distribution()
+        self.assertEqual(sum(distribution.values()), self.graph.size)
+        self.assertEqual(distribution[0], 1)
+        self.assertEqual(int(self.graph.basin().sum()), sum(self.graph.cycle_id == 0))
+        cycles = self.graph.cycles()
+        self.assertEqual(cycles[0], 1)
+        self.assertEqual(sum(cycles.values()), int(np.sum(np.asarray(self.graph.tail) == 0)))
+
+    def test_graph_method(self):
+        """Test that the graph method of DifferenceOperator agrees with the seen method."""
+        with mock.patch.object(RankTables, "DIRECTORY", self.directory.name):
+            for state in range(0, self.graph.size, 997):
+                chain = self.graph.chain(state)
+                self.assertEqual(DifferenceOperator.order(chain, "graph"), DifferenceOperator.order(chain))
+
+    def test_too_many_states(self):
+        """Test that shapes with more states than the limit raise a ValueError."""
+        with self.assertRaises(ValueError):
+            FunctionalGraph(5, 5, self.directory.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+from differenceoperator import DifferenceOperator
+from instrumentation import Instrumentation
+from ordercache import OrderCache
+from permutation import Permutation
+from permutationchain import PermutationChain
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.chain = PermutationChain([Permutation([0, 1, 2]), Permutation([2, 0, 1]), Permutation([1, 2, 0])])
+
+    def tearDown(self):
+        Instrumentation.disable()
+
+    def test_disabled_records_nothing(self):
+        """Test that nothing is recorded while instrumentation is disabled."""
+        with Instrumentation.stage("order"):
+            DifferenceOperator.order(self.chain)
+        Instrumentation.add("steps")
+        self.assertEqual(Instrumentation.collect(), {})
+        self.assertEqual(Instrumentation.profile(), {})
+
+    def test_trajectory_metrics(self):
+        """Test that the trajectory records its steps, lengths and table sizes."""
+        Instrumentation.enable()
+        cache = OrderCache()
+        for method in ("seen", "brent", "floyd"):
+            preperiod, period = DifferenceOperator.trajectory(self.chain, method, cache if method == "seen" else None)
+            record = Instrumentation.collect()
+            self.assertEqual((record["preperiod"], record["period"]), ([preperiod], [period]))
+            self.assertEqual(record["trajectories"], 1)
+            self.assertGreater(record["derivative_steps"], 0)
+            self.assertGreater(record["time_trajectory"], 0)
+        self.assertEqual(Instrumentation.profile()["trials"], 3)
+
+    def test_every_trajectory_is_recorded(self):
+        """Test that the lengths of every trajectory of a trial are kept, and summed in the profile."""
+        Instrumentation.enable()
+        other = PermutationChain([Permutation([0, 1, 2]), Permutation([1, 0, 2]), Permutation([0, 1, 2])])
+        first = DifferenceOperator.trajectory(self.chain)
+        second = DifferenceOperator.trajectory(other)
+        record = Instrumentation.collect()
+        self.assertEqual(record["preperiod"], [first[0], second[0]])
+        self.assertEqual(record["period"], [first[1], second[1]])
+        self.assertEqual(Instrumentation.profile()["period"], first[1] + second[1])
+
+    def test_discard(self):
+        """Test that a discarded record is not counted in the profile."""
+        Instrumentation.enable()
+        DifferenceOperator.trajectory(self.chain)
+        Instrumentation.discard()
+        self.assertEqual(Instrumentation.profile(), {})
+        DifferenceOperator.trajectory(self.chain)
+        self.assertEqual(Instrumentation.collect()["trajectories"], 1)
+
+    def test_seen_and_cache_peaks(self):
+        """Test that the peak sizes of the seen table and the cache are recorded."""
+        Instrumentation.enable()
+        cache = OrderCache()
+        DifferenceOperator.trajectory(self.chain, "seen", cache)
+        record = Instrumentation.collect()
+        self.assertEqual(record["peak_seen"], record["derivative_steps"] + 1)
+        self.assertEqual(record["peak_cache_size"], len(cache))
+
+    def test_stages_and_allocations(self):
+        """Test that nested stages accumulate time and allocation peaks."""
+        Instrumentation.enable(trace_allocations=True)
+        with Instrumentation.stage("outer"):
+            with Instrumentation.stage("inner"):
+                data = bytearray(1 << 20)
+            del data
+        record = Instrumentation.collect()
+        self.assertGreaterEqual(record["time_outer"], record["time_inner"])
+        self.assertGreaterEqual(record["alloc_inner"], 1 << 20)
+        self.assertGreaterEqual(record["alloc_outer"], 1 << 20)
+
+    def test_merge(self):
+        """Test that profiles add up totals and keep the maximum of peaks."""
+        merged = Instrumentation.merge({"trials": 1, "peak_seen": 5, "time_trial": 1.0},
+                                       {"trials": 2, "peak_seen": 3, "derivative_steps": 7})
+        self.assertEqual(merged, {"trials": 3, "peak_seen": 5, "time_trial": 1.0, "derivative_steps": 7})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+
+from jacobsonmatthews import JacobsonMatthews
+from latinsquare import LatinSquare
+from permutation import Permutation
+
+
+class TestJacobsonMatthews(unittest.TestCase):
+
+    def test_sample_is_latin_square(self):
+        """Test that samples are valid Latin squares."""
+        sampler = JacobsonMatthews(6, seed=0)
+        for _ in range(10):
+            square = sampler.sample()
+            self.assertIsInstance(square, LatinSquare)
+            LatinSquare(square.permutations)  # Validates
+
+    def test_sample_batch(self):
+        """Test that a batch holds valid Latin squares of the requested shape."""
+        batch = JacobsonMatthews(5, seed=1).sample_batch(8)
+        self.assertEqual(batch.shape, (8, 5, 5))
+        for square in batch:
+            LatinSquare([Permutation(row) for row in square.tolist()])
+
+    def test_samples_stream(self):
+        """Test that the generator yields the requested number of squares."""
+        squares = list(JacobsonMatthews(4, seed=2).samples(5))
+        self.assertEqual(len(squares), 5)
+
+    def test_size_one(self):
+        """Test that the single Latin square of size 1 is returned."""
+        self.assertEqual(JacobsonMatthews(1).sample().to_tuple(), ((0,),))
+
+    def test_seed_is_reproducible(self):
+        """Test that equal seeds produce equal streams."""
+        first = JacobsonMatthews(5, seed=3).sample_batch(4)
+        second = JacobsonMatthews(5, seed=3).sample_batch(4)
+        np.testing.assert_array_equal(first, second)
+
+    def test_spawn_streams_differ(self):
+        """Test that spawned samplers are reproducible and independent of each other."""
+        streams = JacobsonMatthews.spawn(5, 2, seed=4)
+        again = JacobsonMatthews.spawn(5, 2, seed=4)
+        first, second = streams[0].sample_batch(3), streams[1].sample_batch(3)
+        np.testing.assert_array_equal(first, again[0].sample_batch(3))
+        self.assertFalse(np.array_equal(first, second))
+
+    def test_shared_sampler(self):
+        """Test that a seeded shared sampler draws from its spawned stream whatever was drawn before."""
+        expected = JacobsonMatthews.spawn(5, 3, seed=6)[2].sample()
+        self.assertEqual(JacobsonMatthews.shared(5, seed=6, stream=2).sample(), expected)
+        JacobsonMatthews.shared(5, seed=6, stream=0).sample_batch(3)
+        self.assertEqual(JacobsonMatthews.shared(5, seed=6, stream=2).sample(), expected)
+        self.assertIs(JacobsonMatthews.shared(5, seed=6, stream=1), JacobsonMatthews.shared(5, seed=6))
+        self.assertIsNot(JacobsonMatthews.shared(5, seed=7), JacobsonMatthews.shared(5, seed=6))
+
+    def test_covers_all_squares(self):
+        """Test that every one of the 12 Latin squares of size 3 is reached."""
+        sampler = JacobsonMatthews(3, seed=5)
+        seen = {square.to_tuple() for square in sampler.samples(300)}
+        self.assertEqual(len(seen), 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,10 @@
 import unittest
+
+import numpy as np
+
+from jacobsonmatthews import JacobsonMatthews
 from permutation import Permutation
+from permutationchain import PermutationChain
 from latinsquare import LatinSquare  # Assuming this is the module where LatinSquare is defined
 
 
@@ -55,6 +60,12 @@ class TestLatinSquare(unittest.TestCase):
 
         self.assertEqual(reduced_square, latin_square)  # Should be unchanged
 
+    def test_reduce_validates_chain(self):
+        """Test that reducing a permutation chain that is not a Latin square raises a ValueError."""
+        chain = PermutationChain([Permutation([2, 1, 0]), Permutation([2, 0, 1]), Permutation([1, 2, 0])])
+        with self.assertRaises(ValueError):
+            LatinSquare.reduce(chain)
+
     def test_reduce_first_row_sorted(self):
         """Test that the first row of the reduced Latin square is in ascending order."""
         for _ in range(100):
@@ -65,5 +76,29 @@ class TestLatinSquare(unittest.TestCase):
             first_column = [p.values[0] for p in reduced_square.permutations]
             self.assertEqual(first_column, list(range(4)))
 
+    def test_validate(self):
+        """Test the column check on small and large squares."""
+        for n in (3, 20):
+            rows = [Permutation([(i + j) % n for j in range(n)]) for i in range(n)]
+            self.assertTrue(LatinSquare.validate(rows))
+            self.assertFalse(LatinSquare.validate(rows[:-1] + [rows[0]]))
+            self.assertFalse(LatinSquare.validate(rows[:-1]))
+        self.assertTrue(LatinSquare.validate([]))
+
+    def test_validate_batch(self):
+        """Test that batch validation reports which squares failed."""
+        squares = np.stack([JacobsonMatthews(6, seed=seed).sample().to_numpy() for seed in range(5)])
+        self.assertEqual(len(np.unique(squares.reshape(5, -1), axis=0)), 5)
+        squares[1, 0, 0], squares[1, 0, 1] = squares[1, 0, 1], squares[1, 0, 0]  # Breaks two columns
+        squares[3, 2, 4] = 6  # Out of range
+        squares[4, 5] = squares[4, 5, ::-1]
+        valid = LatinSquare.validate_batch(squares)
+        self.assertEqual(np.flatnonzero(~valid).tolist(), [1, 3, 4])
+        for square in squares[valid]:
+            self.assertTrue(LatinSquare.validate([Permutation(row) for row in square.tolist()]))
+        with self.assertRaises(ValueError):
+            LatinSquare.validate_batch(np.zeros((2, 3, 4), dtype=int))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from latinsquare import LatinSquare
+from latinsquareenumerator import LatinSquareEnumerator
+
+
+class TestLatinSquareEnumerator(unittest.TestCase):
+
+    def test_counts(self):
+        """Test that the number of reduced Latin squares matches the known counts."""
+        expected = {1: 1, 2: 1, 3: 1, 4: 4, 5: 56, 6: 9408}
+        for n, count in expected.items():
+            self.assertEqual(sum(1 for _ in LatinSquareEnumerator(n)), count)
+
+    def test_squares_are_reduced(self):
+        """Test that every enumerated square is valid and already in reduced form."""
+        for square in LatinSquareEnumerator(5):
+            LatinSquare(square.permutations)  # Validates
+            self.assertEqual(LatinSquare.reduce(square), square)
+
+    def test_squares_are_distinct(self):
+        """Test that no square is enumerated twice."""
+        squares = [square.to_tuple() for square in LatinSquareEnumerator(5)]
+        self.assertEqual(len(squares), len(set(squares)))
+
+    def test_shards_partition_the_space(self):
+        """Test that shards are disjoint and together cover every square."""
+        enumerator = LatinSquareEnumerator(5)
+        everything = {square.to_tuple() for square in enumerator}
+        shards = [{square.to_tuple() for square in enumerator.shard(i, 3)} for i in range(3)]
+        self.assertEqual(sum(len(shard) for shard in shards), len(everything))
+        self.assertEqual(set().union(*shards), everything)
+
+    def test_shard_depth(self):
+        """Test that deeper prefixes still cover the same space."""
+        enumerator = LatinSquareEnumerator(5, shard_depth=6)
+        prefixes = list(enumerator.prefixes())
+        self.assertTrue(all(len(prefix) == 6 for prefix in prefixes))
+        self.assertEqual(sum(1 for prefix in prefixes for _ in enumerator.extend(prefix)), 56)
+
+    def test_invalid_shard(self):
+        """Test that an out-of-range shard index raises a ValueError."""
+        with self.assertRaises(ValueError):
+            list(LatinSquareEnumerator(4).shard(3, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from ordercache import OrderCache
+
+
+class TestOrderCache(unittest.TestCase):
+
+    def test_get_and_put(self):
+        """Test that stored trajectories are returned and unknown states miss."""
+        cache = OrderCache()
+        cache.put(OrderCache.key(3, b"\x00\x01\x02"), (0, 1))
+        self.assertEqual(cache.get(OrderCache.key(3, b"\x00\x01\x02")), (0, 1))
+        self.assertIsNone(cache.get(OrderCache.key(3, b"\x02\x01\x00")))
+
+    def test_key_includes_size(self):
+        """Test that equal bytes for different permutation sizes do not collide."""
+        self.assertNotEqual(OrderCache.key(2, b"\x00\x01\x00\x01"), OrderCache.key(4, b"\x00\x01\x00\x01"))
+
+    def test_least_recently_used_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = OrderCache(maxsize=2)
+        cache.put("a", (1, 2))
+        cache.put("b", (2, 2))
+        cache.get("a")
+        cache.put("c", (3, 2))
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_save_merges_into_file(self):
+        """Test that caches saved to the same file are merged and loaded back."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "orders.pkl")
+            first = OrderCache(path=path)
+            first.put("a", (1, 2))
+            first.save()
+            second = OrderCache(path=path)
+            second.put("b", (0, 3))
+            second.save()
+            loaded = OrderCache(path=path)
+            self.assertEqual((loaded.get("a"), loaded.get("b")), ((1, 2), (0, 3)))
+
+    def test_save_is_bounded(self):
+        """Test that the merged file keeps at most maxsize entries, preferring the saving cache's own."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "orders.pkl")
+            for name in ("a", "b", "c"):
+                cache = OrderCache(maxsize=2, path=path)
+                cache.put(name, (0, 1))
+                cache.put(name + name, (0, 1))
+                cache.save()
+            loaded = OrderCache(maxsize=None, path=path)
+            self.assertEqual(len(loaded), 2)
+            self.assertIn("c", loaded)
+            self.assertIn("cc", loaded)
+
+    def test_shared(self):
+        """Test that the shared cache is one instance per file within a process."""
+        self.assertIs(OrderCache.shared(), OrderCache.shared())
+
+
+if __name__ == "__main__":
+    unittest.main()
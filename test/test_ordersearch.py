@@ -0,0 +1,50 @@
+import unittest
+
+from differenceoperator import DifferenceOperator
+from latinsquare import LatinSquare
+from ordercache import OrderCache
+from ordersearch import OrderSearch
+
+
+class TestOrderSearch(unittest.TestCase):
+
+    def test_incremental_derivative(self):
+        """Test that the incrementally updated derivative matches a full recomputation."""
+        for moves in (("rows",), ("jacobson-matthews",), ("rows", "jacobson-matthews")):
+            search = OrderSearch(5, seed=3, moves=moves, cache=OrderCache())
+            search.run(steps=40)
+            square = search.square()
+            LatinSquare(square.permutations)
+            self.assertEqual(search._derivative, DifferenceOperator.derivative(square).to_buffer())
+            self.assertEqual(search.order, DifferenceOperator.order(square))
+
+    def test_objectives(self):
+        """Test that the reported orders are correct and improve on the starting square."""
+        for objective in ("max", "min"):
+            search = OrderSearch(5, objective=objective, seed=1, cache=OrderCache())
+            start = search.order
+            square, order = search.run(steps=60)
+            self.assertEqual(order, DifferenceOperator.order(square))
+            self.assertTrue(order >= start if objective == "max" else order <= start)
+
+    def test_run_parallel(self):
+        """Test that parallel restarts are reproducible and sorted best first."""
+        results = OrderSearch.run_parallel(4, restarts=3, steps=20, seed=2, num_workers=2)
+        again = OrderSearch.run_parallel(4, restarts=3, steps=20, seed=2, num_workers=2)
+        self.assertEqual([order for _, order in results], [order for _, order in again])
+        self.assertEqual([order for _, order in results], sorted((order for _, order in results), reverse=True))
+        for square, order in results:
+            self.assertEqual(DifferenceOperator.order(square), order)
+
+    def test_invalid_arguments(self):
+        """Test that invalid sizes, objectives and moves raise a ValueError."""
+        with self.assertRaises(ValueError):
+            OrderSearch(1)
+        with self.assertRaises(ValueError):
+            OrderSearch(4, objective="median")
+        with self.assertRaises(ValueError):
+            OrderSearch(4, moves=("columns",))
+
+
+if __name__ == "__main__":
+    unittest.main()
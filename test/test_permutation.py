@@ -41,6 +41,28 @@ class TestPermutation(unittest.TestCase):
         self.assertEqual(d[p1], "first")
         self.assertEqual(d[p2], "second")
 
+    def test_values_as_list(self):
+        """Test that the values are exposed as a plain list."""
+        p = Permutation([2, 0, 1])
+        self.assertEqual(p.values, [2, 0, 1])
+        self.assertEqual(len(p), 3)
+
+    def test_compact_storage(self):
+        """Test that values are stored in the smallest fitting array typecode."""
+        self.assertEqual(Permutation.typecode(5), "B")
+        self.assertEqual(Permutation.typecode(256), "B")
+        self.assertEqual(Permutation.typecode(257), "H")
+        self.assertEqual(Permutation(list(range(300))).inverse().to_tuple(), tuple(range(300)))
+        with self.assertRaises(AttributeError):
+            Permutation([0, 1]).extra = 1  # No per-instance __dict__
+
+    def test_inverse_and_apply_results_are_permutations(self):
+        """Test that composition and inversion results behave like validated permutations."""
+        p1 = Permutation([3, 1, 0, 2])
+        p2 = Permutation([1, 2, 3, 0])
+        self.assertEqual(p1.apply(p1.inverse()).to_tuple(), (0, 1, 2, 3))
+        self.assertEqual(p1.apply(p2).inverse().to_tuple(), Permutation(p1.apply(p2).values).inverse().to_tuple())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -20,6 +20,15 @@ class TestPermutationChain(unittest.TestCase):
         expected_tuple = ((0, 1, 2), (2, 0, 1))
         self.assertEqual(chain.to_tuple(), expected_tuple)
 
+    def test_buffer_round_trip(self):
+        """Test that a chain survives conversion to a flat buffer and back."""
+        p1 = Permutation([0, 1, 2])
+        p2 = Permutation([2, 0, 1])
+        chain = PermutationChain([p1, p2])
+        buffer = chain.to_buffer()
+        self.assertEqual(list(buffer), [0, 1, 2, 2, 0, 1])
+        self.assertEqual(PermutationChain._from_buffer(buffer, 3), chain)
+
     def test_equality(self):
         """Test that two identical permutation chains are considered equal."""
         p1 = Permutation([0, 1, 2])
@@ -45,6 +54,31 @@ class TestPermutationChain(unittest.TestCase):
         chain2 = PermutationChain([p1, p2])
         self.assertEqual(hash(chain1), hash(chain2))
 
+    def test_key_packs_values(self):
+        """Test that the key packs ceil(log2 n) bits per value and is cached."""
+        chain = PermutationChain([Permutation([0, 1, 2]), Permutation([2, 0, 1])])
+        self.assertEqual(chain.key, 0b00_01_10_10_00_01)
+        self.assertIs(chain.key, chain.key)
+
+    def test_unpack(self):
+        """Test that a chain is rebuilt from its packed key."""
+        p1 = Permutation([3, 0, 4, 1, 2])
+        p2 = Permutation([0, 1, 2, 3, 4])
+        chain = PermutationChain([p1, p2])
+        self.assertEqual(PermutationChain.unpack(chain.key, 2, 5), chain)
+
+    def test_equality_checks_shape(self):
+        """Test that chains of different shapes are unequal even when their keys match."""
+        single = PermutationChain([Permutation([0])])
+        double = PermutationChain([Permutation([0]), Permutation([0])])
+        self.assertEqual(single.key, double.key)
+        self.assertNotEqual(single, double)
+
+    def test_set_membership(self):
+        """Test that equal chains built separately are found in a set."""
+        chains = {PermutationChain([Permutation([0, 1, 2]), Permutation([2, 0, 1])])}
+        self.assertIn(PermutationChain([Permutation([0, 1, 2]), Permutation([2, 0, 1])]), chains)
+
     def test_getitem(self):
         """Test accessing elements of the permutation chain."""
         p1 = Permutation([0, 1, 2])
@@ -0,0 +1,75 @@
+import threading
+import time
+import unittest
+
+from pipeline import Pipeline
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+def total(batch):
+    return [sum(batch)] * len(batch)
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_stages_are_applied_in_order(self):
+        """Test that every item passes through every stage once, whatever the workers and batch sizes."""
+        pipeline = Pipeline(queue_size=2)
+        pipeline.add("increment", lambda x: x + 1, workers=3, batch_size=5)
+        pipeline.add("double", lambda x: 2 * x, workers=2, batch_size=3)
+        pipeline.add("tens", lambda xs: [10 * x for x in xs], batched=True, batch_size=7)
+        self.assertEqual(sorted(pipeline.run(range(500))), [20 * (x + 1) for x in range(500)])
+        self.assertEqual([stats["items"] for stats in pipeline.stats.values()], [500, 500, 500])
+
+    def test_process_stages(self):
+        """Test that stages run in process pools, including batched functions."""
+        pipeline = Pipeline().add("square", square, workers=2, batch_size=4, processes=True)
+        self.assertEqual(sorted(pipeline.run(range(50))), [x * x for x in range(50)])
+        batched = Pipeline().add("total", total, batch_size=4, batched=True, processes=True)
+        self.assertEqual(sorted(set(batched.run(range(4)))), [6])
+
+    def test_backpressure_bounds_the_input(self):
+        """Test that a slow stage stops the input from being read far ahead."""
+        read = []
+
+        def items():
+            for i in range(1000):
+                read.append(i)
+                yield i
+
+        def slow(x):
+            time.sleep(0.01)
+            return x
+
+        outputs = Pipeline(queue_size=2).add("slow", slow, batch_size=1).run(items())
+        next(outputs)
+        time.sleep(0.1)
+        self.assertLess(len(read), 20)
+        outputs.close()
+
+    def test_errors_stop_the_pipeline(self):
+        """Test that an exception in a stage is raised from the iteration and every thread stops."""
+        def fail(x):
+            if x == 30:
+                raise RuntimeError("planned failure")
+            return x
+
+        threads = threading.active_count()
+        with self.assertRaises(RuntimeError):
+            list(Pipeline().add("fail", fail, workers=2).run(range(100)))
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_invalid_stages(self):
+        """Test that duplicate names and non-positive sizes raise a ValueError."""
+        pipeline = Pipeline().add("a", square)
+        with self.assertRaises(ValueError):
+            pipeline.add("a", square)
+        with self.assertRaises(ValueError):
+            pipeline.add("b", square, workers=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
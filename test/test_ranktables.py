@@ -0,0 +1,82 @@
+import itertools
+import os
+import tempfile
+import unittest
+from array import array
+from unittest import mock
+
+import numpy as np
+
+from differenceoperator import DifferenceOperator
+from jacobsonmatthews import JacobsonMatthews
+from ranktables import RankTables
+
+
+class TestRankTables(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_rank_order(self):
+        """Test that permutations are listed in Lehmer rank order and ranked back to their index."""
+        with tempfile.TemporaryDirectory() as directory:
+            for n in range(1, 6):
+                tables = RankTables(n, directory)
+                expected = np.array(list(itertools.permutations(range(n))))
+                np.testing.assert_array_equal(tables.permutations, expected)
+                np.testing.assert_array_equal(RankTables.rank(expected), np.arange(len(expected)))
+
+    def test_tables_are_saved(self):
+        """Test that the tables are written once and mapped from their files."""
+        with tempfile.TemporaryDirectory() as directory:
+            RankTables(4, directory)
+            self.assertTrue(os.path.exists(os.path.join(directory, "compose-4.npy")))
+            self.assertIsInstance(RankTables(4, directory).inverse, np.memmap)
+
+    def test_compose_and_inverse(self):
+        """Test composition and inversion against the permutations, including the factored tables of size 8."""
+        for n in (5, 8):
+            tables = RankTables.load(n, self.directory.name)
+            rng = np.random.default_rng(n)
+            a, b = rng.integers(0, tables.size, 500), rng.integers(0, tables.size, 500)
+            perms_a, perms_b = tables.permutations[a], tables.permutations[b]
+            composed = np.take_along_axis(perms_a, perms_b.astype(np.intp), axis=1)
+            np.testing.assert_array_equal(tables.compose(a, b), RankTables.rank(composed))
+            np.testing.assert_array_equal(tables.compose(tables.inverse[a], a), np.zeros(500))
+
+    def test_derivative(self):
+        """Test that the rank derivatives match DifferenceOperator.derivative."""
+        for n in (4, 5, 8):
+            tables = RankTables.load(n, self.directory.name)
+            square = JacobsonMatthews(n, seed=n).sample()
+            ranks = tables.ranks(square)
+            expected = DifferenceOperator.derivative(square)
+            self.assertEqual(tables.chain(tables.derivative(ranks)), expected)
+            target = array("H", ranks.tolist())
+            tables.derivative_into(array("H", ranks.tolist()), target)
+            self.assertEqual(target.tolist(), tables.ranks(expected).tolist())
+            batch = tables.derivative(np.stack([ranks, ranks]))
+            self.assertEqual(batch.shape, (2, n))
+
+    def test_ranked_trajectory(self):
+        """Test that the ranked method agrees with the seen method, with its tables in the default directory."""
+        with mock.patch.object(RankTables, "DIRECTORY", self.directory.name):
+            for seed in range(5):
+                square = JacobsonMatthews(6, seed=seed).sample()
+                self.assertEqual(DifferenceOperator.trajectory(square, "ranked"),
+                                 DifferenceOperator.trajectory(square, "seen"))
+            self.assertTrue(os.path.exists(os.path.join(self.directory.name, "compose-6.npy")))
+
+    def test_invalid_size(self):
+        """Test that sizes without tables raise a ValueError."""
+        with self.assertRaises(ValueError):
+            RankTables(9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+from resultsink import ResultSink
+
+
+class TestResultSink(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_append_and_read(self):
+        """Test that appended batches are read back in order."""
+        sink = ResultSink(self.path)
+        sink.append(0, 2, {"order": [1, 2]}, [])
+        sink.append(2, 1, [{"order": 3}], [])
+        self.assertEqual(list(ResultSink(self.path).batches()), [{"order": [1, 2]}, [{"order": 3}]])
+
+    def test_completed(self):
+        """Test that the recorded trials count as completed, except those that failed until retried."""
+        sink = ResultSink(self.path)
+        sink.append(0, 2, {"order": [1, 2]}, [])
+        sink.append(5, 3, {"order": [1]}, [(6, "failed"), (7, "failed")])
+        self.assertEqual(sink.completed(), {0, 1, 5})
+        sink.append(6, 2, {"order": [2]}, [(7, "failed")])
+        self.assertEqual(sink.completed(), {0, 1, 5, 6})
+
+    def test_partial_record_is_dropped(self):
+        """Test that a record cut short by a crash is discarded on reopening."""
+        sink = ResultSink(self.path)
+        sink.append(0, 1, {"order": [4]}, [])
+        with open(self.path, "ab") as f:
+            f.write(b"\x40\x00\x00\x00\x00\x00\x00\x00partial")
+        reopened = ResultSink(self.path)
+        self.assertEqual(list(reopened.batches()), [{"order": [4]}])
+        reopened.append(1, 1, {"order": [5]}, [])
+        self.assertEqual(reopened.completed(), {0, 1})
+
+    def test_to_dataframe(self):
+        """Test that batches are concatenated into one DataFrame."""
+        sink = ResultSink(self.path)
+        sink.append(0, 2, {"order": [1, 2]}, [])
+        sink.append(2, 1, {"order": [3]}, [])
+        self.assertEqual(sink.to_dataframe()["order"].tolist(), [1, 2, 3])
+
+    def test_invalid_file(self):
+        """Test that opening a file not written by a sink raises a ValueError."""
+        with open(self.path, "wb") as f:
+            f.write(b"not a result file")
+        with self.assertRaises(ValueError):
+            ResultSink(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import random
+import unittest
+
+from differenceoperator import DifferenceOperator
+from jacobsonmatthews import JacobsonMatthews
+from ordercache import OrderCache
+from permutation import Permutation
+from permutationchain import PermutationChain
+from symmetryoracle import SymmetryOracle
+from transformation import Transformation
+
+
+def shift(chain: PermutationChain, positions: int) -> PermutationChain:
+    return PermutationChain(chain.permutations[positions:] + chain.permutations[:positions])
+
+
+class TestSymmetryOracle(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(5)
+
+    def random_permutation(self, n: int) -> Permutation:
+        return Permutation(self.rng.sample(range(n), n))
+
+    def test_representative_is_shared(self):
+        """Test that column permutations and cyclic shifts of a square share one representative."""
+        square = JacobsonMatthews(6, seed=2).sample()
+        representatives = set()
+        for _ in range(20):
+            chain = Transformation.permute_columns(square, self.random_permutation(6))
+            chain = shift(chain, self.rng.randrange(6))
+            derivative = DifferenceOperator.derivative(chain).to_buffer()
+            representatives.add(SymmetryOracle.representative(derivative, 6).tobytes())
+        self.assertEqual(len(representatives), 1)
+
+    def test_representative_is_conjugate(self):
+        """Test that the representative has the trajectory of the chain it represents."""
+        for _ in range(50):
+            n, m = self.rng.randint(1, 5), self.rng.randint(1, 5)
+            chain = PermutationChain([self.random_permutation(n) for _ in range(m)])
+            representative = SymmetryOracle.representative(chain.to_buffer(), n)
+            self.assertEqual(DifferenceOperator.trajectory(PermutationChain._from_buffer(representative, n), "seen"),
+                             DifferenceOperator.trajectory(chain, "seen"))
+
+    def test_verify_mode(self):
+        """Test that the symmetry-reduced trajectory agrees with the direct one."""
+        for n in range(1, 6):
+            for seed in range(10):
+                square = JacobsonMatthews(n, seed=seed).sample()
+                for method in ("seen", "brent", "floyd"):
+                    DifferenceOperator.trajectory(square, method, OrderCache(), symmetry="verify")
+        for _ in range(100):
+            n, m = self.rng.randint(1, 5), self.rng.randint(1, 5)
+            chain = PermutationChain([self.random_permutation(n) for _ in range(m)])
+            DifferenceOperator.trajectory(chain, "brent", OrderCache(), symmetry="verify")
+
+    def test_class_costs_one_computation(self):
+        """Test that related squares hit the cache entry of their representative."""
+        square = JacobsonMatthews(5, seed=1).sample()
+        cache = OrderCache()
+        expected = DifferenceOperator.order(square, "brent", cache, symmetry="reduce")
+        size = len(cache)
+        for _ in range(10):
+            chain = shift(Transformation.permute_columns(square, self.random_permutation(5)), self.rng.randrange(5))
+            self.assertEqual(DifferenceOperator.order(chain, "brent", cache, symmetry="reduce"), expected)
+        self.assertEqual(len(cache), size)
+
+    def test_no_implicit_shared_cache(self):
+        """Test that symmetry reduction without a cache leaves the process-wide cache untouched."""
+        size = len(OrderCache.shared())
+        square = JacobsonMatthews(5, seed=2).sample()
+        self.assertEqual(DifferenceOperator.order(square, "brent", symmetry="reduce"), DifferenceOperator.order(square))
+        self.assertEqual(len(OrderCache.shared()), size)
+
+    def test_invalid_mode(self):
+        """Test that an unknown symmetry mode raises a ValueError."""
+        with self.assertRaises(ValueError):
+            DifferenceOperator.trajectory(JacobsonMatthews(3).sample(), symmetry="all")
+
+
+if __name__ == "__main__":
+    unittest.main()
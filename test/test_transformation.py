@@ -1,4 +1,7 @@
 import unittest
+
+import numpy as np
+
 from permutation import Permutation
 from permutationchain import PermutationChain
 from transformation import Transformation
@@ -113,6 +116,63 @@ class TestTransformation(unittest.TestCase):
         rotated_chain = Transformation.rotate(chain, "clockwise", 1)
         self.assertIsNone(rotated_chain)
 
+    def test_rotate_multiple_turns(self):
+        """Test rotations by several quarter turns in both directions against written-out squares."""
+        square = [[0, 1, 2, 3], [2, 3, 0, 1], [3, 2, 1, 0], [1, 0, 3, 2]]
+        quarter = [[1, 3, 2, 0], [0, 2, 3, 1], [3, 1, 0, 2], [2, 0, 1, 3]]
+        half = [[2, 3, 0, 1], [0, 1, 2, 3], [1, 0, 3, 2], [3, 2, 1, 0]]
+        three_quarters = [[3, 1, 0, 2], [2, 0, 1, 3], [1, 3, 2, 0], [0, 2, 3, 1]]
+        chain = PermutationChain([Permutation(row) for row in square])
+        expected = {"clockwise": [square, quarter, half, three_quarters],
+                    "counterclockwise": [square, three_quarters, half, quarter]}
+        for direction, turns in expected.items():
+            for rotations in range(6):
+                self.assertEqual(Transformation.rotate(chain, direction, rotations).to_array(), turns[rotations % 4])
+
+    def test_rotate_invalid_direction(self):
+        """Test that rotating in an unknown direction raises a ValueError."""
+        chain = PermutationChain([Permutation([0, 1, 2]), Permutation([1, 2, 0]), Permutation([2, 0, 1])])
+        with self.assertRaises(ValueError):
+            Transformation.rotate(chain, "ccw", 1)
+        with self.assertRaises(ValueError):
+            Transformation.rotate(np.array([chain.to_array()]), "ccw", 1)
+
+    def test_skip_validation(self):
+        """Test that validation can be skipped for chains known to be Latin squares."""
+        p1 = Permutation([0, 1, 2])
+        p2 = Permutation([1, 2, 0])
+        p3 = Permutation([2, 0, 1])
+        chain = PermutationChain([p1, p2, p3])
+        self.assertEqual(Transformation.transpose(chain, validate=False), Transformation.transpose(chain))
+        self.assertEqual(Transformation.rotate(chain, "clockwise", 1, validate=False),
+                         Transformation.rotate(chain, "clockwise", 1))
+
+    def test_batch(self):
+        """Test that a batch of chains is transformed like each of its chains."""
+        chains = [PermutationChain([Permutation([0, 1, 2]), Permutation([1, 2, 0]), Permutation([2, 0, 1])]),
+                  PermutationChain([Permutation([2, 0, 1]), Permutation([0, 1, 2]), Permutation([1, 2, 0])])]
+        batch = np.stack([chain.to_numpy() for chain in chains])
+        perm = Permutation([2, 0, 1])
+        cases = [
+            lambda c: Transformation.permute_rows(c, perm),
+            lambda c: Transformation.permute_columns(c, perm),
+            Transformation.transpose,
+            lambda c: Transformation.rotate(c, "clockwise", 1),
+            lambda c: Transformation.rotate(c, "counterclockwise", 3),
+        ]
+        for transform in cases:
+            transformed = transform(batch)
+            self.assertEqual(transformed.shape, batch.shape)
+            for values, chain in zip(transformed, chains):
+                np.testing.assert_array_equal(values, transform(chain).to_numpy())
+
+    def test_is_valid(self):
+        """Test validating arrays of chains."""
+        batch = np.array([[[0, 1], [1, 0]], [[0, 0], [1, 0]]])
+        np.testing.assert_array_equal(Transformation.is_valid(batch), [True, False])
+        self.assertTrue(Transformation.is_valid(batch[0]))
+        self.assertIsNone(Transformation.transpose(np.zeros((2, 3), dtype=int)))
+
 
 if __name__ == "__main__":
     unittest.main()
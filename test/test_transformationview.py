@@ -0,0 +1,83 @@
+import unittest
+
+from jacobsonmatthews import JacobsonMatthews
+from latinsquare import LatinSquare
+from permutation import Permutation
+from permutationchain import PermutationChain
+from transformation import Transformation
+from transformationview import TransformationView
+
+
+class TestTransformationView(unittest.TestCase):
+
+    def setUp(self):
+        self.square = JacobsonMatthews(5, seed=1).sample()
+        self.p = Permutation([2, 0, 4, 1, 3])
+        self.q = Permutation([1, 3, 0, 4, 2])
+
+    def test_identity_view(self):
+        """Test that an identity view reads the same values as its chain."""
+        view = Transformation.view(self.square)
+        self.assertEqual(view, self.square)
+        self.assertEqual(len(view), 5)
+        self.assertEqual(view.column(2), [row.values[2] for row in self.square.permutations])
+
+    def test_composition_matches_eager(self):
+        """Test that composed views match the same transformations applied eagerly."""
+        eager = Transformation.permute_columns(self.square, self.p)
+        eager = Transformation.permute_rows(eager, self.q)
+        eager = Transformation.transpose(eager)
+        eager = Transformation.rotate(eager, "clockwise", 3)
+        eager = Transformation.permute_symbols(eager, self.p)
+        eager = Transformation.rotate(eager, "counterclockwise", 1)
+
+        view = Transformation.view(self.square)
+        view = Transformation.permute_columns(view, self.p)
+        view = Transformation.permute_rows(view, self.q)
+        view = Transformation.transpose(view)
+        view = Transformation.rotate(view, "clockwise", 3)
+        view = Transformation.permute_symbols(view, self.p)
+        view = Transformation.rotate(view, "counterclockwise", 1)
+
+        self.assertIsInstance(view, TransformationView)
+        self.assertEqual(view, eager)
+        self.assertEqual([view.value(i, 1) for i in range(5)], view.column(1))
+
+    def test_views_are_lazy(self):
+        """Test that transformations of a view do not materialize it."""
+        view = Transformation.view(self.square).permute_columns(self.p).permute_symbols(self.q).transpose()
+        self.assertIsNone(view._permutations)
+        view.column(0)
+        self.assertIsNone(view._permutations)
+        view[0]
+        self.assertIsNotNone(view._permutations)
+
+    def test_non_latin_chain(self):
+        """Test that views of other chains are only transposed eagerly, with validation."""
+        chain = PermutationChain([Permutation([0, 1, 2]), Permutation([0, 1, 2]), Permutation([1, 2, 0])])
+        view = Transformation.view(chain)
+        with self.assertRaises(ValueError):
+            view.transpose()
+        self.assertIsNone(Transformation.transpose(view))
+        shift = Permutation([1, 2, 0])
+        self.assertEqual(Transformation.permute_rows(view, shift), Transformation.permute_rows(chain, shift))
+
+    def test_rotate_invalid_direction(self):
+        """Test that a view rejects unknown rotation directions like the eager rotation."""
+        view = Transformation.view(self.square)
+        with self.assertRaises(ValueError):
+            view.rotate("ccw", 1)
+        with self.assertRaises(ValueError):
+            Transformation.rotate(view, "ccw", 1)
+
+    def test_reduce(self):
+        """Test that reduce sorts the first row and column."""
+        reduced = LatinSquare.reduce(self.square)
+        self.assertIsInstance(reduced, LatinSquare)
+        self.assertEqual(reduced[0].values, list(range(5)))
+        self.assertEqual([row.values[0] for row in reduced.permutations], list(range(5)))
+        LatinSquare(reduced.permutations)
+
+
+if __name__ == "__main__":
+    unittest.main()
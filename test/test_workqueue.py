@@ -0,0 +1,63 @@
+import os
+import tempfile
+import time
+import unittest
+
+from workqueue import WorkQueue
+
+
+class TestWorkQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.queue = WorkQueue(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_claim_and_complete(self):
+        """Test that every task is leased once and its result is read back."""
+        job = self.queue.start({"n": 4}, [(0, 2), (2, 2), (4, 1)], seed=3)
+        self.assertEqual(self.queue.job()["params"], {"n": 4})
+        claimed = [self.queue.claim(job, "a"), self.queue.claim(job, "b"), self.queue.claim(job, "a")]
+        self.assertEqual([task[1:] for task in claimed], [(0, 2), (2, 2), (4, 1)])
+        self.assertIsNone(self.queue.claim(job, "b"))
+
+        for name, start, count in claimed:
+            self.queue.complete(job, name, ([start] * count, [], None))
+        results = list(self.queue.results(job, set()))
+        self.assertEqual([result for _, _, _, result in results], [([0, 0], [], None), ([2, 2], [], None), ([4], [], None)])
+        self.assertEqual(list(self.queue.results(job, {name for name, _, _, _ in results})), [])
+
+        self.queue.finish(job)
+        self.assertIsNone(self.queue.job())
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, job)))
+        self.queue.complete(job, claimed[0][0], ([0, 0], [], None))  # A late worker drops its result
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, job)))
+
+    def test_expired_leases_are_reassigned(self):
+        """Test that a task whose worker stopped renewing its lease goes to another worker."""
+        job = self.queue.start({}, [(0, 1), (1, 1)])
+        name, _, _ = self.queue.claim(job, "crashed")
+        renewed, _, _ = self.queue.claim(job, "alive")
+        past = time.time() - 100
+        for task in (name, renewed):
+            os.utime(os.path.join(self.directory.name, job, "leased", task), (past, past))
+        self.assertTrue(self.queue.renew(job, renewed))
+
+        self.assertEqual(self.queue.release_expired(job, timeout=10), 1)
+        self.assertFalse(self.queue.renew(job, name))
+        self.assertEqual(self.queue.claim(job, "other")[0], name)
+
+    def test_late_result_is_kept_once(self):
+        """Test that a chunk completed by both its original and its new worker is read once."""
+        job = self.queue.start({}, [(0, 1)])
+        name, _, _ = self.queue.claim(job, "slow")
+        self.queue.complete(job, name, ([1], [], None))
+        self.queue.complete(job, name, ([1], [], None))
+        self.assertEqual(len(list(self.queue.results(job, set()))), 1)
+        self.assertEqual(self.queue.release_expired(job, timeout=0), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,99 +1,194 @@
-from typing import Optional, List
+from typing import Optional, List, Union
+
+import numpy as np
 
 from permutation import Permutation
 from permutationchain import PermutationChain
+from transformationview import TransformationView
+
+Chains = Union["PermutationChain", np.ndarray]
 
 
 class Transformation:
     """
     Provides symmetry transformations for permutation chains.
+
+    Every transformation accepts either a PermutationChain or an integer array of shape (m, n), or of
+    shape (B, m, n) for a batch of chains, and returns the same kind of value. Arrays are transformed
+    with a single fancy-indexing operation and are not validated; use `is_valid` to check them.
+
+    Transforming a `TransformationView` (see `view`) composes the transformation into the view in
+    O(n) instead of copying the chain, so a sequence of transformations costs a single pass.
     """
 
     @staticmethod
-    def permute_rows(chain: "PermutationChain", perm: Permutation) -> "PermutationChain":
+    def view(chain: "PermutationChain") -> TransformationView:
+        """
+        Starts a lazy view of a chain, which later transformations compose into.
+
+        Args:
+            chain (PermutationChain): The chain to view.
+
+        Returns:
+            TransformationView: An identity view of the chain.
+        """
+        return TransformationView.of(chain)
+
+    @staticmethod
+    def permute_rows(chain: Chains, perm: Permutation) -> Chains:
         """
         Applies a row permutation to the permutation chain.
 
         Args:
-            chain (PermutationChain): The input permutation chain.
+            chain (PermutationChain | np.ndarray): The input permutation chain, or an array of chains.
             perm (Permutation): The row permutation to apply.
 
         Returns:
-            PermutationChain: A new permutation chain with the specified row permutation applied.
+            PermutationChain | np.ndarray: A new permutation chain with the specified row permutation applied.
         """
+        if isinstance(chain, np.ndarray):
+            return chain[..., Transformation._inverse(perm), :]
+        if isinstance(chain, TransformationView):
+            return chain.permute_rows(perm)
+
+        # Rows are immutable, so reordering the references is already the cheapest form.
         new_chain: List[Optional[Permutation]] = [None for _ in range(len(chain))]
-        for current_index, desired_index in enumerate(perm.values):
+        for current_index, desired_index in enumerate(perm._values):
             new_chain[desired_index] = chain[current_index]
 
         return PermutationChain(new_chain)
 
     @staticmethod
-    def permute_columns(chain: "PermutationChain", perm: Permutation) -> "PermutationChain":
+    def permute_columns(chain: Chains, perm: Permutation) -> Chains:
         """
         Applies a column permutation to the permutation chain.
 
         Args:
-            chain (PermutationChain): The input permutation chain.
+            chain (PermutationChain | np.ndarray): The input permutation chain, or an array of chains.
             perm (Permutation): The column permutation to apply.
 
         Returns:
-            PermutationChain: A new permutation chain with the specified column permutation applied.
+            PermutationChain | np.ndarray: A new permutation chain with the specified column permutation applied.
         """
-        new_permutations = []
-
-        for row in chain:
-            permuted_values = row.values[:]  # Copy row values
-            for old_index, new_index in enumerate(perm.values):
-                permuted_values[new_index] = row.values[old_index]
-            new_permutations.append(Permutation(permuted_values))
-
-        return PermutationChain(new_permutations)
+        if isinstance(chain, np.ndarray):
+            return chain[..., Transformation._inverse(perm)]
+        if isinstance(chain, TransformationView):
+            return chain.permute_columns(perm)
+        if len(chain) == 0:
+            return PermutationChain([])
+        return PermutationChain._from_numpy(Transformation._values(chain)[:, Transformation._inverse(perm)])
 
     @staticmethod
-    def transpose(chain: "PermutationChain") -> Optional["PermutationChain"]:
+    def transpose(chain: Chains, validate: bool = True) -> Optional[Chains]:
         """
         Transposes a square permutation chain if valid.
 
         Args:
-            chain (PermutationChain): The input permutation chain.
+            chain (PermutationChain | np.ndarray): The input permutation chain, or an array of chains.
+            validate (bool): Checks that the rows of a transposed PermutationChain are permutations, which
+                holds for every Latin square; skipping the check is only safe for Latin squares.
 
         Returns:
-            Optional[PermutationChain]: The transposed chain if valid, otherwise None.
+            Optional[PermutationChain | np.ndarray]: The transposed chain if valid, otherwise None.
         """
-        n = len(chain)
-        if any(len(p.values) != n for p in chain.permutations):
-            return None  # Not a square matrix
-        transposed = [[chain.permutations[j].values[i] for j in range(n)] for i in range(n)]
-        try:
-            return PermutationChain([Permutation(row) for row in transposed])
-        except ValueError:
-            return None  # Invalid permutation chain after transpose
+        if isinstance(chain, TransformationView) and chain.is_latin_square:
+            return chain.transpose()
+        return Transformation._square_map(chain, lambda values: np.swapaxes(values, -1, -2), validate)
 
     @staticmethod
-    def rotate(chain: "PermutationChain", direction: str, rotations: int) -> Optional["PermutationChain"]:
+    def rotate(chain: Chains, direction: str, rotations: int, validate: bool = True) -> Optional[Chains]:
         """
         Rotates a square permutation chain by 90-degree increments.
 
+        The rotation is a single index map, whatever the number of quarter turns.
+
         Args:
-            chain (PermutationChain): The input permutation chain.
+            chain (PermutationChain | np.ndarray): The input permutation chain, or an array of chains.
             direction (str): "clockwise" or "counterclockwise".
             rotations (int): Number of 90-degree rotations.
+            validate (bool): Checks that the rows of a rotated PermutationChain are permutations, which
+                holds for every Latin square; skipping the check is only safe for Latin squares.
 
         Returns:
-            Optional[PermutationChain]: The rotated chain if valid, otherwise None.
+            Optional[PermutationChain | np.ndarray]: The rotated chain if valid, otherwise None.
+
+        Raises:
+            ValueError: If the direction is neither "clockwise" nor "counterclockwise".
         """
+        if direction not in ("clockwise", "counterclockwise"):
+            raise ValueError(f"Invalid direction: {direction!r}. Expected 'clockwise' or 'counterclockwise'.")
+        if isinstance(chain, TransformationView) and chain.is_latin_square:
+            return chain.rotate(direction, rotations)
+        turns = -rotations % 4 if direction == "clockwise" else rotations % 4
+        return Transformation._square_map(chain, lambda values: np.rot90(values, turns, axes=(-2, -1)), validate)
+
+    @staticmethod
+    def permute_symbols(chain: Chains, perm: Permutation) -> Chains:
+        """
+        Relabels every symbol s of the permutation chain as perm[s].
+
+        Args:
+            chain (PermutationChain | np.ndarray): The input permutation chain, or an array of chains.
+            perm (Permutation): The symbol permutation to apply.
+
+        Returns:
+            PermutationChain | np.ndarray: A new permutation chain with the symbols relabeled.
+        """
+        if isinstance(chain, TransformationView):
+            return chain.permute_symbols(perm)
+        labels = np.frombuffer(perm._values, dtype=np.dtype(perm._values.typecode))
+        if isinstance(chain, np.ndarray):
+            return labels[chain]
+        if len(chain) == 0:
+            return PermutationChain([])
+        return PermutationChain._from_numpy(labels[Transformation._values(chain)])
+
+    @staticmethod
+    def is_valid(values: np.ndarray) -> Union[bool, np.ndarray]:
+        """
+        Checks that every row of an array of chains is a permutation.
+
+        Args:
+            values (np.ndarray): An integer array of shape (m, n) or (B, m, n).
+
+        Returns:
+            bool | np.ndarray: Whether the chain is valid, or one flag per chain of a batch.
+        """
+        rows = np.sort(values, axis=-1) == np.arange(values.shape[-1])
+        return rows.all(axis=(-2, -1))
+
+    @staticmethod
+    def _inverse(perm: Permutation) -> np.ndarray:
+        """
+        Returns the inverse of a permutation as an index array.
+        """
+        values = perm.inverse()._values
+        return np.frombuffer(values, dtype=np.dtype(values.typecode))
+
+    @staticmethod
+    def _values(chain: "PermutationChain") -> np.ndarray:
+        """
+        Returns a read-only (m, n) view of the values of a non-empty chain in their compact type.
+        """
+        buffer = chain.to_buffer()
+        return np.frombuffer(buffer, dtype=np.dtype(buffer.typecode)).reshape(len(chain), -1)
+
+    @staticmethod
+    def _square_map(chain: Chains, index_map, validate: bool) -> Optional[Chains]:
+        """
+        Applies an index map that is only defined on square chains, such as a transpose or a rotation.
+        """
+        if isinstance(chain, np.ndarray):
+            if chain.shape[-2] != chain.shape[-1]:
+                return None  # Not a square matrix
+            return np.ascontiguousarray(index_map(chain))
+
         n = len(chain)
-        if any(len(p.values) != n for p in chain.permutations):
+        if any(len(p) != n for p in chain.permutations):
             return None  # Not a square matrix
-
-        rotated = [row.values[:] for row in chain.permutations]
-        for _ in range(rotations % 4):
-            if direction == "clockwise":
-                rotated = [[rotated[n - j - 1][i] for j in range(n)] for i in range(n)]
-            else:
-                rotated = [[rotated[j][n - i - 1] for j in range(n)] for i in range(n)]
-
-        try:
-            return PermutationChain([Permutation(row) for row in rotated])
-        except ValueError:
-            return None  # Invalid permutation chain after rotation
\ No newline at end of file
+        if n == 0:
+            return PermutationChain([])
+        values = index_map(Transformation._values(chain))
+        if validate and not Transformation.is_valid(values):
+            return None  # Invalid permutation chain after the transformation
+        return PermutationChain._from_numpy(values)
@@ -0,0 +1,185 @@
+from typing import List, Optional
+
+import numpy as np
+
+from permutation import Permutation
+from permutationchain import PermutationChain
+
+
+class TransformationView(PermutationChain):
+    """
+    A permutation chain defined lazily as a transformed view of another chain.
+
+    The view records a row map R, a column map C and a symbol map S over its base chain B, so that
+    its value at row i and column j is S[B[R[i]][C[j]]] (or S[B[C[j]]][R[i]]] once transposed).
+    Transformations of a view compose these maps in O(n) and return a new view; the rows are only
+    materialized, in a single pass over the base chain, when they are first read.
+
+    Example:
+        >>> view = TransformationView.of(square).permute_columns(p).permute_rows(q).transpose()
+        >>> view[0]  # Materializes the rows once
+    """
+
+    def __init__(self, base: PermutationChain, rows: np.ndarray, columns: np.ndarray,
+                 symbols: Optional[np.ndarray] = None, transposed: bool = False):
+        """
+        Initializes a view from its maps. Use `of` to start a view of a chain.
+
+        Args:
+            base (PermutationChain): The chain the view reads from (never itself a view).
+            rows (np.ndarray): The row map R.
+            columns (np.ndarray): The column map C.
+            symbols (np.ndarray, optional): The symbol map S (the identity when None).
+            transposed (bool): Whether rows of the view are read from columns of the base chain.
+        """
+        self.base = base
+        self.rows = rows
+        self.columns = columns
+        self.symbols = symbols
+        self.transposed = transposed
+        self.is_latin_square = base.is_latin_square
+        self._permutations: Optional[List[Permutation]] = None
+        self._key = None
+
+    @staticmethod
+    def of(chain: PermutationChain) -> "TransformationView":
+        """
+        Starts an identity view of a chain.
+
+        Args:
+            chain (PermutationChain): The chain to view.
+
+        Returns:
+            TransformationView: The chain itself if it is already a view, otherwise an identity view of it.
+        """
+        if isinstance(chain, TransformationView):
+            return chain
+        width = chain._width()
+        return TransformationView(chain, np.arange(len(chain)), np.arange(width))
+
+    @property
+    def permutations(self) -> List[Permutation]:
+        """
+        Returns the rows of the view, materializing them on first use.
+        """
+        if self._permutations is None:
+            self._permutations = self.materialize().permutations
+        return self._permutations
+
+    def materialize(self) -> PermutationChain:
+        """
+        Builds the rows of the view as a plain chain, in one gather over the base chain.
+
+        Returns:
+            PermutationChain: The transformed chain.
+        """
+        if len(self.rows) == 0:
+            return PermutationChain([])
+        base = self.base.permutations
+        values = np.frombuffer(self.base.to_buffer(), dtype=np.dtype(base[0]._values.typecode))
+        values = values.reshape(len(base), -1)
+        if self.transposed:
+            values = values.T
+        values = values[np.ix_(self.rows, self.columns)]
+        if self.symbols is not None:
+            values = self.symbols[values]
+        return PermutationChain._from_numpy(values)
+
+    def value(self, row: int, column: int) -> int:
+        """
+        Reads a single value of the view without materializing it.
+
+        Args:
+            row (int): The row index.
+            column (int): The column index.
+
+        Returns:
+            int: The symbol at that position.
+        """
+        r, c = int(self.rows[row]), int(self.columns[column])
+        value = self.base.permutations[c]._values[r] if self.transposed else self.base.permutations[r]._values[c]
+        return int(self.symbols[value]) if self.symbols is not None else value
+
+    def column(self, column: int) -> List[int]:
+        """
+        Reads a column of the view without materializing it.
+
+        Args:
+            column (int): The column index.
+
+        Returns:
+            List[int]: The symbols of the column from top to bottom.
+        """
+        return [self.value(row, column) for row in range(len(self.rows))]
+
+    def permute_rows(self, perm: Permutation) -> "TransformationView":
+        """
+        Moves row i of the view to row perm[i], like `Transformation.permute_rows`.
+        """
+        return self._with(rows=self.rows[TransformationView._inverse(perm)])
+
+    def permute_columns(self, perm: Permutation) -> "TransformationView":
+        """
+        Moves column j of the view to column perm[j], like `Transformation.permute_columns`.
+        """
+        return self._with(columns=self.columns[TransformationView._inverse(perm)])
+
+    def permute_symbols(self, perm: Permutation) -> "TransformationView":
+        """
+        Relabels every symbol s of the view as perm[s].
+        """
+        labels = np.frombuffer(perm._values, dtype=np.dtype(perm._values.typecode)).astype(np.intp)
+        return self._with(symbols=labels if self.symbols is None else labels[self.symbols])
+
+    def transpose(self) -> "TransformationView":
+        """
+        Swaps the rows and columns of a view of a Latin square. Other chains are transposed by
+        `Transformation.transpose`, which checks the result.
+
+        Raises:
+            ValueError: If the view is not a view of a Latin square.
+        """
+        if not self.is_latin_square:
+            raise ValueError("Invalid view: Only views of Latin squares can be transposed lazily.")
+        return TransformationView(self.base, self.columns, self.rows, self.symbols, not self.transposed)
+
+    def rotate(self, direction: str, rotations: int) -> "TransformationView":
+        """
+        Rotates a view of a Latin square by 90-degree increments, like `Transformation.rotate`.
+
+        Raises:
+            ValueError: If the direction is neither "clockwise" nor "counterclockwise", or if the view
+                is not a view of a Latin square.
+        """
+        if direction not in ("clockwise", "counterclockwise"):
+            raise ValueError(f"Invalid direction: {direction!r}. Expected 'clockwise' or 'counterclockwise'.")
+        view = self
+        for _ in range(rotations % 4):
+            view = view.transpose()
+            if direction == "clockwise":
+                view = view._with(columns=view.columns[::-1])
+            else:
+                view = view._with(rows=view.rows[::-1])
+        return view
+
+    def _with(self, rows: Optional[np.ndarray] = None, columns: Optional[np.ndarray] = None,
+              symbols: Optional[np.ndarray] = None) -> "TransformationView":
+        """
+        Returns a view over the same base chain with some of the maps replaced.
+        """
+        return TransformationView(self.base, self.rows if rows is None else rows,
+                                  self.columns if columns is None else columns,
+                                  self.symbols if symbols is None else symbols, self.transposed)
+
+    @staticmethod
+    def _inverse(perm: Permutation) -> np.ndarray:
+        """
+        Returns the inverse of a permutation as an index array.
+        """
+        return np.argsort(np.frombuffer(perm._values, dtype=np.dtype(perm._values.typecode)))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _width(self) -> int:
+        return len(self.columns) if len(self.rows) else 0
@@ -0,0 +1,241 @@
+import os
+import pickle
+import shutil
+import socket
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+Task = Tuple[str, int, int]
+
+
+class WorkQueue:
+    """
+    A queue of trial chunks shared through a directory, so workers on any host that mounts it can pull work.
+
+    A coordinator starts a job by writing its parameters and one task file per chunk of trials. Workers
+    claim a task by atomically renaming it from "pending" to "leased", keep the lease alive by touching
+    the leased file while they run it, and write the result to "results" before dropping the lease.
+    Leases that have not been renewed within a timeout are moved back to "pending", so the chunks of
+    workers that crashed or lost their host are handed to other workers. Trials are seeded from the job
+    seed and their index, so a reassigned chunk produces the same results, and a result written
+    twice is simply read once. The directory layout is:
+
+        <path>/current                   the id of the running job
+        <path>/<job>/job.pkl             the parameters, seed and chunk settings of the job
+        <path>/<job>/pending/<task>      tasks waiting for a worker
+        <path>/<job>/leased/<task>       claimed tasks, holding the worker id, touched on renewal
+        <path>/<job>/results/<task>      pickled results
+        <path>/<job>/done                written once the coordinator has every result
+
+    Lease expiry compares file modification times with the coordinator's clock, so hosts sharing the
+    directory should have reasonably synchronized clocks (or a file server that sets the times).
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens a queue directory, creating it if needed.
+
+        Args:
+            path (str): The shared directory.
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def start(self, params: Dict[str, Any], chunks: List[Tuple[int, int]], seed: Optional[int] = None,
+              instrumentation: Optional[Tuple[bool]] = None, aggregators: Optional[Dict[str, Any]] = None,
+              keep_results: bool = True) -> str:
+        """
+        Starts a job and makes it the one workers pull from.
+
+        Args:
+            params (Dict[str, Any]): The parameters passed to every trial.
+            chunks (List[Tuple[int, int]]): The first trial and the number of trials of each task.
+            seed (int, optional): The experiment seed, combined with each trial index.
+            instrumentation (Tuple[bool], optional): The instrumentation settings passed to the workers.
+            aggregators (Dict[str, Aggregator], optional): The aggregators workers fold each chunk into.
+            keep_results (bool): Whether workers return the individual results as well as the aggregates.
+
+        Returns:
+            str: The id of the new job.
+        """
+        job = uuid.uuid4().hex
+        for directory in ("pending", "leased", "results"):
+            os.makedirs(os.path.join(self.path, job, directory))
+        WorkQueue._write(os.path.join(self.path, job, "job.pkl"),
+                         pickle.dumps({"id": job, "params": params, "seed": seed, "instrumentation": instrumentation,
+                                       "aggregators": aggregators or {}, "keep_results": keep_results}))
+        for start, count in chunks:
+            open(os.path.join(self.path, job, "pending", WorkQueue._name(start, count)), "wb").close()
+        WorkQueue._write(os.path.join(self.path, "current"), job.encode())
+        return job
+
+    def job(self) -> Optional[Dict[str, Any]]:
+        """
+        Reads the running job.
+
+        Returns:
+            Optional[Dict[str, Any]]: The job's "id", "params", "seed", "instrumentation", "aggregators" and
+                "keep_results", or None when there is no running job.
+        """
+        try:
+            with open(os.path.join(self.path, "current"), "rb") as f:
+                job = f.read().decode()
+            if os.path.exists(os.path.join(self.path, job, "done")):
+                return None
+            with open(os.path.join(self.path, job, "job.pkl"), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+    def claim(self, job: str, worker: str) -> Optional[Task]:
+        """
+        Leases a pending task of a job to a worker.
+
+        Args:
+            job (str): The job id.
+            worker (str): An identifier of the worker, recorded in the lease.
+
+        Returns:
+            Optional[Task]: The task name, first trial and number of trials, or None if no task is pending.
+        """
+        pending = os.path.join(self.path, job, "pending")
+        try:
+            names = sorted(os.listdir(pending))
+        except FileNotFoundError:
+            return None
+        for name in names:
+            leased = os.path.join(self.path, job, "leased", name)
+            try:
+                os.utime(os.path.join(pending, name))
+                os.rename(os.path.join(pending, name), leased)
+            except FileNotFoundError:
+                continue  # Another worker claimed it first
+            with open(leased, "w") as f:
+                f.write(worker)
+            start, count = WorkQueue._parse(name)
+            return name, start, count
+        return None
+
+    def renew(self, job: str, task: str) -> bool:
+        """
+        Extends the lease of a task.
+
+        Returns:
+            bool: False if the lease has expired and the task went back to the pending tasks.
+        """
+        try:
+            os.utime(os.path.join(self.path, job, "leased", task))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, job: str, task: str, result: Any):
+        """
+        Stores the result of a task and drops its lease.
+
+        Args:
+            job (str): The job id.
+            task (str): The task name.
+            result (Any): The result, pickled into the results directory.
+        """
+        results = os.path.join(self.path, job, "results")
+        if not os.path.isdir(results):
+            return  # The job was finished and removed while this task ran
+        try:
+            WorkQueue._write(os.path.join(results, task), pickle.dumps(result))
+        except FileNotFoundError:
+            return  # Removed while the result was being written
+        for state in ("leased", "pending"):
+            try:
+                os.remove(os.path.join(self.path, job, state, task))
+            except FileNotFoundError:
+                pass
+
+    def release_expired(self, job: str, timeout: float) -> int:
+        """
+        Returns the tasks whose lease was not renewed within the timeout to the pending tasks.
+
+        Args:
+            job (str): The job id.
+            timeout (float): The lease duration in seconds.
+
+        Returns:
+            int: The number of reassigned tasks.
+        """
+        leased = os.path.join(self.path, job, "leased")
+        released = 0
+        now = time.time()
+        for name in os.listdir(leased):
+            path = os.path.join(leased, name)
+            try:
+                if now - os.path.getmtime(path) <= timeout:
+                    continue
+                if os.path.exists(os.path.join(self.path, job, "results", name)):
+                    os.remove(path)
+                else:
+                    os.rename(path, os.path.join(self.path, job, "pending", name))
+                    released += 1
+            except FileNotFoundError:
+                pass  # Completed or renewed concurrently
+        return released
+
+    def results(self, job: str, seen: Set[str]) -> Iterator[Tuple[str, int, int, Any]]:
+        """
+        Reads the results that are not in `seen` yet.
+
+        Args:
+            job (str): The job id.
+            seen (Set[str]): The names of the tasks already read.
+
+        Yields:
+            Tuple[str, int, int, Any]: The task name, first trial, number of trials and result.
+        """
+        results = os.path.join(self.path, job, "results")
+        for name in sorted(os.listdir(results)):
+            if name in seen or name.startswith("."):
+                continue
+            with open(os.path.join(results, name), "rb") as f:
+                result = pickle.load(f)
+            start, count = WorkQueue._parse(name)
+            yield name, start, count, result
+
+    def finish(self, job: str, remove: bool = True):
+        """
+        Marks a job as done, so workers stop pulling from it, and optionally deletes its files.
+
+        Args:
+            job (str): The job id.
+            remove (bool): Deletes the job directory, with its parameters, tasks and results. Workers
+                still running one of its tasks then drop their result.
+        """
+        WorkQueue._write(os.path.join(self.path, job, "done"), b"")
+        if remove:
+            shutil.rmtree(os.path.join(self.path, job), ignore_errors=True)
+
+    @staticmethod
+    def worker_id() -> str:
+        """
+        Returns an identifier of the current process that is unique across hosts.
+        """
+        return f"{socket.gethostname()}-{os.getpid()}"
+
+    @staticmethod
+    def _name(start: int, count: int) -> str:
+        return f"{start:012d}-{count}"
+
+    @staticmethod
+    def _parse(name: str) -> Tuple[int, int]:
+        start, count = name.split("-")
+        return int(start), int(count)
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        """
+        Writes a file atomically, so readers never see it partially written.
+        """
+        fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)